@@ -3,35 +3,22 @@ WASTE IQ – Firebase Authentication & Authorization
 Verifies Firebase ID tokens and enforces role-based access.
 """
 
-import os
-from pathlib import Path
 from functools import wraps
 from typing import Optional, List
-import firebase_admin
-from firebase_admin import credentials, auth as firebase_auth
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from dotenv import load_dotenv
-
-# Load .env from project root (waste_iq/) regardless of launch directory
-_ROOT = Path(__file__).parent.parent
-load_dotenv(_ROOT / ".env")
-
-# ── Firebase Admin SDK Init ───────────────────────────────────────────────────
-def _init_firebase():
-    if not firebase_admin._apps:
-        sa_path = os.getenv("FIREBASE_SERVICE_ACCOUNT_PATH", "./firebase_service_account.json")
-        sa_resolved = (
-            Path(sa_path) if Path(sa_path).is_absolute()
-            else _ROOT / sa_path.lstrip("./")
-        )
-        if sa_resolved.exists():
-            cred = credentials.Certificate(str(sa_resolved))
-        else:
-            cred = credentials.ApplicationDefault()
-        firebase_admin.initialize_app(cred)
 
-_init_firebase()
+# Firebase Admin SDK is initialised lazily on the first auth call
+from firebase_app import firebase_auth as _firebase_auth
+import token_cache as _token_cache
+import token_verifier as _token_verifier
+import user_index as _user_index
+
+# Verified claims keyed by token hash, valid until the token's exp
+token_cache = _token_cache.cache_from_env()
+# In-process signature check (AUTH_VERIFIER=local / stand-in); None → firebase_admin
+verifier = _token_verifier.verifier_from_env()
 
 # ── HTTP Bearer auth scheme ───────────────────────────────────────────────────
 security = HTTPBearer(auto_error=False)
@@ -60,21 +47,86 @@ async def get_current_user(
         )
 
     token = credentials.credentials
+    decoded = token_cache.get(token)
+    if decoded is None:
+        decoded = await _verify_token(token)
+        token_cache.put(token, decoded)
+
+    uid   = decoded.get("uid", "")
+    email = decoded.get("email", "")
+    role  = decoded.get("role", "household")   # custom claim
+    name  = decoded.get("name", "")
+
+    return UserInfo(uid=uid, email=email, role=role, name=name)
+
+
+async def _verify_token(token: str) -> dict:
+    decoded = _verify_signature(token)
+    if token_cache.is_stale(decoded):
+        # Issued before a role change / disable: its role claim may be out of date.
+        # The revocation check and account lookup are blocking Admin SDK calls
+        decoded = await run_in_threadpool(_current_claims, token, decoded)
+    return decoded
+
+
+def _current_claims(token: str, decoded: dict) -> dict:
+    """Claims of a stale token with the role taken from the account as it is now."""
+    if verifier is not None and verifier.stand_in:
+        # No account store behind stand-in tokens – make the client mint a new one
+        raise HTTPException(status_code=401, detail="Token predates an account change, sign in again")
+    decoded = _sdk_verify(token, check_revoked=True)     # revoked / disabled → 401
+    try:
+        record = _firebase_auth().get_user(decoded["uid"])
+    except Exception as e:
+        raise HTTPException(status_code=401, detail=f"Auth error: {str(e)}")
+    if record.disabled:
+        raise HTTPException(status_code=401, detail="User disabled")
+    return {**decoded, "role": (record.custom_claims or {}).get("role", "household")}
+
+
+def _verify_signature(token: str) -> dict:
+    if verifier is None:
+        return _sdk_verify(token)
     try:
-        decoded = firebase_auth.verify_id_token(token)
+        return verifier.verify(token)
+    except _token_verifier.KeysUnavailableError:
+        raise HTTPException(status_code=503, detail="Token signing keys unavailable, retry shortly",
+                            headers={"Retry-After": "5"})
+    except _token_verifier.ExpiredTokenError:
+        raise HTTPException(status_code=401, detail="Token expired")
+    except _token_verifier.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    except Exception as e:
+        raise HTTPException(status_code=401, detail=f"Auth error: {str(e)}")
+
+
+def _sdk_verify(token: str, check_revoked: bool = False) -> dict:
+    firebase_auth = _firebase_auth()
+    try:
+        return firebase_auth.verify_id_token(token, check_revoked=check_revoked)
     except firebase_auth.ExpiredIdTokenError:
         raise HTTPException(status_code=401, detail="Token expired")
+    except firebase_auth.RevokedIdTokenError:
+        raise HTTPException(status_code=401, detail="Token revoked")
+    except firebase_auth.UserDisabledError:
+        raise HTTPException(status_code=401, detail="User disabled")
     except firebase_auth.InvalidIdTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
     except Exception as e:
         raise HTTPException(status_code=401, detail=f"Auth error: {str(e)}")
 
-    uid   = decoded.get("uid", "")
-    email = decoded.get("email", "")
-    role  = decoded.get("role", "household")   # custom claim
-    name  = decoded.get("name", "")
 
-    return UserInfo(uid=uid, email=email, role=role, name=name)
+def start_verifier() -> Optional[str]:
+    """Load signing keys and start their background refresh; returns the mode or None."""
+    if verifier is None:
+        return None
+    verifier.keys.start()
+    return "stand-in" if verifier.stand_in else verifier.keys.stats()["source"]
+
+
+def stop_verifier() -> None:
+    if verifier is not None:
+        verifier.keys.stop()
 
 
 # ── Role Dependency Factories ─────────────────────────────────────────────────
@@ -103,41 +155,58 @@ def set_user_role(uid: str, role: str) -> None:
     valid_roles = {"household", "municipal", "driver", "admin"}
     if role not in valid_roles:
         raise ValueError(f"Invalid role: {role}")
-    firebase_auth.set_custom_user_claims(uid, {"role": role})
+    _firebase_auth().set_custom_user_claims(uid, {"role": role})
+    token_cache.invalidate_user(uid)
+    user_index.patch(uid, role=role)
 
 
 # ── Admin: Create User ────────────────────────────────────────────────────────
 def create_user(email: str, password: str, display_name: str) -> str:
     """Create a Firebase Auth user and return UID."""
-    user = firebase_auth.create_user(
+    user = _firebase_auth().create_user(
         email=email,
         password=password,
         display_name=display_name,
         email_verified=False
     )
+    user_index.upsert(_user_record(user))
     return user.uid
 
 
 # ── Admin: List Users ─────────────────────────────────────────────────────────
-def list_all_users():
-    """List all Firebase Auth users (admin only)."""
-    users = []
-    page = firebase_auth.list_users()
+def _user_record(u) -> dict:
+    claims = u.custom_claims or {}
+    return {
+        "uid":          u.uid,
+        "email":        u.email,
+        "display_name": u.display_name,
+        "role":         claims.get("role", "household"),
+        "disabled":     u.disabled,
+        "created_at":   u.user_metadata.creation_timestamp,
+    }
+
+
+def _iter_auth_users():
+    """Every Firebase Auth user, one list_users page (1000) at a time."""
+    page = _firebase_auth().list_users()
     while page:
         for u in page.users:
-            claims = u.custom_claims or {}
-            users.append({
-                "uid":          u.uid,
-                "email":        u.email,
-                "display_name": u.display_name,
-                "role":         claims.get("role", "household"),
-                "disabled":     u.disabled,
-                "created_at":   u.user_metadata.creation_timestamp,
-            })
+            yield _user_record(u)
         page = page.get_next_page()
-    return users
+
+
+# Sorted, periodically rebuilt copy of the Auth user list for GET /auth/users
+user_index = _user_index.UserIndex(_iter_auth_users, _user_index.refresh_interval_from_env())
+
+
+def list_users_page(page_size: int = None, page_token: str = None, role: str = None,
+                    email_prefix: str = None):
+    """Admin: one page of users ordered by email → (users, next_page_token, total)."""
+    return user_index.page(page_size, page_token, role=role, email_prefix=email_prefix)
 
 
 # ── Admin: Disable/Enable User ────────────────────────────────────────────────
 def set_user_disabled(uid: str, disabled: bool) -> None:
-    firebase_auth.update_user(uid, disabled=disabled)
+    _firebase_auth().update_user(uid, disabled=disabled)
+    token_cache.invalidate_user(uid)
+    user_index.patch(uid, disabled=disabled)
@@ -0,0 +1,273 @@
+"""
+WASTE IQ – Bin Registry
+Opt-in, in-memory materialised view of the `bins` collection (BIN_REGISTRY=1).
+
+`bins` is read by list_bins, get_driver_bins, predict-batch, city_summary and
+every dashboard. The registry loads the collection once and then keeps itself
+current:
+
+  • firestore – from on_snapshot change events (StorageBackend.watch)
+  • memory / sqlite – by re-reading the collection every
+    BIN_REGISTRY_POLL_INTERVAL seconds and applying the diff. Writes made
+    through firestore_client only mark the touched ids dirty and wake the
+    poll thread, which re-reads them in one get_docs (a whole batch_write
+    costs one read); until that lands, reads fall through to the backend,
+    so a writer still reads its own write and never waits on the refresh.
+
+firestore_client serves get_doc / get_docs / query_collection / query_page /
+stream_collection (sync and async) and count_docs for the collection from here
+once the initial load is done.
+Equality and `in` filters on ward_id, assigned_driver and status are answered
+from secondary indexes; any other filter, ordering and paging reuse the local
+backend semantics (_LocalBackend), so results match the backend's.
+"""
+
+import copy
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+try:  # imported as a top-level module from backend/ (uvicorn main:app)
+    from storage_backends import StorageBackend, _LocalBackend, _matches, _sort_key, _type_rank
+except ImportError:  # imported as backend.bin_registry
+    from backend.storage_backends import StorageBackend, _LocalBackend, _matches, _sort_key, _type_rank
+
+INDEX_FIELDS = ("ward_id", "assigned_driver", "status")
+DEFAULT_POLL_INTERVAL = 5.0
+LOAD_TIMEOUT = 30.0
+
+
+def _index_key(value: Any) -> Optional[Tuple[int, Any]]:
+    """Hashable index key matching Firestore == semantics (1 == 1.0, True != 1)."""
+    if _type_rank(value) == 4:
+        return None   # maps / arrays / timestamps are not indexed
+    return _sort_key(value)
+
+
+class BinRegistry(_LocalBackend):
+    """Read-only view of one collection; query/query_page/aggregate come from _LocalBackend."""
+
+    name = "registry"
+
+    def __init__(self, backend: StorageBackend, collection: str = "bins",
+                 index_fields: Tuple[str, ...] = INDEX_FIELDS,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL):
+        self.collection    = collection
+        self.index_fields  = tuple(index_fields)
+        self.poll_interval = poll_interval
+        self._backend      = backend
+
+        self._lock = threading.RLock()
+        # Stored dicts are replaced on change, never mutated (see MemoryBackend)
+        self._docs: Dict[str, Dict] = {}
+        self._index: Dict[str, Dict[Tuple[int, Any], Set[str]]] = {
+            f: defaultdict(set) for f in self.index_fields}
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._unsubscribe = None
+        self._thread: Optional[threading.Thread] = None
+        # Written through firestore_client but not re-read yet (poll mode);
+        # _dirty_all after a write whose id is unknown (failed auto-id add)
+        self._dirty: Set[str] = set()
+        self._dirty_all = False
+        self.mode = None
+        self.stats = {"changes": 0, "resyncs": 0, "refreshes": 0}
+
+    # ── Lifecycle ─────────────────────────────────────────────
+
+    def start(self, timeout: float = LOAD_TIMEOUT) -> "BinRegistry":
+        """Load the collection and subscribe; falls back to polling without push support."""
+        self._unsubscribe = self._backend.watch(self.collection, self._apply_changes)
+        if self._unsubscribe is not None:
+            self.mode = "snapshot"
+            if not self._ready.wait(timeout):
+                print(f"⚠️  Bin registry: initial snapshot of {self.collection} still loading")
+            return self
+
+        self.mode = "poll"
+        self.resync()
+        self._thread = threading.Thread(target=self._poll, name="bin-registry", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 5)
+            self._thread = None
+        self._ready.clear()
+
+    def serves(self, collection: str) -> bool:
+        """Loaded, and no write is waiting to be re-read (reads go to the backend meanwhile)."""
+        return (collection == self.collection and self._ready.is_set()
+                and not self._dirty and not self._dirty_all)
+
+    # ── Change application ────────────────────────────────────
+
+    def _apply_changes(self, changes: List[Tuple[str, Optional[Dict]]]) -> None:
+        """Snapshot listener callback: [(doc_id, doc or None if removed), ...]."""
+        with self._lock:
+            for doc_id, doc in changes:
+                self._put(doc_id, doc)
+            self.stats["changes"] += len(changes)
+        self._ready.set()
+
+    def _put(self, doc_id: str, doc: Optional[Dict]) -> None:
+        """Replace (or remove) one document and its index entries. Caller holds the lock."""
+        old = self._docs.pop(doc_id, None)
+        if old is not None:
+            for f in self.index_fields:
+                key = _index_key(old.get(f))
+                if key is not None:
+                    ids = self._index[f].get(key)
+                    if ids is not None:
+                        ids.discard(doc_id)
+                        if not ids:
+                            del self._index[f][key]
+        if doc is None:
+            return
+        doc = {k: v for k, v in doc.items() if k != "_id"}
+        self._docs[doc_id] = doc
+        for f in self.index_fields:
+            key = _index_key(doc.get(f))
+            if key is not None:
+                self._index[f][key].add(doc_id)
+
+    def resync(self) -> int:
+        """Re-read the whole collection and apply the diff; returns the number of changed docs."""
+        with self._lock:
+            was_dirty, self._dirty_all = self._dirty_all, False
+        try:
+            fresh = {d.pop("_id"): d for d in self._backend.query(self.collection)}
+        except Exception:
+            with self._lock:
+                self._dirty_all = self._dirty_all or was_dirty
+            raise
+        with self._lock:
+            # Ids written during the read are still dirty and get re-read on their own
+            changed = [(i, d) for i, d in fresh.items() if i not in self._dirty and self._docs.get(i) != d]
+            changed += [(i, None) for i in self._docs if i not in fresh and i not in self._dirty]
+            for doc_id, doc in changed:
+                self._put(doc_id, doc)
+            self.stats["resyncs"] += 1
+            self.stats["changes"] += len(changed)
+        self._ready.set()
+        return len(changed)
+
+    def note_write(self, doc_id: Optional[str] = None) -> None:
+        """
+        Called by firestore_client after a write to the collection – possibly
+        on the event loop, so it never reads the backend itself. Polling mode
+        marks the id dirty and wakes the poll thread; snapshot mode waits for
+        the change event.
+        """
+        if self.mode != "poll":
+            return
+        with self._lock:
+            if doc_id is None:
+                self._dirty_all = True
+            else:
+                self._dirty.add(doc_id)
+        self._wake.set()
+
+    def refresh(self) -> int:
+        """Re-read every dirty document in one get_docs (a resync after an unknown write)."""
+        with self._lock:
+            full, ids, self._dirty = self._dirty_all, self._dirty, set()
+        if full:
+            return self.resync()          # covers ids too
+        if not ids:
+            return 0
+        try:
+            docs = self._backend.get_docs(self.collection, list(ids))
+        except Exception:
+            with self._lock:
+                self._dirty |= ids
+            raise
+        with self._lock:
+            for doc_id in ids:
+                if doc_id not in self._dirty:       # written again meanwhile → next refresh
+                    self._put(doc_id, docs.get(doc_id))
+            self.stats["refreshes"] += 1
+        return len(ids)
+
+    def _poll(self) -> None:
+        next_resync = time.monotonic() + self.poll_interval
+        while True:
+            self._wake.wait(max(next_resync - time.monotonic(), 0))
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.refresh()
+                if time.monotonic() >= next_resync:
+                    next_resync = time.monotonic() + self.poll_interval
+                    self.resync()
+            except Exception as e:
+                print(f"⚠️  Bin registry poll failed: {e}")
+                self._stop.wait(1.0)
+
+    # ── Reads ─────────────────────────────────────────────────
+
+    def get_doc(self, collection, doc_id):
+        return self.get_docs(collection, [doc_id]).get(doc_id)
+
+    def get_docs(self, collection, doc_ids):
+        with self._lock:
+            found = {i: self._docs[i] for i in doc_ids if i in self._docs}
+        return {i: self._copy(doc, i) for i, doc in found.items()}
+
+    @staticmethod
+    def _copy(doc: Dict, doc_id: str) -> Dict:
+        return dict(copy.deepcopy(doc), _id=doc_id)
+
+    def _candidates(self, collection, filters):
+        with self._lock:
+            ids = self._indexed_ids(filters)
+            docs = self._docs.items() if ids is None else ((i, self._docs[i]) for i in ids)
+            return [dict(doc, _id=doc_id) for doc_id, doc in docs if _matches(doc, filters)]
+
+    def _indexed_ids(self, filters: Optional[List[tuple]]) -> Optional[Set[str]]:
+        """Smallest id set from an indexed ==/in filter, None to scan. Caller holds the lock."""
+        best = None
+        for field, op, value in filters or []:
+            if field not in self._index or op not in ("==", "in"):
+                continue
+            keys = [_index_key(v) for v in (value if op == "in" else [value])]
+            if any(k is None for k in keys):
+                continue
+            ids = set().union(*(self._index[field].get(k, ()) for k in keys))
+            if best is None or len(ids) < len(best):
+                best = ids
+        return best
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._docs)
+
+    def registry_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            indexes = {f: len(v) for f, v in self._index.items()}
+        return {
+            "collection": self.collection,
+            "mode":       self.mode,
+            "ready":      self._ready.is_set(),
+            "documents":  self.size(),
+            "index_keys": indexes,
+            "dirty":      len(self._dirty) + self._dirty_all,
+            **self.stats,
+        }
+
+
+def registry_config_from_env() -> Optional[Dict]:
+    """None unless BIN_REGISTRY is enabled (opt-in)."""
+    if os.getenv("BIN_REGISTRY", "").strip().lower() not in ("1", "true", "yes", "on"):
+        return None
+    return {"poll_interval": float(os.getenv("BIN_REGISTRY_POLL_INTERVAL", DEFAULT_POLL_INTERVAL))}
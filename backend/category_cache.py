@@ -0,0 +1,125 @@
+"""
+WASTE IQ – Learned Category Cache
+Object names that the deterministic WASTE_MAP lookup cannot place are sent to
+Gemini (_gemini_category_step) – a paid network call. Each answer is learned
+here once and served locally from then on:
+
+  tier 1 – in-process LRU (CATEGORY_CACHE_SIZE entries, default 5000)
+  tier 2 – the `category_cache` collection via firestore_client, so learned
+           names survive restarts and are shared by every instance (and work
+           the same on the memory / sqlite storage backends)
+
+Only real Gemini answers are learned; failed calls are not, so the next
+request retries. Counters: tier hits, misses, LLM calls and LLM calls saved.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+try:  # imported as a top-level module from backend/ (uvicorn main:app)
+    import firestore_client as _fc
+except ImportError:  # imported as backend.category_cache
+    from backend import firestore_client as _fc
+
+COLLECTION   = "category_cache"
+DEFAULT_SIZE = 5000
+
+
+def _doc_id(name: str) -> str:
+    # Names may contain "/" and other characters Firestore ids cannot
+    return hashlib.sha1(name.encode()).hexdigest()
+
+
+class CategoryCache:
+    def __init__(self, max_size: int = DEFAULT_SIZE, valid: Optional[set] = None):
+        self.max_size = max_size
+        self.valid    = valid
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self.memory_hits = 0
+        self.store_hits  = 0
+        self.misses      = 0
+        self.llm_calls   = 0
+        self.store_errors = 0
+
+    def get(self, name: str) -> Optional[str]:
+        """Learned category for a normalised name (memory, then store), or None."""
+        with self._lock:
+            category = self._entries.get(name)
+            if category is not None:
+                self._entries.move_to_end(name)
+                self.memory_hits += 1
+                return category
+
+        try:
+            doc = _fc.get_doc(COLLECTION, _doc_id(name))
+        except Exception as e:
+            self.store_errors += 1
+            print(f"⚠️  category_cache read failed: {e}")
+            doc = None
+        category = doc.get("category") if doc and doc.get("name") == name else None
+        if category is None or (self.valid and category not in self.valid):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.store_hits += 1
+            self._remember(name, category)
+        return category
+
+    def learn(self, name: str, category: str, source: str = "gemini") -> None:
+        with self._lock:
+            self.llm_calls += 1
+            self._remember(name, category)
+        try:
+            _fc.set_doc(COLLECTION, _doc_id(name), {
+                "name":       name,
+                "category":   category,
+                "source":     source,
+                "learned_at": datetime.now(timezone.utc).isoformat(),
+            })
+        except Exception as e:
+            self.store_errors += 1
+            print(f"⚠️  category_cache write failed: {e}")
+
+    def note_llm_call(self) -> None:
+        """An LLM call whose answer was not learned (error / rate limit)."""
+        with self._lock:
+            self.llm_calls += 1
+
+    def _remember(self, name: str, category: str) -> None:
+        if self.max_size <= 0:
+            return
+        self._entries[name] = category
+        self._entries.move_to_end(name)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop tier 1 only; learned names stay in the store."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            saved = self.memory_hits + self.store_hits
+            return {
+                "size":            len(self._entries),
+                "max_size":        self.max_size,
+                "memory_hits":     self.memory_hits,
+                "store_hits":      self.store_hits,
+                "misses":          self.misses,
+                "llm_calls":       self.llm_calls,
+                "llm_calls_saved": saved,
+                "store_errors":    self.store_errors,
+                "hit_rate":        round(saved / (saved + self.misses), 4) if saved + self.misses else 0.0,
+            }
+
+
+def cache_from_env(valid: Optional[set] = None) -> CategoryCache:
+    raw = os.getenv("CATEGORY_CACHE_SIZE", "").strip()
+    return CategoryCache(int(raw) if raw else DEFAULT_SIZE, valid)
@@ -0,0 +1,143 @@
+"""
+WASTE IQ – Document Cache
+Per-collection LRU + TTL cache for firestore_client.get_doc.
+
+Only collections listed in the config are cached; everything else passes
+through. Writes through firestore_client invalidate the touched document.
+Config comes from DOC_CACHE_CONFIG, e.g. "users=5000:60,gamification=5000:30"
+(collection=max_entries:ttl_seconds; max_entries 0 disables a collection).
+"""
+
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Hot, small, rarely-written documents
+DEFAULT_CONFIG: Dict[str, Tuple[int, float]] = {
+    "gamification": (5000, 30.0),
+    "users":        (5000, 60.0),
+    "wards":        (500, 300.0),
+}
+
+
+def parse_config(raw: str) -> Dict[str, Tuple[int, float]]:
+    """Parse "coll=size:ttl,coll=size:ttl" into {coll: (size, ttl)}."""
+    config = {}
+    for part in filter(None, (p.strip() for p in raw.split(","))):
+        name, _, spec = part.partition("=")
+        size, _, ttl = spec.partition(":")
+        config[name.strip()] = (int(size), float(ttl or 60))
+    return config
+
+
+class _CollectionCache:
+    __slots__ = ("max_size", "ttl", "entries", "generation", "hits", "misses", "evictions")
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size   = max_size
+        self.ttl        = ttl
+        self.entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self.generation = 0
+        self.hits       = 0
+        self.misses     = 0
+        self.evictions  = 0
+
+
+class DocCache:
+    def __init__(self, config: Optional[Dict[str, Tuple[int, float]]] = None):
+        self._lock = threading.Lock()
+        self._collections: Dict[str, _CollectionCache] = {}
+        for name, (size, ttl) in (config if config is not None else DEFAULT_CONFIG).items():
+            self.configure(name, size, ttl)
+
+    def configure(self, collection: str, max_size: int, ttl: float) -> None:
+        with self._lock:
+            if max_size <= 0:
+                self._collections.pop(collection, None)
+            else:
+                self._collections[collection] = _CollectionCache(max_size, ttl)
+
+    def get(self, collection: str, doc_id: str) -> Tuple[bool, Optional[Dict]]:
+        """Return (hit, doc). Callers get a private copy they may mutate."""
+        cc = self._collections.get(collection)
+        if cc is None:
+            return False, None
+        with self._lock:
+            entry = cc.entries.get(doc_id)
+            if entry is not None and entry[0] > time.monotonic():
+                cc.entries.move_to_end(doc_id)
+                cc.hits += 1
+                doc = entry[1]
+            else:
+                if entry is not None:
+                    del cc.entries[doc_id]
+                cc.misses += 1
+                return False, None
+        return True, copy.deepcopy(doc)
+
+    def generation(self, collection: str) -> int:
+        """Snapshot taken before a backend read; see put()."""
+        cc = self._collections.get(collection)
+        return cc.generation if cc is not None else 0
+
+    def put(self, collection: str, doc_id: str, doc: Optional[Dict], generation: int) -> None:
+        """
+        Store a freshly read document. Skipped if any write to the collection
+        happened since `generation` was taken, so a read racing a write can
+        never re-insert the pre-write version.
+        """
+        cc = self._collections.get(collection)
+        if cc is None or doc is None:
+            return
+        stored = copy.deepcopy(doc)
+        with self._lock:
+            if cc.generation != generation:
+                return
+            cc.entries[doc_id] = (time.monotonic() + cc.ttl, stored)
+            cc.entries.move_to_end(doc_id)
+            while len(cc.entries) > cc.max_size:
+                cc.entries.popitem(last=False)
+                cc.evictions += 1
+
+    def invalidate(self, collection: str, doc_id: Optional[str] = None) -> None:
+        cc = self._collections.get(collection)
+        if cc is None:
+            return
+        with self._lock:
+            cc.generation += 1
+            if doc_id is None:
+                cc.entries.clear()
+            else:
+                cc.entries.pop(doc_id, None)
+
+    def clear(self) -> None:
+        for name in list(self._collections):
+            self.invalidate(name)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = {}
+            for name, cc in self._collections.items():
+                lookups = cc.hits + cc.misses
+                out[name] = {
+                    "size":      len(cc.entries),
+                    "max_size":  cc.max_size,
+                    "ttl":       cc.ttl,
+                    "hits":      cc.hits,
+                    "misses":    cc.misses,
+                    "evictions": cc.evictions,
+                    "hit_rate":  round(cc.hits / lookups, 4) if lookups else 0.0,
+                }
+            return out
+
+
+def cache_from_env() -> DocCache:
+    raw = os.getenv("DOC_CACHE_CONFIG", "").strip()
+    if not raw:
+        return DocCache()
+    config = dict(DEFAULT_CONFIG)
+    config.update(parse_config(raw))
+    return DocCache(config)
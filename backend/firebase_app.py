@@ -0,0 +1,101 @@
+"""
+WASTE IQ – Firebase App
+Single, lazy, thread-safe initialisation of the Firebase Admin SDK shared by
+auth.py, the Firestore storage backend, seed_firestore.py and the Streamlit
+pages. Nothing is imported or initialised until get_app() is first called,
+so importing routers (tools, benchmarks, STORAGE_BACKEND=memory) stays cheap.
+
+Credentials, first match wins:
+  1. FIREBASE_PROJECT_ID + FIREBASE_PRIVATE_KEY + FIREBASE_CLIENT_EMAIL (Render)
+  2. FIREBASE_SERVICE_ACCOUNT_PATH (default ./firebase_service_account.json)
+  3. Anonymous credentials when FIRESTORE_EMULATOR_HOST points at the local
+     emulator (benchmarks/harness.py)
+  4. Application Default Credentials
+"""
+
+import os
+import threading
+from pathlib import Path
+
+_ROOT = Path(__file__).parent.parent
+
+_lock = threading.Lock()
+_app = None
+
+
+def _credentials():
+    from dotenv import load_dotenv
+    from firebase_admin import credentials
+
+    # Load .env from project root (waste_iq/) regardless of launch directory
+    load_dotenv(_ROOT / ".env")
+
+    project_id   = os.getenv("FIREBASE_PROJECT_ID")
+    private_key  = os.getenv("FIREBASE_PRIVATE_KEY")
+    client_email = os.getenv("FIREBASE_CLIENT_EMAIL")
+    if project_id and private_key and client_email:
+        return credentials.Certificate({
+            "type": "service_account",
+            "project_id": project_id,
+            "private_key": private_key.replace("\\n", "\n"),
+            "client_email": client_email,
+            "token_uri": "https://oauth2.googleapis.com/token",
+        })
+
+    sa_path = os.getenv("FIREBASE_SERVICE_ACCOUNT_PATH", "./firebase_service_account.json")
+    sa_resolved = Path(sa_path) if Path(sa_path).is_absolute() else _ROOT / sa_path.lstrip("./")
+    if sa_resolved.exists():
+        return credentials.Certificate(str(sa_resolved))
+
+    if os.getenv("FIRESTORE_EMULATOR_HOST"):
+        return _emulator_credential()
+
+    return credentials.ApplicationDefault()
+
+
+def _emulator_credential():
+    from firebase_admin import credentials
+    from google.auth.credentials import AnonymousCredentials
+
+    class EmulatorCredential(credentials.Base):
+        def get_credential(self):
+            return AnonymousCredentials()
+
+    return EmulatorCredential()
+
+
+def _options():
+    # The emulator accepts any project id but the SDK needs one without a key file
+    if os.getenv("FIRESTORE_EMULATOR_HOST"):
+        return {"projectId": os.getenv("FIREBASE_PROJECT_ID")
+                or os.getenv("GOOGLE_CLOUD_PROJECT", "wasteiq-local")}
+    return None
+
+
+def get_app():
+    """The default firebase_admin App, initialised on first call."""
+    global _app
+    if _app is not None:
+        return _app
+    with _lock:
+        if _app is None:
+            import firebase_admin
+            if firebase_admin._apps:
+                _app = firebase_admin.get_app()
+            else:
+                try:
+                    _app = firebase_admin.initialize_app(_credentials(), _options())
+                except Exception as e:
+                    raise RuntimeError(
+                        "Firebase initialisation failed. Set FIREBASE_PROJECT_ID, "
+                        "FIREBASE_PRIVATE_KEY and FIREBASE_CLIENT_EMAIL, or "
+                        f"FIREBASE_SERVICE_ACCOUNT_PATH: {e}"
+                    ) from e
+    return _app
+
+
+def firebase_auth():
+    """firebase_admin.auth, with the app initialised."""
+    get_app()
+    from firebase_admin import auth
+    return auth
@@ -0,0 +1,292 @@
+"""
+WASTE IQ – Async Firestore Client
+Awaitable counterparts of the firestore_client helpers for use inside
+`async def` routes. Firestore goes through the native AsyncClient; local
+backends run inline (memory) or on a worker thread (sqlite), so a slow
+query never stalls the uvicorn event loop.
+
+Shares the get_doc and query caches, their write invalidation and the bin
+registry with firestore_client. Registry reads are in-memory and run inline.
+"""
+
+import asyncio
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+try:  # imported as a top-level module from backend/ (uvicorn main:app)
+    import firestore_client as _fc
+    import metrics as _metrics
+    import index_advisor as _advisor
+except ImportError:  # imported as backend.firestore_async
+    from backend import firestore_client as _fc
+    from backend import metrics as _metrics
+    from backend import index_advisor as _advisor
+
+# Sentinels are plain values – share them with the sync client
+increment        = _fc.increment
+server_timestamp = _fc.server_timestamp
+array_union      = _fc.array_union
+
+
+@_metrics.instrument("get")
+async def get_doc(collection: str, doc_id: str) -> Optional[Dict]:
+    view = _fc._view(collection)
+    if view is not None:
+        return view.get_doc(collection, doc_id)
+    cache = _fc.get_doc_cache()
+    hit, doc = cache.get(collection, doc_id)
+    if hit:
+        return doc
+    generation = cache.generation(collection)
+    doc = await _fc.get_backend().aget_doc(collection, doc_id)
+    cache.put(collection, doc_id, doc, generation)
+    return doc
+
+
+@_metrics.instrument("get_all", _metrics.count_len)
+async def get_docs(collection: str, doc_ids: List[str]) -> Dict[str, Dict]:
+    view = _fc._view(collection)
+    if view is not None:
+        return view.get_docs(collection, list(filter(None, doc_ids)))
+    docs, missing = _fc._cached_docs(collection, doc_ids)
+    if missing:
+        generation = _fc.get_doc_cache().generation(collection)
+        fetched = await _fc.get_backend().aget_docs(collection, missing)
+        _fc._cache_fetched(collection, fetched, generation)
+        docs.update(fetched)
+    return docs
+
+
+@_metrics.instrument("set")
+async def set_doc(collection: str, doc_id: str, data: Dict, merge: bool = False) -> str:
+    try:
+        return await _fc.get_backend().aset_doc(collection, doc_id, data, merge=merge)
+    finally:
+        _fc._invalidate(collection, doc_id)
+
+
+@_metrics.instrument("add")
+async def add_doc(collection: str, data: Dict) -> str:
+    doc_id = None
+    try:
+        doc_id = await _fc.get_backend().aadd_doc(collection, data)
+        return doc_id
+    finally:
+        _fc._invalidate(collection, doc_id)
+
+
+@_metrics.instrument("append")
+async def append_doc(collection: str, data: Dict) -> str:
+    """See firestore_client.append_doc – queueing never blocks the event loop."""
+    cfg = _fc._write_behind_config
+    if cfg and collection in cfg["collections"]:
+        queue = _fc.start_write_behind()
+        try:
+            try:
+                # No fsync on this path – the queue's syncer thread group-commits it
+                return queue.append(collection, data, block=False)
+            except _fc.QueueFull:
+                # Backlog at max_pending: wait for the flusher on a worker thread
+                return await asyncio.to_thread(queue.append, collection, data)
+        except (TypeError, RuntimeError):
+            pass
+    return await add_doc(collection, data)
+
+
+@_metrics.instrument("update", _metrics.count_written_one)
+async def update_doc(collection: str, doc_id: str, data: Dict) -> None:
+    try:
+        await _fc.get_backend().aupdate_doc(collection, doc_id, data)
+    finally:
+        _fc._invalidate(collection, doc_id)
+
+
+@_metrics.instrument("delete", _metrics.count_written_one)
+async def delete_doc(collection: str, doc_id: str) -> None:
+    try:
+        await _fc.get_backend().adelete_doc(collection, doc_id)
+    finally:
+        _fc._invalidate(collection, doc_id)
+
+
+@_advisor.records
+@_metrics.instrument("query", _metrics.count_len)
+async def query_collection(
+    collection: str,
+    filters: Optional[List[tuple]] = None,
+    order_by: Optional[str] = None,
+    order_desc: bool = False,
+    limit: Optional[int] = None,
+    fields: Optional[List[str]] = None,
+) -> List[Dict]:
+    view = _fc._view(collection)
+    if view is not None:
+        return view.query(collection, filters=filters, order_by=order_by,
+                          order_desc=order_desc, limit=limit, fields=fields)
+    return await _fc.get_query_cache().aget_or_load(
+        collection, _fc.query_key(filters, order_by, order_desc, limit, fields),
+        lambda: _fc.get_backend().aquery(collection, filters=filters, order_by=order_by,
+                                         order_desc=order_desc, limit=limit, fields=fields),
+    )
+
+
+@_advisor.records
+@_metrics.instrument("query_page", _metrics.count_page)
+async def query_page(
+    collection: str,
+    filters: Optional[List[tuple]] = None,
+    order_by: Optional[str] = None,
+    order_desc: bool = False,
+    page_size: int = _fc.DEFAULT_PAGE_SIZE,
+    page_token: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+) -> Tuple[List[Dict], Optional[str]]:
+    page_size = _fc.clamp_page_size(page_size)
+    cursor = _fc.decode_page_token(page_token)
+    fields = _fc.page_fields(fields, order_by)
+    view = _fc._view(collection)
+    if view is not None:
+        docs = view.query_page(collection, filters=filters, order_by=order_by,
+                               order_desc=order_desc, page_size=page_size, cursor=cursor,
+                               fields=fields)
+    else:
+        docs = await _fc.get_backend().aquery_page(collection, filters=filters, order_by=order_by,
+                                                   order_desc=order_desc, page_size=page_size,
+                                                   cursor=cursor, fields=fields)
+    return docs, _fc.next_page_token(docs, order_by, page_size)
+
+
+@_advisor.records
+@_metrics.instrument("stream")
+async def stream_collection(
+    collection: str,
+    filters: Optional[List[tuple]] = None,
+    order_by: Optional[str] = None,
+    order_desc: bool = False,
+    page_size: int = _fc.STREAM_PAGE_SIZE,
+    fields: Optional[List[str]] = None,
+) -> AsyncIterator[Dict]:
+    cursor = None
+    fields = _fc.page_fields(fields, order_by)
+    while True:
+        view = _fc._view(collection)
+        if view is not None:
+            docs = view.query_page(collection, filters=filters, order_by=order_by,
+                                   order_desc=order_desc, page_size=page_size, cursor=cursor,
+                                   fields=fields)
+        else:
+            docs = await _fc.get_backend().aquery_page(collection, filters=filters, order_by=order_by,
+                                                       order_desc=order_desc, page_size=page_size,
+                                                       cursor=cursor, fields=fields)
+        for doc in docs:
+            yield doc
+        if len(docs) < page_size:
+            return
+        cursor = _fc._cursor_of(docs[-1], order_by)
+
+
+@_metrics.instrument("increment", _metrics.count_written_one)
+async def increment_field(collection: str, doc_id: str, field: str, amount: int = 1) -> None:
+    try:
+        await _fc.get_backend().aincrement_field(collection, doc_id, field, amount)
+    finally:
+        _fc._invalidate(collection, doc_id)
+
+
+# ─────────────────────────────────────────────────────────────
+# Aggregations (see firestore_client.count_by)
+# ─────────────────────────────────────────────────────────────
+
+@_advisor.records
+@_metrics.instrument("count")
+async def count_docs(collection: str, filters: Optional[List[tuple]] = None) -> int:
+    view = _fc._view(collection)
+    if view is not None:
+        return view.aggregate(collection, "count", filters=filters)
+    return await _fc.get_backend().aaggregate(collection, "count", filters=filters)
+
+
+@_advisor.records
+@_metrics.instrument("sum")
+async def sum_field(collection: str, field: str, filters: Optional[List[tuple]] = None) -> float:
+    view = _fc._view(collection)
+    if view is not None:
+        return view.aggregate(collection, "sum", field=field, filters=filters)
+    return await _fc.get_backend().aaggregate(collection, "sum", field=field, filters=filters)
+
+
+@_advisor.records
+@_metrics.instrument("avg")
+async def avg_field(collection: str, field: str, filters: Optional[List[tuple]] = None) -> Optional[float]:
+    view = _fc._view(collection)
+    if view is not None:
+        return view.aggregate(collection, "avg", field=field, filters=filters)
+    return await _fc.get_backend().aaggregate(collection, "avg", field=field, filters=filters)
+
+
+async def count_by(
+    collection: str,
+    field: str,
+    values: Optional[List[Any]] = None,
+    filters: Optional[List[tuple]] = None,
+    other: Optional[str] = None,
+) -> Counter:
+    """Grouped count; the per-value aggregations run concurrently (values=None: one projected query)."""
+    if values is None:
+        docs = await query_collection(collection, filters, fields=[field])
+        return Counter(d.get(field, other) for d in docs)
+    base = filters or []
+    queries = [count_docs(collection, base + [(field, "==", v)]) for v in values]
+    if other is not None:
+        queries.append(count_docs(collection, filters))
+    results = await asyncio.gather(*queries)
+
+    counts = Counter(dict(zip(values, results)))
+    if other is not None:
+        counts[other] += results[-1] - sum(results[:len(values)])
+    return +counts
+
+
+# ─────────────────────────────────────────────────────────────
+# Batched Writes (see firestore_client.batch_write)
+# ─────────────────────────────────────────────────────────────
+
+@_metrics.instrument("batch_write", _metrics.count_written)
+async def batch_write(ops: List[tuple]) -> Dict:
+    backend  = _fc.get_backend()
+    resolved = _fc._plan_batch(ops)
+    ids: List[Optional[str]] = [op[2] for op in resolved]
+    failed: List[Dict] = []
+    batches = 0
+
+    try:
+        for start in range(0, len(resolved), _fc.BATCH_LIMIT):
+            chunk = resolved[start:start + _fc.BATCH_LIMIT]
+            batches += 1
+            try:
+                await backend.acommit_batch(chunk)
+                continue
+            except Exception:
+                pass
+            for offset, op in enumerate(chunk):
+                try:
+                    await backend.acommit_batch([op])
+                except Exception as e:
+                    _fc._record_failure(ids, failed, ops[start + offset][0], op, start + offset, e)
+    finally:
+        _fc._invalidate_ops(resolved)
+
+    return _fc._batch_result(ids, failed, batches)
+
+
+async def set_docs(collection: str, docs: Dict[str, Dict], merge: bool = False) -> Dict:
+    kind = "set_merge" if merge else "set"
+    return await batch_write([(kind, collection, doc_id, data) for doc_id, data in docs.items()])
+
+
+async def add_docs(collection: str, docs: List[Dict]) -> Dict:
+    return await batch_write([("add", collection, None, data) for data in docs])
+
+
+async def update_docs(collection: str, updates: Dict[str, Dict]) -> Dict:
+    return await batch_write([("update", collection, doc_id, data) for doc_id, data in updates.items()])
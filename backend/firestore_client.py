@@ -1,111 +1,572 @@
 """
 WASTE IQ – Firestore Client
-Production-safe Firebase Admin initialization (Render compatible)
+Document-store helpers used by every router. Calls are delegated to a
+pluggable storage backend selected with STORAGE_BACKEND:
+
+  firestore (default) – Firebase Admin SDK (Render compatible)
+  memory              – in-process store for load tests / benchmarks
+  sqlite              – local file (SQLITE_DB_PATH) for small deployments
+
+get_doc reads through a per-collection LRU+TTL cache (see doc_cache.py) and
+query_collection through a short-TTL result cache (see query_cache.py);
+every write helper here invalidates the documents and collections it touches.
+With BIN_REGISTRY enabled, reads of `bins` are served from the in-memory
+view in bin_registry.py instead.
+
+count_docs / sum_field / avg_field run as server-side aggregation queries –
+one aggregate read instead of downloading the matching documents.
+
+Every public helper is timed and counted by metrics.instrument; query shapes
+are recorded for the composite-index advisor (index_advisor.py).
 """
 
-import os
-from typing import Any, Dict, List, Optional
-import firebase_admin
-from firebase_admin import credentials, firestore
-from google.cloud.firestore_v1.base_query import FieldFilter
+import base64
+import json
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:  # imported as a top-level module from backend/ (uvicorn main:app)
+    from storage_backends import StorageBackend, WRITE_KINDS, create_backend, field_value
+    from doc_cache import cache_from_env
+    from query_cache import cache_from_env as query_cache_from_env, query_key
+    import metrics as _metrics
+    import index_advisor as _advisor
+    from write_behind import QueueFull, WriteBehindQueue, queue_config_from_env
+    from bin_registry import BinRegistry, registry_config_from_env
+except ImportError:  # imported as backend.firestore_client (Streamlit pages)
+    from backend.storage_backends import StorageBackend, WRITE_KINDS, create_backend, field_value
+    from backend.doc_cache import cache_from_env
+    from backend.query_cache import cache_from_env as query_cache_from_env, query_key
+    from backend import metrics as _metrics
+    from backend import index_advisor as _advisor
+    from backend.write_behind import QueueFull, WriteBehindQueue, queue_config_from_env
+    from backend.bin_registry import BinRegistry, registry_config_from_env
+
+# Firestore WriteBatch limit (operations per commit)
+BATCH_LIMIT = 500
+
+# Cursor pagination
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE     = 1000
+STREAM_PAGE_SIZE  = 500
 
 
 # ─────────────────────────────────────────────────────────────
-# Initialize Firebase Admin ONCE at import time
+# Backend selection (ONCE at import time)
 # ─────────────────────────────────────────────────────────────
 
-if not firebase_admin._apps:
-    project_id = os.getenv("FIREBASE_PROJECT_ID")
-    private_key = os.getenv("FIREBASE_PRIVATE_KEY")
-    client_email = os.getenv("FIREBASE_CLIENT_EMAIL")
-
-    if not all([project_id, private_key, client_email]):
-        raise RuntimeError(
-            "Firebase environment variables missing. "
-            "Set FIREBASE_PROJECT_ID, FIREBASE_PRIVATE_KEY, FIREBASE_CLIENT_EMAIL in Render."
-        )
-
-    cred = credentials.Certificate({
-        "type": "service_account",
-        "project_id": project_id,
-        "private_key": private_key.replace("\\n", "\n"),
-        "client_email": client_email,
-    })
+_backend: StorageBackend = create_backend()
+_doc_cache = cache_from_env()
+_query_cache = query_cache_from_env()
+
+# Write-behind for append-only collections (opt-in, WRITE_BEHIND_COLLECTIONS)
+_write_behind_config = queue_config_from_env()
+_write_behind: Optional[WriteBehindQueue] = None
+_write_behind_lock = threading.Lock()
+
+# Materialised view of `bins` (opt-in, BIN_REGISTRY)
+_registry_config = registry_config_from_env()
+_registry: Optional[BinRegistry] = None
+
+
+def get_backend() -> StorageBackend:
+    return _backend
+
+
+def set_backend(backend: StorageBackend) -> None:
+    """Swap the active backend (benchmarks, local tooling)."""
+    global _backend
+    stop_bin_registry()
+    _backend = backend
+    _doc_cache.clear()
+    _query_cache.clear()
 
-    firebase_admin.initialize_app(cred)
 
+def get_doc_cache():
+    return _doc_cache
 
-# Create Firestore client once
-_db = firestore.client()
+
+def get_query_cache():
+    return _query_cache
+
+
+def doc_cache_stats() -> Dict:
+    """Per-collection hit/miss/eviction counters of the get_doc cache."""
+    return _doc_cache.stats()
+
+
+def query_cache_stats() -> Dict:
+    """Per-collection hit/miss/coalesced counters of the query_collection cache."""
+    return _query_cache.stats()
+
+
+def _invalidate(collection: str, doc_id: Optional[str] = None) -> None:
+    """Called after every write: drop the cached doc and the collection's query results."""
+    if doc_id is not None:
+        _doc_cache.invalidate(collection, doc_id)
+    _query_cache.invalidate(collection)
+    if _registry is not None and _registry.collection == collection:
+        _registry.note_write(doc_id)
+
+
+def _view(collection: str) -> Optional[BinRegistry]:
+    """The registry when it is loaded and covers `collection`, else None."""
+    if _registry is not None and _registry.serves(collection):
+        return _registry
+    return None
 
 
 # ─────────────────────────────────────────────────────────────
 # Core Helpers
 # ─────────────────────────────────────────────────────────────
 
+@_metrics.instrument("get")
 def get_doc(collection: str, doc_id: str) -> Optional[Dict]:
-    ref = _db.collection(collection).document(doc_id)
-    snap = ref.get()
-    if snap.exists:
-        data = snap.to_dict()
-        data["_id"] = snap.id
-        return data
-    return None
+    view = _view(collection)
+    if view is not None:
+        return view.get_doc(collection, doc_id)
+    hit, doc = _doc_cache.get(collection, doc_id)
+    if hit:
+        return doc
+    generation = _doc_cache.generation(collection)
+    doc = _backend.get_doc(collection, doc_id)
+    _doc_cache.put(collection, doc_id, doc, generation)
+    return doc
+
+
+@_metrics.instrument("get_all", _metrics.count_len)
+def get_docs(collection: str, doc_ids: List[str]) -> Dict[str, Dict]:
+    """
+    Batch read: {doc_id: doc} for the ids that exist (empty ids skipped).
+    Cached documents are served from the get_doc cache; the rest are fetched
+    in a single multi-get.
+    """
+    view = _view(collection)
+    if view is not None:
+        return view.get_docs(collection, list(filter(None, doc_ids)))
+    docs, missing = _cached_docs(collection, doc_ids)
+    if missing:
+        generation = _doc_cache.generation(collection)
+        fetched = _backend.get_docs(collection, missing)
+        _cache_fetched(collection, fetched, generation)
+        docs.update(fetched)
+    return docs
+
+
+def _cached_docs(collection: str, doc_ids: List[str]) -> Tuple[Dict[str, Dict], List[str]]:
+    docs, missing = {}, []
+    for doc_id in dict.fromkeys(filter(None, doc_ids)):
+        hit, doc = _doc_cache.get(collection, doc_id)
+        if hit:
+            docs[doc_id] = doc
+        else:
+            missing.append(doc_id)
+    return docs, missing
 
 
-def set_doc(collection: str, doc_id: str, data: Dict) -> str:
-    _db.collection(collection).document(doc_id).set(data)
-    return doc_id
+def _cache_fetched(collection: str, fetched: Dict[str, Dict], generation: int) -> None:
+    for doc_id, doc in fetched.items():
+        _doc_cache.put(collection, doc_id, doc, generation)
 
 
+@_metrics.instrument("set")
+def set_doc(collection: str, doc_id: str, data: Dict, merge: bool = False) -> str:
+    try:
+        return _backend.set_doc(collection, doc_id, data, merge=merge)
+    finally:
+        _invalidate(collection, doc_id)
+
+
+@_metrics.instrument("add")
 def add_doc(collection: str, data: Dict) -> str:
-    ref = _db.collection(collection).add(data)
-    return ref[1].id
+    doc_id = None
+    try:
+        doc_id = _backend.add_doc(collection, data)
+        return doc_id
+    finally:
+        _invalidate(collection, doc_id)
 
 
+@_metrics.instrument("update", _metrics.count_written_one)
 def update_doc(collection: str, doc_id: str, data: Dict) -> None:
-    _db.collection(collection).document(doc_id).update(data)
+    try:
+        _backend.update_doc(collection, doc_id, data)
+    finally:
+        _invalidate(collection, doc_id)
 
 
+@_metrics.instrument("delete", _metrics.count_written_one)
 def delete_doc(collection: str, doc_id: str) -> None:
-    _db.collection(collection).document(doc_id).delete()
+    try:
+        _backend.delete_doc(collection, doc_id)
+    finally:
+        _invalidate(collection, doc_id)
 
 
+@_advisor.records
+@_metrics.instrument("query", _metrics.count_len)
 def query_collection(
     collection: str,
     filters: Optional[List[tuple]] = None,
     order_by: Optional[str] = None,
     order_desc: bool = False,
     limit: Optional[int] = None,
+    fields: Optional[List[str]] = None,
 ) -> List[Dict]:
+    """
+    fields: return only these (dotted) paths plus _id – cheaper for aggregations.
+    Results for collections in QUERY_CACHE_CONFIG are served from the query cache.
+    """
+    view = _view(collection)
+    if view is not None:
+        return view.query(collection, filters=filters, order_by=order_by,
+                          order_desc=order_desc, limit=limit, fields=fields)
+    return _query_cache.get_or_load(
+        collection, query_key(filters, order_by, order_desc, limit, fields),
+        lambda: _backend.query(collection, filters=filters, order_by=order_by,
+                               order_desc=order_desc, limit=limit, fields=fields),
+    )
 
-    ref = _db.collection(collection)
 
-    if filters:
-        for field, op, value in filters:
-            ref = ref.where(filter=FieldFilter(field, op, value))
+@_advisor.records
+@_metrics.instrument("query_page", _metrics.count_page)
+def query_page(
+    collection: str,
+    filters: Optional[List[tuple]] = None,
+    order_by: Optional[str] = None,
+    order_desc: bool = False,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    page_token: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    One page of results plus the token for the next page (None on the last).
+    Raises ValueError for a malformed page_token.
+    """
+    page_size = clamp_page_size(page_size)
+    cursor = decode_page_token(page_token)
+    docs = (_view(collection) or _backend).query_page(
+        collection, filters=filters, order_by=order_by, order_desc=order_desc,
+        page_size=page_size, cursor=cursor, fields=page_fields(fields, order_by))
+    return docs, next_page_token(docs, order_by, page_size)
+
+
+@_advisor.records
+@_metrics.instrument("stream")
+def stream_collection(
+    collection: str,
+    filters: Optional[List[tuple]] = None,
+    order_by: Optional[str] = None,
+    order_desc: bool = False,
+    page_size: int = STREAM_PAGE_SIZE,
+    fields: Optional[List[str]] = None,
+) -> Iterator[Dict]:
+    """Yield every matching document, fetching page_size at a time via start_after cursors."""
+    cursor = None
+    fields = page_fields(fields, order_by)
+    while True:
+        docs = (_view(collection) or _backend).query_page(
+            collection, filters=filters, order_by=order_by, order_desc=order_desc,
+            page_size=page_size, cursor=cursor, fields=fields)
+        yield from docs
+        if len(docs) < page_size:
+            return
+        cursor = _cursor_of(docs[-1], order_by)
+
+
+@_metrics.instrument("increment", _metrics.count_written_one)
+def increment_field(collection: str, doc_id: str, field: str, amount: int = 1) -> None:
+    try:
+        _backend.increment_field(collection, doc_id, field, amount)
+    finally:
+        _invalidate(collection, doc_id)
 
-    if order_by:
-        direction = firestore.Query.DESCENDING if order_desc else firestore.Query.ASCENDING
-        ref = ref.order_by(order_by, direction=direction)
 
-    if limit:
-        ref = ref.limit(limit)
+def increment(amount: int = 1) -> Any:
+    """Backend-specific atomic increment sentinel for use in update/set data."""
+    return _backend.increment(amount)
 
-    docs = []
-    for snap in ref.stream():
-        d = snap.to_dict()
-        d["_id"] = snap.id
-        docs.append(d)
 
-    return docs
+def server_timestamp():
+    return _backend.server_timestamp()
 
 
-def increment_field(collection: str, doc_id: str, field: str, amount: int = 1) -> None:
-    _db.collection(collection).document(doc_id).update(
-        {field: firestore.Increment(amount)}
-    )
+def array_union(values: List[Any]) -> Any:
+    """Sentinel adding missing values to an array field; creates the field if absent."""
+    return _backend.array_union(values)
 
 
-def server_timestamp():
-    return firestore.SERVER_TIMESTAMP
+# ─────────────────────────────────────────────────────────────
+# Write-Behind Appends
+# ─────────────────────────────────────────────────────────────
+
+def start_write_behind() -> Optional[WriteBehindQueue]:
+    """Create the queue (replaying any journal left by a crash); no-op when disabled."""
+    global _write_behind
+    if _write_behind_config is None:
+        return None
+    with _write_behind_lock:
+        if _write_behind is None:
+            cfg = _write_behind_config
+            _write_behind = WriteBehindQueue(
+                batch_write, lambda c: _backend.new_doc_id(c), cfg["journal_dir"],
+                flush_size=cfg["flush_size"], flush_interval=cfg["flush_interval"],
+                max_pending=cfg["max_pending"], max_attempts=cfg["max_attempts"],
+                fsync=cfg["fsync"],
+            )
+        return _write_behind
+
+
+@_metrics.instrument("append")
+def append_doc(collection: str, data: Dict) -> str:
+    """
+    add_doc for append-only log collections. With write-behind enabled for
+    `collection` the document is journaled and committed later in a batch;
+    the returned id is final either way.
+    """
+    if _write_behind_config and collection in _write_behind_config["collections"]:
+        queue = start_write_behind()
+        try:
+            return queue.append(collection, data)
+        except (TypeError, RuntimeError):
+            pass   # not journalable or shutting down – write synchronously
+    return add_doc(collection, data)
+
+
+def flush_write_behind() -> Optional[Dict]:
+    return _write_behind.flush() if _write_behind is not None else None
+
+
+def stop_write_behind() -> None:
+    """Flush and stop the queue (main.shutdown_event)."""
+    if _write_behind is not None:
+        _write_behind.close()
+
+
+def write_behind_stats() -> Optional[Dict]:
+    if _write_behind is None:
+        return None
+    return {**_write_behind.stats, "pending": _write_behind.pending()}
+
+
+# ─────────────────────────────────────────────────────────────
+# Bin Registry
+# ─────────────────────────────────────────────────────────────
+
+def start_bin_registry() -> Optional[BinRegistry]:
+    """Load `bins` into memory and keep it current; no-op when disabled."""
+    global _registry
+    if _registry_config is None:
+        return None
+    if _registry is None:
+        _registry = BinRegistry(_backend, poll_interval=_registry_config["poll_interval"]).start()
+    return _registry
+
+
+def stop_bin_registry() -> None:
+    global _registry
+    if _registry is not None:
+        _registry.stop()
+        _registry = None
+
+
+def bin_registry_stats() -> Optional[Dict]:
+    return _registry.registry_stats() if _registry is not None else None
+
+
+# ─────────────────────────────────────────────────────────────
+# Aggregations
+# ─────────────────────────────────────────────────────────────
+
+@_advisor.records
+@_metrics.instrument("count")
+def count_docs(collection: str, filters: Optional[List[tuple]] = None) -> int:
+    return (_view(collection) or _backend).aggregate(collection, "count", filters=filters)
+
+
+@_advisor.records
+@_metrics.instrument("sum")
+def sum_field(collection: str, field: str, filters: Optional[List[tuple]] = None) -> float:
+    """Sum of the numeric values of `field` (0 when there are none)."""
+    return (_view(collection) or _backend).aggregate(collection, "sum", field=field, filters=filters)
+
+
+@_advisor.records
+@_metrics.instrument("avg")
+def avg_field(collection: str, field: str, filters: Optional[List[tuple]] = None) -> Optional[float]:
+    """Mean of the numeric values of `field`, None when there are none."""
+    return (_view(collection) or _backend).aggregate(collection, "avg", field=field, filters=filters)
+
+
+def count_by(
+    collection: str,
+    field: str,
+    values: Optional[List[Any]] = None,
+    filters: Optional[List[tuple]] = None,
+    other: Optional[str] = None,
+) -> Counter:
+    """
+    Grouped count: one count aggregation per known value of `field`.
+    With `other`, documents matching none of `values` (missing field or an
+    unexpected value) are counted under that key. Zero counts are dropped.
+
+    values=None groups by whatever values occur: one query projected to
+    `field` (Firestore has no GROUP BY), documents without it under `other`.
+    """
+    if values is None:
+        return Counter(d.get(field, other) for d in query_collection(collection, filters, fields=[field]))
+    counts = Counter({v: count_docs(collection, (filters or []) + [(field, "==", v)])
+                      for v in values})
+    if other is not None:
+        counts[other] += count_docs(collection, filters) - sum(counts.values())
+    return +counts
+
+
+# ─────────────────────────────────────────────────────────────
+# Batched Writes
+# ─────────────────────────────────────────────────────────────
+
+@_metrics.instrument("batch_write", _metrics.count_written)
+def batch_write(ops: List[tuple]) -> Dict:
+    """
+    Apply many writes in WriteBatch commits of up to BATCH_LIMIT ops.
+
+    ops: (kind, collection, doc_id, data) tuples, kind one of
+         "set", "set_merge", "update", "delete" or "add" (doc_id=None → auto-id).
+
+    Each chunk commits atomically. If a chunk fails, its ops are retried one
+    by one so failures are reported per document instead of per chunk.
+
+    Returns {"ids": [...], "written": int, "failed": [...], "batches": int};
+    "ids" is aligned with `ops` and holds None for failed writes.
+    """
+    resolved = _plan_batch(ops)
+    ids: List[Optional[str]] = [op[2] for op in resolved]
+    failed: List[Dict] = []
+    batches = 0
+
+    try:
+        for start in range(0, len(resolved), BATCH_LIMIT):
+            chunk = resolved[start:start + BATCH_LIMIT]
+            batches += 1
+            try:
+                _backend.commit_batch(chunk)
+                continue
+            except Exception:
+                pass
+            for offset, op in enumerate(chunk):
+                try:
+                    _backend.commit_batch([op])
+                except Exception as e:
+                    _record_failure(ids, failed, ops[start + offset][0], op, start + offset, e)
+    finally:
+        _invalidate_ops(resolved)
+
+    return _batch_result(ids, failed, batches)
+
+
+def _plan_batch(ops: List[tuple]) -> List[tuple]:
+    """Validate op kinds and turn "add" ops into "set" with an allocated id."""
+    resolved = []
+    for kind, collection, doc_id, data in ops:
+        if kind == "add":
+            kind, doc_id = "set", doc_id or _backend.new_doc_id(collection)
+        elif kind not in WRITE_KINDS:
+            raise ValueError(f"Unsupported write kind: {kind}")
+        resolved.append((kind, collection, doc_id, data))
+    return resolved
+
+
+def _invalidate_ops(resolved: List[tuple]) -> None:
+    for _, collection, doc_id, _ in resolved:
+        _invalidate(collection, doc_id)
+
+
+def _record_failure(ids: List, failed: List[Dict], kind: str, op: tuple,
+                    index: int, error: Exception) -> None:
+    ids[index] = None
+    failed.append({
+        "index":      index,
+        "kind":       kind,
+        "collection": op[1],
+        "doc_id":     op[2],
+        "error":      str(error)[:200],
+    })
+
+
+def _batch_result(ids: List, failed: List[Dict], batches: int) -> Dict:
+    return {
+        "ids":     ids,
+        "written": len(ids) - len(failed),
+        "failed":  failed,
+        "batches": batches,
+    }
+
+
+def set_docs(collection: str, docs: Dict[str, Dict], merge: bool = False) -> Dict:
+    kind = "set_merge" if merge else "set"
+    return batch_write([(kind, collection, doc_id, data) for doc_id, data in docs.items()])
+
+
+def add_docs(collection: str, docs: List[Dict]) -> Dict:
+    return batch_write([("add", collection, None, data) for data in docs])
+
+
+def update_docs(collection: str, updates: Dict[str, Dict]) -> Dict:
+    return batch_write([("update", collection, doc_id, data) for doc_id, data in updates.items()])
+
+
+# ─────────────────────────────────────────────────────────────
+# Page Tokens
+# ─────────────────────────────────────────────────────────────
+# Opaque to clients: urlsafe base64 of {"v": <order_by value>, "id": <doc id>}.
+
+def clamp_page_size(page_size: Optional[int]) -> int:
+    return max(1, min(int(page_size or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+
+
+def page_fields(fields: Optional[List[str]], order_by: Optional[str]) -> Optional[List[str]]:
+    """Projection for a paged query: the order_by field is needed to build the cursor."""
+    if not fields or not order_by or order_by in fields:
+        return fields
+    return list(fields) + [order_by]
+
+
+def _cursor_of(doc: Dict, order_by: Optional[str]) -> Tuple[Any, str]:
+    return (field_value(doc, order_by) if order_by else None, doc["_id"])
+
+
+def next_page_token(docs: List[Dict], order_by: Optional[str], page_size: int) -> Optional[str]:
+    if len(docs) < page_size:
+        return None
+    return encode_page_token(*_cursor_of(docs[-1], order_by))
+
+
+def encode_page_token(value: Any, doc_id: str) -> str:
+    """
+    Opaque cursor for the next page. Timestamps (datetime, and Firestore's
+    DatetimeWithNanoseconds subclass) are tagged so they decode back to a
+    datetime – start_after compares by type, and a string cursor on a
+    Timestamp-ordered field would land on the wrong page.
+    """
+    payload = {"v": value, "id": doc_id}
+    if isinstance(value, datetime):
+        payload.update(t="ts", v=value.isoformat())
+    raw = json.dumps(payload, default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_page_token(token: Optional[str]) -> Optional[Tuple[Any, str]]:
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value = payload["v"]
+        if payload.get("t") == "ts":
+            value = datetime.fromisoformat(value)
+        return value, str(payload["id"])
+    except Exception:
+        raise ValueError("Invalid page_token")
@@ -0,0 +1,85 @@
+"""
+WASTE IQ – Gemini Client Pool
+The GEMINI_API_KEY and the genai.Client built from it, held for the life of
+the classifier instead of being rebuilt on every prediction:
+
+  key()    – the current key; .env is re-parsed only when its mtime changes
+             (falls back to the GEMINI_API_KEY environment variable)
+  client() – one genai.Client per key, shared by all threads, so its HTTP
+             connections are kept alive across requests
+  reload() – forget the key and client; the next call re-reads .env
+
+A changed key replaces the client; an unchanged .env costs one os.stat.
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class GeminiClients:
+    def __init__(self, env_file: Path):
+        self.env_file = Path(env_file)
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._key = ""
+        self._client = None
+        self._client_key = ""
+        self.key_reads     = 0
+        self.clients_built = 0
+        self.reloads       = 0
+
+    def key(self) -> str:
+        try:
+            mtime = self.env_file.stat().st_mtime_ns
+        except OSError:
+            mtime = None
+        with self._lock:
+            if mtime is None:
+                self._mtime = None
+                self._key = os.getenv("GEMINI_API_KEY", "").strip()
+            elif mtime != self._mtime:
+                self._key = self._read_file()
+                self._mtime = mtime
+            return self._key
+
+    def _read_file(self) -> str:
+        self.key_reads += 1
+        try:
+            from dotenv import dotenv_values
+            return (dotenv_values(self.env_file).get("GEMINI_API_KEY") or "").strip()
+        except Exception:
+            return os.getenv("GEMINI_API_KEY", "").strip()
+
+    def client(self, api_key: Optional[str] = None):
+        """Shared genai.Client for api_key (default: the current key)."""
+        api_key = api_key if api_key is not None else self.key()
+        with self._lock:
+            if self._client is None or self._client_key != api_key:
+                from google import genai
+                self._client = genai.Client(api_key=api_key)
+                self._client_key = api_key
+                self.clients_built += 1
+            return self._client
+
+    def reload(self) -> str:
+        """Drop the cached key and client and re-read the key now."""
+        with self._lock:
+            self._mtime = None
+            self._client = None
+            self._client_key = ""
+            self.reloads += 1
+        return self.key()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "env_file":      str(self.env_file),
+                "key_loaded":    bool(self._key),
+                "key_suffix":    self._key[-6:] if self._key else None,
+                "client_ready":  self._client is not None,
+                "key_reads":     self.key_reads,
+                "clients_built": self.clients_built,
+                "reloads":       self.reloads,
+            }
@@ -0,0 +1,211 @@
+"""
+WASTE IQ – Perceptual Image Cache
+Classification results keyed by a 64-bit dHash of the decoded image, so a
+re-uploaded photo – or a near-identical shot of the same object – is
+answered without another Gemini detect or YOLO inference.
+
+A lookup is an exact-hash dict hit or, failing that, a scan for the
+closest stored hash within IMAGE_CACHE_MAX_DISTANCE bits (Hamming, default
+4 of 64). LRU eviction at IMAGE_CACHE_SIZE entries (default 1024, 0
+disables). IMAGE_CACHE_PERSIST=1 also writes results to the `image_cache`
+collection through firestore_client, where exact-hash matches are found
+after a restart or on another instance. Stored results expire after
+IMAGE_CACHE_TTL_DAYS (default 30): expired documents are ignored on read and
+deleted by a prune that runs at most once per PRUNE_INTERVAL; each document
+also carries `expires_at` for a Firestore TTL policy.
+
+The classifier caches confident Gemini answers and, on deployments with no
+Gemini key, local YOLO answers – never a YOLO fallback given while Gemini was
+unavailable, and a stored YOLO answer is not served once a key is configured.
+Hits come back with mode "cache" and the producing model in `cached_mode`.
+"""
+
+import copy
+import io
+import os
+import threading
+from collections import OrderedDict
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+try:  # imported as a top-level module from backend/ (uvicorn main:app)
+    import firestore_client as _fc
+except ImportError:  # imported as backend.image_cache
+    from backend import firestore_client as _fc
+
+COLLECTION       = "image_cache"
+DEFAULT_SIZE     = 1024
+DEFAULT_DISTANCE = 4
+HASH_SIZE        = 8          # 8×8 gradient bits → 64-bit hash
+_FULL            = (1 << HASH_SIZE * HASH_SIZE) - 1
+DEFAULT_TTL_DAYS = 30
+PRUNE_INTERVAL   = 24 * 3600.0
+
+
+def dhash(img_bytes: bytes) -> Optional[int]:
+    """Difference hash of the image, or None if it cannot be decoded."""
+    from PIL import Image
+
+    try:
+        img = Image.open(io.BytesIO(img_bytes))
+        img.draft("L", (HASH_SIZE * 8, HASH_SIZE * 8))     # JPEG: decode at reduced scale
+        pixels = list(img.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS).getdata())
+    except Exception:
+        return None
+    value = 0
+    for row in range(HASH_SIZE):
+        base = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            value = (value << 1) | (pixels[base + col] > pixels[base + col + 1])
+    # Flat images (blank frames, covered lens) all hash alike – never match them
+    return None if value in (0, _FULL) else value
+
+
+class ImageCache:
+    def __init__(self, max_size: int = DEFAULT_SIZE, max_distance: int = DEFAULT_DISTANCE,
+                 persist: bool = False, ttl_days: float = DEFAULT_TTL_DAYS):
+        self.max_size     = max_size
+        self.max_distance = max_distance
+        self.persist      = persist
+        self.ttl          = timedelta(days=ttl_days)
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+        self._entries: "OrderedDict[int, Dict]" = OrderedDict()
+        self.hits        = 0
+        self.near_hits   = 0
+        self.store_hits  = 0
+        self.misses      = 0
+        self.evictions   = 0
+        self.store_errors = 0
+        self.expired     = 0
+        self.pruned      = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get(self, h: int) -> Optional[Tuple[Dict, int]]:
+        """(cached result, Hamming distance) for the closest hash in range, or None."""
+        with self._lock:
+            key, distance = h, 0
+            if h not in self._entries:
+                key, distance = self._nearest(h)
+            if key is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.near_hits += distance > 0
+                return copy.deepcopy(self._entries[key]), distance
+
+        result = self._load(h) if self.persist else None
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.store_hits += 1
+            self._remember(h, result)
+        return copy.deepcopy(result), 0
+
+    def _nearest(self, h: int) -> Tuple[Optional[int], int]:
+        best, best_d = None, self.max_distance + 1
+        for key in self._entries:
+            d = (key ^ h).bit_count()
+            if d < best_d:
+                best, best_d = key, d
+                if d == 1:
+                    break
+        return best, best_d
+
+    def put(self, h: int, result: Dict) -> None:
+        stored = copy.deepcopy(result)
+        with self._lock:
+            self._remember(h, stored)
+        if self.persist:
+            now = datetime.now(timezone.utc)
+            try:
+                _fc.set_doc(COLLECTION, f"{h:016x}", {
+                    "result":     stored,
+                    "cached_at":  now.isoformat(),
+                    "expires_at": now + self.ttl,
+                })
+            except Exception as e:
+                self.store_errors += 1
+                print(f"⚠️  image_cache write failed: {e}")
+            self._maybe_prune()
+
+    def _load(self, h: int) -> Optional[Dict]:
+        try:
+            doc = _fc.get_doc(COLLECTION, f"{h:016x}")
+        except Exception as e:
+            self.store_errors += 1
+            print(f"⚠️  image_cache read failed: {e}")
+            return None
+        if not doc:
+            return None
+        if doc.get("cached_at", "") < self._cutoff():
+            self.expired += 1
+            return None
+        return doc.get("result")
+
+    def _cutoff(self) -> str:
+        return (datetime.now(timezone.utc) - self.ttl).isoformat()
+
+    def _maybe_prune(self) -> None:
+        with self._lock:
+            if time.time() - self._last_prune < PRUNE_INTERVAL:
+                return
+            self._last_prune = time.time()
+        threading.Thread(target=self.prune, name="image-cache-prune", daemon=True).start()
+
+    def prune(self) -> int:
+        """Delete stored results older than the TTL; returns how many were removed."""
+        try:
+            stale = _fc.query_collection(COLLECTION, [("cached_at", "<", self._cutoff())], fields=["cached_at"])
+            if stale:
+                _fc.batch_write([("delete", COLLECTION, d["_id"], None) for d in stale])
+        except Exception as e:
+            self.store_errors += 1
+            print(f"⚠️  image_cache prune failed: {e}")
+            return 0
+        self.pruned += len(stale)
+        return len(stale)
+
+    def _remember(self, h: int, result: Dict) -> None:
+        self._entries[h] = result
+        self._entries.move_to_end(h)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.store_hits + self.misses
+            return {
+                "size":         len(self._entries),
+                "max_size":     self.max_size,
+                "max_distance": self.max_distance,
+                "persist":      self.persist,
+                "hits":         self.hits,
+                "near_hits":    self.near_hits,
+                "store_hits":   self.store_hits,
+                "misses":       self.misses,
+                "evictions":    self.evictions,
+                "store_errors": self.store_errors,
+                "ttl_days":     round(self.ttl.total_seconds() / 86400, 2),
+                "expired":      self.expired,
+                "pruned":       self.pruned,
+                "hit_rate":     round((self.hits + self.store_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+
+def cache_from_env() -> ImageCache:
+    return ImageCache(
+        max_size=int(os.getenv("IMAGE_CACHE_SIZE", DEFAULT_SIZE)),
+        max_distance=int(os.getenv("IMAGE_CACHE_MAX_DISTANCE", DEFAULT_DISTANCE)),
+        persist=os.getenv("IMAGE_CACHE_PERSIST", "").strip().lower() in ("1", "true", "yes", "on"),
+        ttl_days=float(os.getenv("IMAGE_CACHE_TTL_DAYS", DEFAULT_TTL_DAYS)),
+    )
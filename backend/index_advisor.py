@@ -0,0 +1,247 @@
+"""
+WASTE IQ – Composite Index Advisor
+Records the shape of every query issued through firestore_client /
+firestore_async (collection, filter fields + operators, order_by) and
+works out which composite indexes Firestore needs for them, diffed against
+firestore.indexes.json.
+
+Recording is off unless INDEX_ADVISOR_RECORD=1 (or start_recording()).
+Shapes are recorded before the query/doc caches and the bin registry, so a
+cached query still counts. Equality-only queries and single-field ordering
+are served by Firestore's automatic indexes and never need an entry.
+
+  GET /health/indexes                                  – live report
+  python backend/index_advisor.py shapes.json          – diff a saved report
+  python backend/index_advisor.py shapes.json --write  – add the missing indexes
+"""
+
+import argparse
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:  # imported as a top-level module from backend/ (uvicorn main:app)
+    import metrics as _metrics
+except ImportError:  # imported as backend.index_advisor
+    from backend import metrics as _metrics
+
+INDEXES_FILE = Path(__file__).resolve().parent.parent / "firestore.indexes.json"
+
+_EQUALITY = ("==", "in")
+_CONTAINS = ("array_contains", "array_contains_any")
+
+_recording = os.getenv("INDEX_ADVISOR_RECORD", "").strip().lower() in ("1", "true", "yes", "on")
+_lock = threading.Lock()
+# (collection, ((field, op), ...), order_by, order_desc) → {"count": int, "routes": set}
+_shapes: Dict[tuple, Dict[str, Any]] = {}
+
+
+# ─────────────────────────────────────────────────────────────
+# Recording
+# ─────────────────────────────────────────────────────────────
+
+def start_recording() -> None:
+    global _recording
+    _recording = True
+
+
+def stop_recording() -> None:
+    global _recording
+    _recording = False
+
+
+def is_recording() -> bool:
+    return _recording
+
+
+def reset() -> None:
+    with _lock:
+        _shapes.clear()
+
+
+def record(collection: str, filters: Optional[List[tuple]] = None,
+           order_by: Optional[str] = None, order_desc: bool = False) -> None:
+    if not _recording:
+        return
+    shape = (collection, tuple(sorted((f[0], f[1]) for f in filters or [])),
+             order_by, bool(order_desc) if order_by else False)
+    with _lock:
+        entry = _shapes.setdefault(shape, {"count": 0, "routes": set()})
+        entry["count"] += 1
+        entry["routes"].add(_metrics.current_route.get())
+
+
+def records(fn):
+    """Record the query shape of each call to a firestore helper (any kind of function)."""
+    sig = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if _recording:
+            a = sig.bind_partial(*args, **kwargs).arguments
+            record(a["collection"], a.get("filters"), a.get("order_by"), a.get("order_desc", False))
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+def shapes() -> List[Dict[str, Any]]:
+    """Recorded shapes, most frequent first (JSON-serialisable)."""
+    with _lock:
+        items = [(k, v["count"], sorted(v["routes"])) for k, v in _shapes.items()]
+    items.sort(key=lambda item: -item[1])
+    return [{
+        "collection": collection,
+        "filters":    [list(f) for f in filters],
+        "order_by":   order_by,
+        "order_desc": order_desc,
+        "count":      count,
+        "routes":     routes,
+    } for (collection, filters, order_by, order_desc), count, routes in items]
+
+
+# ─────────────────────────────────────────────────────────────
+# Index rules
+# ─────────────────────────────────────────────────────────────
+# A requirement is (collection, prefix, tail): the equality / array-contains
+# fields as a set – Firestore accepts them in any order – followed by the
+# order_by and inequality fields, whose order and direction must match.
+
+def requirement(collection: str, filters: List[Tuple[str, str]], order_by: Optional[str],
+                order_desc: bool) -> Optional[Tuple[str, frozenset, tuple]]:
+    """
+    What composite index a query shape needs, or None when the automatic
+    single-field indexes serve it (equality / array-contains only, or a
+    single field overall). Tail: order_by, then other inequality fields ascending.
+    """
+    equality = {f for f, op in filters if op in _EQUALITY}
+    contains = {f for f, op in filters if op in _CONTAINS}
+    ranges   = sorted({f for f, op in filters if op not in _EQUALITY + _CONTAINS})
+
+    tail: List[Tuple[str, str]] = []
+    if order_by and order_by not in equality:
+        tail.append((order_by, "DESCENDING" if order_desc else "ASCENDING"))
+    tail += [(f, "ASCENDING") for f in ranges if f != order_by]
+
+    prefix = frozenset([(f, "EQ") for f in equality] + [(f, "CONTAINS") for f in contains])
+    if not tail or len(prefix) + len(tail) < 2:
+        return None
+    return collection, prefix, tuple(tail)
+
+
+def _index_json(req: Tuple[str, frozenset, tuple]) -> Dict:
+    collection, prefix, tail = req
+    fields = [{"fieldPath": f, "order": "ASCENDING"} if mode == "EQ"
+              else {"fieldPath": f, "arrayConfig": "CONTAINS"}
+              for f, mode in sorted(prefix, key=lambda p: (p[1] != "EQ", p[0]))]
+    fields += [{"fieldPath": f, "order": d} for f, d in tail]
+    return {"collectionGroup": collection, "queryScope": "COLLECTION", "fields": fields}
+
+
+def _covers(index: Dict, req: Tuple[str, frozenset, tuple]) -> bool:
+    collection, prefix, tail = req
+    if index.get("collectionGroup") != collection or index.get("queryScope", "COLLECTION") != "COLLECTION":
+        return False
+    fields = index.get("fields", [])
+    if len(fields) != len(prefix) + len(tail):
+        return False
+    head = fields[:len(prefix)]
+    return (frozenset((f["fieldPath"], "CONTAINS" if f.get("arrayConfig") else "EQ") for f in head) == prefix
+            and tuple((f["fieldPath"], f.get("order")) for f in fields[len(prefix):]) == tail)
+
+
+# ─────────────────────────────────────────────────────────────
+# Report
+# ─────────────────────────────────────────────────────────────
+
+def load_indexes(path: Optional[Path] = None) -> Dict:
+    path = Path(path or INDEXES_FILE)
+    if not path.exists():
+        return {"indexes": [], "fieldOverrides": []}
+    return json.loads(path.read_text())
+
+
+def report(recorded: Optional[List[Dict]] = None, indexes_path: Optional[Path] = None) -> Dict:
+    """
+    Diff recorded shapes (default: this process's) against firestore.indexes.json:
+    missing – indexes some recorded query needs but the file lacks
+    unused  – declared indexes no recorded query needed (may still be used
+              by code paths that did not run)
+    """
+    recorded = shapes() if recorded is None else recorded
+    declared = load_indexes(indexes_path)["indexes"]
+
+    missing: Dict[tuple, Dict] = {}
+    used = set()
+    queries = []
+    for s in recorded:
+        req = requirement(s["collection"], [tuple(f) for f in s["filters"]],
+                          s["order_by"], s["order_desc"])
+        covered_by = None
+        if req is not None:
+            covered_by = next((i for i, idx in enumerate(declared) if _covers(idx, req)), None)
+            if covered_by is None:
+                entry = missing.setdefault(req, {"index": _index_json(req), "count": 0, "routes": set()})
+                entry["count"] += s["count"]
+                entry["routes"].update(s["routes"])
+            else:
+                used.add(covered_by)
+        queries.append({**s, "needs_index": req is not None,
+                        "status": "automatic" if req is None else
+                                  "declared" if covered_by is not None else "missing"})
+
+    return {
+        "recording": _recording,
+        "queries":   queries,
+        "missing":   [{"index": m["index"], "count": m["count"], "routes": sorted(m["routes"])}
+                      for m in sorted(missing.values(), key=lambda m: -m["count"])],
+        "unused":    [idx for i, idx in enumerate(declared) if i not in used],
+    }
+
+
+def write_missing(missing: List[Dict], indexes_path: Optional[Path] = None) -> int:
+    """Append the missing indexes to firestore.indexes.json; returns how many were added."""
+    path = Path(indexes_path or INDEXES_FILE)
+    data = load_indexes(path)
+    data["indexes"] += [m["index"] for m in missing]
+    path.write_text(json.dumps(data, indent=4) + "\n")
+    return len(missing)
+
+
+_MODES = {"ASCENDING": "asc", "DESCENDING": "desc", "CONTAINS": "contains"}
+
+
+def _fmt(index: Dict) -> str:
+    fields = ", ".join(f"{f['fieldPath']} {_MODES.get(f.get('order') or f.get('arrayConfig'), '?')}"
+                       for f in index["fields"])
+    return f"{index['collectionGroup']}({fields})"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Diff recorded query shapes against firestore.indexes.json")
+    ap.add_argument("shapes", help="JSON from GET /health/indexes (its 'queries') or a list of shapes")
+    ap.add_argument("--indexes", default=str(INDEXES_FILE))
+    ap.add_argument("--write", action="store_true", help="append the missing indexes to --indexes")
+    args = ap.parse_args()
+
+    data = json.loads(Path(args.shapes).read_text())
+    recorded = data["queries"] if isinstance(data, dict) else data
+    result = report(recorded, args.indexes)
+
+    print(f"{len(recorded)} query shapes, {len(result['missing'])} missing indexes, "
+          f"{len(result['unused'])} declared but unused")
+    for m in result["missing"]:
+        print(f"  + {_fmt(m['index'])}  ×{m['count']}  {', '.join(m['routes'])}")
+    for idx in result["unused"]:
+        print(f"  ? {_fmt(idx)}")
+    if args.write and result["missing"]:
+        print(f"✅ Added {write_missing(result['missing'], args.indexes)} indexes to {args.indexes}")
+    sys.exit(1 if result["missing"] and not args.write else 0)
+
+
+if __name__ == "__main__":
+    main()
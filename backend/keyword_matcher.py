@@ -0,0 +1,85 @@
+"""
+WASTE IQ – Keyword Matcher
+Answers the two "first keyword" questions waste_classifier asks of its
+lookup tables, without scanning every key per call:
+
+  first_in(text)         – first key (in table order) that occurs in text
+  first_containing(text) – first key (in table order) that contains text
+
+first_in runs an Aho-Corasick automaton over text (one pass, independent of
+the number of keys); each state carries the best rank of every key ending
+there, so the result is the same as `next(k for k in keys if k in text)`.
+first_containing is a single dict lookup in a table of every substring of
+every key, mapped to the lowest-ranked key containing it.
+Both tables are built once, when the matcher is created.
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+_NONE = 1 << 62      # rank meaning "no key matched"
+
+
+class KeywordMatcher:
+    def __init__(self, keys: Iterable[str]):
+        self.keys: List[str] = list(dict.fromkeys(keys))
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._best: List[int] = [_NONE]       # lowest key rank ending at this state or its fail chain
+        self._within: Dict[str, int] = {}
+
+        for rank, key in enumerate(self.keys):
+            state = 0
+            for ch in key:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._best.append(_NONE)
+                state = nxt
+            self._best[state] = min(self._best[state], rank)
+            for i in range(len(key) + 1):
+                for j in range(i, len(key) + 1):
+                    self._within.setdefault(key[i:j], rank)
+
+        # Breadth-first: a state's fail target is always finished before it
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, nxt in self._goto[state].items():
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._best[nxt] = min(self._best[nxt], self._best[self._fail[nxt]])
+                queue.append(nxt)
+
+    def first_in_rank(self, text: str) -> int:
+        goto, fail, best = self._goto, self._fail, self._best
+        found = best[0]         # an empty key occurs in every text
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if best[state] < found:
+                found = best[state]
+                if found == 0:
+                    break
+        return found
+
+    def first_containing_rank(self, text: str) -> int:
+        return self._within.get(text, _NONE)
+
+    def first_in(self, text: str) -> Optional[str]:
+        rank = self.first_in_rank(text)
+        return self.keys[rank] if rank != _NONE else None
+
+    def first_containing(self, text: str) -> Optional[str]:
+        rank = self.first_containing_rank(text)
+        return self.keys[rank] if rank != _NONE else None
+
+    def first_either(self, text: str) -> Optional[str]:
+        """First key that occurs in text or contains it."""
+        rank = min(self.first_in_rank(text), self.first_containing_rank(text))
+        return self.keys[rank] if rank != _NONE else None
@@ -3,10 +3,11 @@ WASTE IQ – FastAPI Backend Entry Point
 Handles all REST API routes with Firebase Authentication.
 """
 
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 import uvicorn
+import hmac
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -19,6 +20,8 @@ from routers import auth_router, bins_router, classify_router, complaints_router
 from routers import gamification_router, overflow_router, reports_router, routing_router
 from waste_classifier import WasteClassifier
 from overflow_model import OverflowModel
+from auth import require_admin, UserInfo
+import metrics
 
 app = FastAPI(
     title="WASTE IQ API",
@@ -37,6 +40,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ── Route tagging for Firestore metrics / slow-query log ─────────────────────
+@app.middleware("http")
+async def tag_route(request: Request, call_next):
+    token = metrics.current_route.set(f"{request.method} {request.url.path}")
+    try:
+        return await call_next(request)
+    finally:
+        metrics.current_route.reset(token)
+
 # ── Startup: pre-load ML models ───────────────────────────────────────────────
 @app.on_event("startup")
 async def startup_event():
@@ -53,12 +65,35 @@ async def startup_event():
     except Exception as e:
         print(f"⚠️  OverflowModel unavailable: {e}")
         app.state.overflow_model = None
+    import auth
+    try:
+        source = auth.start_verifier()
+        if source == "stand-in":
+            print("⚠️  AUTH_VERIFIER=stand-in – accepting locally minted tokens only")
+        elif source:
+            print(f"✅ Token signing keys loaded ({source})")
+    except Exception as e:
+        print(f"⚠️  Token signing keys unavailable, retrying on first request: {e}")
+    import firestore_client
+    if firestore_client.start_write_behind():
+        print("✅ Write-behind queue started")
+    registry = firestore_client.start_bin_registry()
+    if registry:
+        print(f"✅ Bin registry loaded ({registry.size()} bins, {registry.mode})")
     print("🟢 Backend ready — http://localhost:8000/docs")
 
 # ── Shutdown ──────────────────────────────────────────────────────────────────
 @app.on_event("shutdown")
 async def shutdown_event():
     print("🛑 WASTE IQ Backend shutting down...")
+    import auth
+    import firestore_client
+    from points import close_points
+    close_points()
+    firestore_client.stop_write_behind()
+    firestore_client.stop_bin_registry()
+    auth.stop_verifier()
+    auth.user_index.stop()
 
 # ── Health Check ──────────────────────────────────────────────────────────────
 @app.get("/health", tags=["system"])
@@ -69,6 +104,53 @@ async def health_check():
         "version": "1.0.0"
     }
 
+# ── Diagnostics (admin only; /metrics takes the METRICS_TOKEN scrape token) ────
+@app.get("/health/cache", tags=["system"])
+async def cache_health(admin: UserInfo = Depends(require_admin)):
+    """Hit/miss counters of the get_doc document cache and the query cache."""
+    import auth
+    import firestore_client
+    import waste_classifier
+    return {
+        "doc_cache":   firestore_client.doc_cache_stats(),
+        "query_cache": firestore_client.query_cache_stats(),
+        "write_behind": firestore_client.write_behind_stats(),
+        "bin_registry": firestore_client.bin_registry_stats(),
+        "token_cache": auth.token_cache.stats(),
+        "auth_keys":   auth.verifier.keys.stats() if auth.verifier else None,
+        "user_index":  auth.user_index.stats(),
+        "category_cache": waste_classifier.category_cache_stats(),
+        "image_cache": waste_classifier.image_cache_stats(),
+        "gemini":      app.state.classifier.gemini.stats() if getattr(app.state, "classifier", None) else None,
+    }
+
+@app.get("/health/indexes", tags=["system"])
+async def index_health(admin: UserInfo = Depends(require_admin)):
+    """Recorded query shapes diffed against firestore.indexes.json (INDEX_ADVISOR_RECORD=1)."""
+    import index_advisor
+    return index_advisor.report()
+
+@app.get("/health/metrics", tags=["system"])
+async def metrics_health(admin: UserInfo = Depends(require_admin)):
+    """Firestore latency / document-count and classification phase histograms, recent slow queries."""
+    return {
+        "slow_query_ms": metrics.SLOW_QUERY_MS,
+        "histograms":    metrics.REGISTRY.snapshot(),
+        "slow_queries":  metrics.slow_queries(),
+    }
+
+@app.get("/metrics", tags=["system"], response_class=PlainTextResponse)
+async def prometheus_metrics(request: Request):
+    """Prometheus scrape endpoint; disabled unless METRICS_TOKEN is set."""
+    expected = os.getenv("METRICS_TOKEN", "")
+    if not expected:
+        raise HTTPException(status_code=403, detail="Set METRICS_TOKEN to enable /metrics")
+    supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+    if not hmac.compare_digest(supplied.encode(), expected.encode()):
+        raise HTTPException(status_code=401, detail="Invalid metrics token",
+                            headers={"WWW-Authenticate": "Bearer"})
+    return PlainTextResponse(metrics.REGISTRY.render_prometheus())
+
 # ── Register Routers ──────────────────────────────────────────────────────────
 app.include_router(auth_router.router,         prefix="/auth",         tags=["auth"])
 app.include_router(bins_router.router,         prefix="/bins",         tags=["bins"])
@@ -0,0 +1,285 @@
+"""
+WASTE IQ – Metrics
+In-process metrics registry plus the instrumentation wrapped around every
+firestore_client / firestore_async helper.
+
+Each call records latency and document count histograms labelled by
+collection, operation and filter signature (field+operator, values dropped),
+and calls slower than SLOW_QUERY_MS (default 500) go to the slow-query log
+together with the API route that issued them.
+
+  GET /metrics         – Prometheus text format
+  GET /health/metrics  – JSON snapshot + recent slow queries
+"""
+
+import bisect
+import contextvars
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PHASE_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DOCUMENT_BUCKETS = (0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+SLOW_QUERY_KEEP = 200
+
+# "METHOD /path" of the request being served; set by the middleware in main.py
+current_route: contextvars.ContextVar[str] = contextvars.ContextVar("current_route", default="-")
+
+
+# ─────────────────────────────────────────────────────────────
+# Registry
+# ─────────────────────────────────────────────────────────────
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...], buckets: Tuple[float, ...]):
+        self.name    = name
+        self.help    = help
+        self.labels  = labels
+        self.buckets = tuple(buckets)
+        self._lock   = threading.Lock()
+        # label values → [bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            series[idx] += 1
+            series[-1] += value
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        out = []
+        for label_values, series in items:
+            count = sum(series[:-1])
+            out.append({
+                "labels":  dict(zip(self.labels, label_values)),
+                "count":   count,
+                "sum":     round(series[-1], 6),
+                "avg":     round(series[-1] / count, 6) if count else 0.0,
+                "p50":     self._quantile(series, count, 0.50),
+                "p95":     self._quantile(series, count, 0.95),
+                "p99":     self._quantile(series, count, 0.99),
+            })
+        return out
+
+    def _quantile(self, series: List[float], count: int, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th observation (None = above the last bucket)."""
+        if not count:
+            return None
+        rank, seen = q * count, 0
+        for bound, n in zip(self.buckets, series):
+            seen += n
+            if seen >= rank:
+                return bound
+        return None
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        for label_values, series in items:
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+            cumulative = 0
+            for bound, n in zip(self.buckets, series):
+                cumulative += n
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}')
+            cumulative += series[-2]
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {series[-1]}")
+            lines.append(f"{self.name}_count{{{base}}} {cumulative}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Histogram] = {}
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...],
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, help, labels, buckets)
+            return self._metrics[name]
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        return {name: m.snapshot() for name, m in list(self._metrics.items())}
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        for m in list(self._metrics.values()):
+            lines += m.render()
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._metrics.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+_FS_LABELS = ("collection", "op", "filters")
+FIRESTORE_LATENCY = REGISTRY.histogram(
+    "wasteiq_firestore_op_seconds", "Latency of firestore_client operations", _FS_LABELS)
+FIRESTORE_DOCUMENTS = REGISTRY.histogram(
+    "wasteiq_firestore_op_documents", "Documents returned or written per firestore_client operation",
+    _FS_LABELS, DOCUMENT_BUCKETS)
+
+
+# ─────────────────────────────────────────────────────────────
+# Slow-query log
+# ─────────────────────────────────────────────────────────────
+
+_slow_queries: deque = deque(maxlen=SLOW_QUERY_KEEP)
+
+
+def _log_slow(collection: str, op: str, signature: str, elapsed: float, docs: int) -> None:
+    entry = {
+        "at":         datetime.now(timezone.utc).isoformat(),
+        "route":      current_route.get(),
+        "collection": collection,
+        "op":         op,
+        "filters":    signature,
+        "ms":         round(elapsed * 1000, 1),
+        "documents":  docs,
+    }
+    _slow_queries.append(entry)
+    print(f"🐢 Slow Firestore {op} on {collection} [{signature}] "
+          f"{entry['ms']}ms, {docs} docs — {entry['route']}")
+
+
+def slow_queries() -> List[Dict]:
+    """Most recent slow calls, newest first."""
+    return list(reversed(_slow_queries))
+
+
+# ─────────────────────────────────────────────────────────────
+# Instrumentation
+# ─────────────────────────────────────────────────────────────
+
+def filter_signature(filters: Optional[List[tuple]], order_by: Optional[str] = None,
+                     order_desc: bool = False) -> str:
+    """Label like 'ward_id==,status in|order:predicted_at desc' – values dropped to keep cardinality low."""
+    sig = ",".join(f"{f[0]}{f[1] if f[1] in ('==', '!=', '<', '<=', '>', '>=') else ' ' + f[1]}"
+                   for f in filters or [])
+    if order_by:
+        sig += f"|order:{order_by}{' desc' if order_desc else ''}"
+    return sig or "-"
+
+
+def record(collection: str, op: str, signature: str, elapsed: float, docs: int) -> None:
+    FIRESTORE_LATENCY.observe(elapsed, collection, op, signature)
+    FIRESTORE_DOCUMENTS.observe(docs, collection, op, signature)
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        _log_slow(collection, op, signature, elapsed, docs)
+
+
+# Document counters for the different result shapes
+def count_one(result: Any) -> int:
+    return 0 if result is None else 1
+
+
+def count_len(result: Any) -> int:
+    return len(result)
+
+
+def count_page(result: Tuple[List, Any]) -> int:
+    return len(result[0])
+
+
+def count_written(result: Dict) -> int:
+    return result.get("written", 0)
+
+
+def count_written_one(result: Any) -> int:
+    """Single-document writes that return nothing."""
+    return 1
+
+
+def _collection_of(arguments: Dict[str, Any]) -> str:
+    if "collection" in arguments:
+        return arguments["collection"]
+    ops = arguments.get("ops") or []
+    return "+".join(sorted({op[1] for op in ops})) or "-"
+
+
+def instrument(op: str, count: Callable[[Any], int] = count_one):
+    """
+    Decorate a firestore helper (sync, async, generator or async generator).
+    Generators are timed from first to last item and count the items yielded.
+    """
+    def decorator(fn):
+        sig = inspect.signature(fn)
+
+        def labels(args, kwargs):
+            arguments = sig.bind_partial(*args, **kwargs).arguments
+            return (_collection_of(arguments), filter_signature(
+                arguments.get("filters"), arguments.get("order_by"), arguments.get("order_desc", False)))
+
+        if inspect.isasyncgenfunction(fn):
+            @functools.wraps(fn)
+            async def agen_wrapper(*args, **kwargs):
+                collection, signature = labels(args, kwargs)
+                start, n = time.perf_counter(), 0
+                try:
+                    async for item in fn(*args, **kwargs):
+                        n += 1
+                        yield item
+                finally:
+                    record(collection, op, signature, time.perf_counter() - start, n)
+            return agen_wrapper
+
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def gen_wrapper(*args, **kwargs):
+                collection, signature = labels(args, kwargs)
+                start, n = time.perf_counter(), 0
+                try:
+                    for item in fn(*args, **kwargs):
+                        n += 1
+                        yield item
+                finally:
+                    record(collection, op, signature, time.perf_counter() - start, n)
+            return gen_wrapper
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                collection, signature = labels(args, kwargs)
+                start, docs = time.perf_counter(), 0
+                try:
+                    result = await fn(*args, **kwargs)
+                    docs = count(result)
+                    return result
+                finally:
+                    record(collection, op, signature, time.perf_counter() - start, docs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            collection, signature = labels(args, kwargs)
+            start, docs = time.perf_counter(), 0
+            try:
+                result = fn(*args, **kwargs)
+                docs = count(result)
+                return result
+            finally:
+                record(collection, op, signature, time.perf_counter() - start, docs)
+        return wrapper
+    return decorator
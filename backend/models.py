@@ -233,6 +233,7 @@ class APIResponse(BaseModel):
     success: bool
     message: str
     data:    Optional[Any] = None
+    next_page_token: Optional[str] = None   # set by paginated list endpoints
 
 class PaginatedResponse(BaseModel):
     items:   List[Any]
@@ -0,0 +1,149 @@
+"""
+WASTE IQ – Points Service
+Single place that awards gamification points (classification, bin reports,
+complaints, driver collections).
+
+An award is one merge-set on gamification/{uid}: Increment on total_points
+and weekly_points, ArrayUnion([]) so `badges` exists without being
+overwritten. There is no read first, so concurrent awards cannot race and a
+missing profile is simply created. Awards for the same uid arriving within
+POINTS_COALESCE_MS (default 200, 0 = write immediately) are summed into a
+single write; all uids pending in the window share one batched commit.
+
+A failed award goes back into the pending set and is retried with
+exponential backoff (1s doubling to 60s). After POINTS_MAX_ATTEMPTS failed
+writes (default 8) it is dropped and logged with the uid and points.
+"""
+
+import atexit
+import os
+import threading
+from collections import defaultdict
+from typing import Dict, Optional
+
+try:  # imported as a top-level module from backend/ (uvicorn main:app)
+    import firestore_client as _fc
+except ImportError:  # imported as backend.points
+    from backend import firestore_client as _fc
+
+COALESCE_SECONDS = float(os.getenv("POINTS_COALESCE_MS", "200")) / 1000
+MAX_ATTEMPTS     = int(os.getenv("POINTS_MAX_ATTEMPTS", "8"))
+RETRY_SECONDS    = 1.0
+MAX_BACKOFF      = 60.0
+
+
+class PointsService:
+    def __init__(self, window: float = COALESCE_SECONDS, max_attempts: int = MAX_ATTEMPTS,
+                 retry_delay: float = RETRY_SECONDS):
+        self.window       = window
+        self.max_attempts = max_attempts
+        self.retry_delay  = retry_delay
+        self._lock    = threading.Lock()
+        self._pending: Dict[str, int] = defaultdict(int)
+        self._attempts: Dict[str, int] = {}     # uid → failed writes of its pending award
+        self._failures = 0                      # consecutive flushes with failures (backoff)
+        self._timer: Optional[threading.Timer] = None
+        self.stats = {"written": 0, "retried": 0, "dropped": 0}
+
+    def award(self, uid: str, points: int) -> None:
+        if not uid or not points:
+            return
+        with self._lock:
+            self._pending[uid] += points
+            immediate = self.window <= 0 and not self._failures
+            if not immediate:
+                self._schedule()
+        if immediate:
+            self.flush()
+
+    def _schedule(self) -> None:
+        """Start the flush timer if none is running (caller holds the lock)."""
+        if self._timer is not None:
+            return
+        delay = (min(self.retry_delay * 2 ** (self._failures - 1), MAX_BACKOFF)
+                 if self._failures else self.window)
+        self._timer = threading.Timer(delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush(self) -> None:
+        """Write every pending award now (timer callback, shutdown, tests)."""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(int)
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not pending:
+            return
+        failed = self._write(pending)
+        with self._lock:
+            for uid in pending:
+                if uid not in failed:
+                    self._attempts.pop(uid, None)
+            self.stats["written"] += len(pending) - len(failed)
+            for uid, points in failed.items():
+                attempts = self._attempts.get(uid, 0) + 1
+                if attempts >= self.max_attempts:
+                    self._attempts.pop(uid, None)
+                    self.stats["dropped"] += 1
+                    print(f"❌ Points award dropped after {attempts} failed writes: {uid} +{points}")
+                    continue
+                self._attempts[uid] = attempts
+                self._pending[uid] += points
+                self.stats["retried"] += 1
+            self._failures = self._failures + 1 if failed else 0
+            if self._pending:
+                self._schedule()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def close(self) -> None:
+        """Final flush (shutdown); awards still failing are reported, not retried."""
+        self.flush()
+        with self._lock:
+            left, self._pending = dict(self._pending), defaultdict(int)
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        for uid, points in left.items():
+            print(f"❌ Points award not written at shutdown: {uid} +{points}")
+
+    @staticmethod
+    def _write(awards: Dict[str, int]) -> Dict[str, int]:
+        """Commit the awards; returns the ones that failed (uid → points)."""
+        ops = [("set_merge", "gamification", uid, {
+            "uid":           uid,
+            "total_points":  _fc.increment(points),
+            "weekly_points": _fc.increment(points),
+            "badges":        _fc.array_union([]),
+        }) for uid, points in awards.items()]
+        try:
+            result = _fc.batch_write(ops)
+        except Exception as e:
+            print(f"⚠️  Points batch failed: {e} — will retry {len(awards)} awards")
+            return dict(awards)
+        failed = {}
+        for f in result["failed"]:
+            print(f"⚠️  Points award failed for {f['doc_id']}: {f['error']} — will retry")
+            failed[f["doc_id"]] = awards[f["doc_id"]]
+        return failed
+
+
+_service = PointsService()
+atexit.register(_service.close)
+
+
+def award_points(uid: str, points: int) -> None:
+    """Add `points` to a user's total and weekly counters."""
+    _service.award(uid, points)
+
+
+def flush_points() -> None:
+    _service.flush()
+
+
+def close_points() -> None:
+    """Last flush at shutdown; logs awards that still could not be written."""
+    _service.close()
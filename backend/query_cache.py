@@ -0,0 +1,212 @@
+"""
+WASTE IQ – Query Cache
+Short-TTL cache for firestore_client.query_collection results, keyed by
+(collection, filters, order_by, order_desc, limit, fields).
+
+Every write to a collection through firestore_client bumps that collection's
+generation and drops its cached results. Concurrent identical queries are
+coalesced: the first caller runs the query, the others wait for its result.
+Config comes from QUERY_CACHE_CONFIG, same format as DOC_CACHE_CONFIG
+(collection=max_entries:ttl_seconds; max_entries 0 disables a collection).
+"""
+
+import asyncio
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:  # imported as a top-level module from backend/ (uvicorn main:app)
+    from doc_cache import parse_config
+except ImportError:  # imported as backend.query_cache
+    from backend.doc_cache import parse_config
+
+# Collections polled by every dashboard rerun
+DEFAULT_CONFIG: Dict[str, Tuple[int, float]] = {
+    "bins":                 (256, 10.0),
+    "overflow_predictions": (256, 10.0),
+    "gamification":         (64, 10.0),
+    "wards":                (64, 60.0),
+}
+
+
+def query_key(filters: Optional[List[tuple]], order_by: Optional[str], order_desc: bool,
+              limit: Optional[int], fields: Optional[List[str]]) -> str:
+    """Stable key for one query shape (filter values may be unhashable lists)."""
+    return repr(([tuple(f) for f in filters or []], order_by, bool(order_desc), limit,
+                 list(fields) if fields else None))
+
+
+class _CollectionCache:
+    __slots__ = ("max_size", "ttl", "entries", "generation", "hits", "misses", "coalesced",
+                 "evictions")
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size   = max_size
+        self.ttl        = ttl
+        self.entries: "OrderedDict[str, Tuple[float, List[Dict]]]" = OrderedDict()
+        self.generation = 0
+        self.hits       = 0
+        self.misses     = 0
+        self.coalesced  = 0
+        self.evictions  = 0
+
+
+class QueryCache:
+    def __init__(self, config: Optional[Dict[str, Tuple[int, float]]] = None):
+        self._lock = threading.Lock()
+        self._collections: Dict[str, _CollectionCache] = {}
+        # (collection, key, generation) → pending result of the query being run
+        self._inflight: Dict[tuple, Future] = {}
+        self._ainflight: Dict[tuple, "asyncio.Future"] = {}
+        for name, (size, ttl) in (config if config is not None else DEFAULT_CONFIG).items():
+            self.configure(name, size, ttl)
+
+    def configure(self, collection: str, max_size: int, ttl: float) -> None:
+        with self._lock:
+            if max_size <= 0:
+                self._collections.pop(collection, None)
+            else:
+                self._collections[collection] = _CollectionCache(max_size, ttl)
+
+    def _lookup(self, cc: _CollectionCache, key: str):
+        """(cached result or None, generation). Caller holds the lock."""
+        entry = cc.entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            cc.entries.move_to_end(key)
+            cc.hits += 1
+            return entry[1], cc.generation
+        if entry is not None:
+            del cc.entries[key]
+        return None, cc.generation
+
+    def _store(self, collection: str, key: str, result: List[Dict], generation: int) -> None:
+        """Cache a private copy unless the collection was written since `generation`."""
+        cc = self._collections.get(collection)
+        if cc is None:
+            return
+        with self._lock:
+            if cc.generation != generation:
+                return
+            cc.entries[key] = (time.monotonic() + cc.ttl, result)
+            cc.entries.move_to_end(key)
+            while len(cc.entries) > cc.max_size:
+                cc.entries.popitem(last=False)
+                cc.evictions += 1
+
+    def get_or_load(self, collection: str, key: str, loader: Callable[[], List[Dict]]) -> List[Dict]:
+        """Return a cached result, join an identical in-flight query, or run `loader`."""
+        cc = self._collections.get(collection)
+        if cc is None:
+            return loader()
+
+        with self._lock:
+            cached, generation = self._lookup(cc, key)
+            if cached is None:
+                flight_key = (collection, key, generation)
+                pending = self._inflight.get(flight_key)
+                if pending is None:
+                    cc.misses += 1
+                    self._inflight[flight_key] = Future()
+                else:
+                    cc.coalesced += 1
+        if cached is not None:
+            return copy.deepcopy(cached)
+        if pending is not None:
+            return copy.deepcopy(pending.result())
+
+        future = self._inflight[flight_key]
+        try:
+            result = loader()
+            stored = copy.deepcopy(result)
+            self._store(collection, key, stored, generation)
+            future.set_result(stored)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(flight_key, None)
+
+    async def aget_or_load(self, collection: str, key: str, loader) -> List[Dict]:
+        """Async get_or_load; `loader` is a zero-argument coroutine function."""
+        cc = self._collections.get(collection)
+        if cc is None:
+            return await loader()
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            cached, generation = self._lookup(cc, key)
+            if cached is None:
+                flight_key = (id(loop), collection, key, generation)
+                pending = self._ainflight.get(flight_key)
+                if pending is None:
+                    cc.misses += 1
+                    self._ainflight[flight_key] = loop.create_future()
+                else:
+                    cc.coalesced += 1
+        if cached is not None:
+            return copy.deepcopy(cached)
+        if pending is not None:
+            return copy.deepcopy(await asyncio.shield(pending))
+
+        future = self._ainflight[flight_key]
+        try:
+            result = await loader()
+            stored = copy.deepcopy(result)
+            self._store(collection, key, stored, generation)
+            future.set_result(stored)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody may be waiting – don't log "exception was never retrieved"
+            future.exception()
+            raise
+        finally:
+            with self._lock:
+                self._ainflight.pop(flight_key, None)
+
+    def invalidate(self, collection: str) -> None:
+        cc = self._collections.get(collection)
+        if cc is None:
+            return
+        with self._lock:
+            cc.generation += 1
+            cc.entries.clear()
+
+    def clear(self) -> None:
+        for name in list(self._collections):
+            self.invalidate(name)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = {}
+            for name, cc in self._collections.items():
+                lookups = cc.hits + cc.misses + cc.coalesced
+                out[name] = {
+                    "size":      len(cc.entries),
+                    "max_size":  cc.max_size,
+                    "ttl":       cc.ttl,
+                    "hits":      cc.hits,
+                    "misses":    cc.misses,
+                    "coalesced": cc.coalesced,
+                    "evictions": cc.evictions,
+                    "hit_rate":  round((cc.hits + cc.coalesced) / lookups, 4) if lookups else 0.0,
+                }
+            return out
+
+
+def cache_from_env() -> QueryCache:
+    raw = os.getenv("QUERY_CACHE_CONFIG", "").strip()
+    if not raw:
+        return QueryCache()
+    config = dict(DEFAULT_CONFIG)
+    config.update(parse_config(raw))
+    return QueryCache(config)
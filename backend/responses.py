@@ -0,0 +1,77 @@
+"""
+WASTE IQ – Fast JSON Responses
+List-heavy endpoints return api_response(...) instead of APIResponse(...).
+The body has the same shape, but FastAPI's response_model validation and
+jsonable_encoder pass over every document are skipped and the raw Firestore
+dicts go straight to orjson (stdlib json when orjson is not installed).
+
+Routes keep response_model=APIResponse so the OpenAPI schema is unchanged –
+FastAPI does not re-validate a Response returned directly.
+"""
+
+import base64
+import datetime as _dt
+import json
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Optional
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional speed-up, see requirements.txt
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """Types neither encoder handles natively (Firestore values, pydantic models, ...)."""
+    if isinstance(obj, (_dt.datetime, _dt.date, _dt.time)):
+        return obj.isoformat()          # incl. Firestore DatetimeWithNanoseconds
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, bytes):
+        return base64.b64encode(obj).decode()
+    if hasattr(obj, "latitude") and hasattr(obj, "longitude"):     # firestore GeoPoint
+        return {"latitude": obj.latitude, "longitude": obj.longitude}
+    if hasattr(obj, "ToDatetime"):                                # protobuf Timestamp
+        return obj.ToDatetime().isoformat()
+    if hasattr(obj, "path") and hasattr(obj, "id"):               # DocumentReference
+        return obj.path
+    if hasattr(obj, "model_dump"):                                # pydantic v2
+        return obj.model_dump()
+    if hasattr(obj, "dict"):                                      # pydantic v1
+        return obj.dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=_OPTIONS)
+else:
+    def dumps(content: Any) -> bytes:
+        # Same settings as starlette's JSONResponse
+        return json.dumps(content, default=_default, ensure_ascii=False, allow_nan=False,
+                          separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def api_response(success: bool = True, message: str = "OK", data: Any = None,
+                 next_page_token: Optional[str] = None, status_code: int = 200) -> FastJSONResponse:
+    """APIResponse-shaped body; `data` is serialised as-is, not validated."""
+    return FastJSONResponse({
+        "success":         success,
+        "message":         message,
+        "data":            data,
+        "next_page_token": next_page_token,
+    }, status_code=status_code)
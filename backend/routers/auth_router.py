@@ -1,8 +1,10 @@
 """WASTE IQ – Auth Router"""
 from fastapi import APIRouter, Depends, HTTPException, Body
-from auth import get_current_user, set_user_role, create_user, list_all_users, require_admin, UserInfo
-from firestore_client import get_doc, set_doc, update_doc
+from auth import get_current_user, set_user_role, create_user, list_users_page, require_admin, UserInfo
+from fastapi.concurrency import run_in_threadpool
+from firestore_async import get_doc, set_doc, update_doc
 from models import SignupRequest, UserProfile, UserUpdate, APIResponse
+from responses import api_response
 from datetime import datetime, timezone
 
 router = APIRouter()
@@ -13,7 +15,7 @@ async def signup(payload: SignupRequest):
     try:
         uid = create_user(payload.email, payload.password, payload.name)
         set_user_role(uid, payload.role.value)
-        set_doc("users", uid, {
+        await set_doc("users", uid, {
             "uid":        uid,
             "email":      payload.email,
             "name":       payload.name,
@@ -26,7 +28,7 @@ async def signup(payload: SignupRequest):
             "created_at": datetime.now(timezone.utc).isoformat(),
         })
         # Init gamification
-        set_doc("gamification", uid, {
+        await set_doc("gamification", uid, {
             "uid": uid, "total_points": 0, "weekly_points": 0,
             "badges": [], "level": "Beginner",
         })
@@ -37,7 +39,7 @@ async def signup(payload: SignupRequest):
 @router.get("/me", response_model=APIResponse)
 async def get_me(user: UserInfo = Depends(get_current_user)):
     """Return the current user's profile from Firestore."""
-    profile = get_doc("users", user.uid)
+    profile = await get_doc("users", user.uid)
     if not profile:
         raise HTTPException(status_code=404, detail="User profile not found")
     return APIResponse(success=True, message="OK", data=profile)
@@ -47,18 +49,25 @@ async def update_me(payload: UserUpdate, user: UserInfo = Depends(get_current_us
     """Update editable profile fields."""
     updates = {k: v for k, v in payload.dict().items() if v is not None}
     if updates:
-        update_doc("users", user.uid, updates)
+        await update_doc("users", user.uid, updates)
     return APIResponse(success=True, message="Profile updated", data=updates)
 
 @router.get("/users", response_model=APIResponse)
-async def list_users(admin: UserInfo = Depends(require_admin)):
-    """Admin: list all Firebase Auth users."""
-    users = list_all_users()
-    return APIResponse(success=True, message=f"{len(users)} users", data=users)
+async def list_users(page_size: int = 50, page_token: str = None, role: str = None,
+                     email_prefix: str = None, admin: UserInfo = Depends(require_admin)):
+    """Admin: page through Firebase Auth users by email, optionally by role / email prefix."""
+    try:
+        # First call loads the user index from Firebase Auth – keep it off the event loop
+        users, next_token, total = await run_in_threadpool(
+            list_users_page, page_size, page_token, role, email_prefix)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return api_response(message=f"{len(users)} of {total} users", data=users,
+                        next_page_token=next_token)
 
 @router.patch("/users/{uid}/role", response_model=APIResponse)
 async def set_role(uid: str, role: str = Body(..., embed=True), admin: UserInfo = Depends(require_admin)):
     """Admin: change a user's role."""
     set_user_role(uid, role)
-    update_doc("users", uid, {"role": role})
+    await update_doc("users", uid, {"role": role})
     return APIResponse(success=True, message=f"Role updated to {role}")
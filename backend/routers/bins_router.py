@@ -1,27 +1,35 @@
 """WASTE IQ – Bins Router"""
 from fastapi import APIRouter, Depends, HTTPException, Request
 from auth import get_current_user, require_municipal, require_admin, require_driver, UserInfo
-from firestore_client import get_doc, set_doc, add_doc, update_doc, query_collection
+from firestore_async import get_doc, set_doc, append_doc, update_doc, delete_doc, query_page, set_docs
+from points import award_points
 from models import BinCreate, BinUpdate, BinCollectedUpdate, APIResponse
+from responses import api_response
 from datetime import datetime, timezone
+from typing import List
 import uuid
 
 router = APIRouter()
 
 @router.get("/", response_model=APIResponse)
-async def list_bins(ward_id: str = None, user: UserInfo = Depends(get_current_user)):
+async def list_bins(ward_id: str = None, page_size: int = 500, page_token: str = None,
+                    user: UserInfo = Depends(get_current_user)):
     """List bins. Household/Driver see assigned bins; Municipal/Admin see ward or all."""
     filters = []
     if ward_id:
         filters.append(("ward_id", "==", ward_id))
     if user.role == "driver":
         filters.append(("assigned_driver", "==", user.uid))
-    bins = query_collection("bins", filters=filters if filters else None)
-    return APIResponse(success=True, message=f"{len(bins)} bins", data=bins)
+    try:
+        bins, next_token = await query_page("bins", filters=filters if filters else None,
+                                            page_size=page_size, page_token=page_token)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return api_response(message=f"{len(bins)} bins", data=bins, next_page_token=next_token)
 
 @router.get("/{bin_id}", response_model=APIResponse)
 async def get_bin(bin_id: str, user: UserInfo = Depends(get_current_user)):
-    bin_doc = get_doc("bins", bin_id)
+    bin_doc = await get_doc("bins", bin_id)
     if not bin_doc:
         raise HTTPException(status_code=404, detail="Bin not found")
     return APIResponse(success=True, message="OK", data=bin_doc)
@@ -29,28 +37,33 @@ async def get_bin(bin_id: str, user: UserInfo = Depends(get_current_user)):
 @router.post("/", response_model=APIResponse)
 async def create_bin(payload: BinCreate, user: UserInfo = Depends(require_municipal)):
     """Municipal/Admin: create a new bin."""
-    bin_id = str(uuid.uuid4())
-    doc = {
-        "bin_id":          bin_id,
-        "ward_id":         payload.ward_id,
-        "location":        payload.location.dict(),
-        "fill_level":      payload.fill_level,
-        "capacity_liters": payload.capacity_liters,
-        "status":          "active",
-        "assigned_driver": payload.assigned_driver,
-        "last_collected":  None,
-        "created_at":      datetime.now(timezone.utc).isoformat(),
-    }
-    set_doc("bins", bin_id, doc)
+    doc = _new_bin_doc(payload)
+    await set_doc("bins", doc["bin_id"], doc)
     return APIResponse(success=True, message="Bin created", data=doc)
 
+@router.post("/import", response_model=APIResponse)
+async def import_bins(payload: List[BinCreate], user: UserInfo = Depends(require_municipal)):
+    """Municipal/Admin: bulk-create bins using batched commits."""
+    if not payload:
+        raise HTTPException(status_code=400, detail="No bins to import")
+    docs = [_new_bin_doc(b) for b in payload]
+    outcome = await set_docs("bins", {d["bin_id"]: d for d in docs})
+    return APIResponse(
+        success=not outcome["failed"],
+        message=f"{outcome['written']} of {len(docs)} bins imported",
+        data={
+            "bin_ids": [i for i in outcome["ids"] if i],
+            "failed":  outcome["failed"],
+        },
+    )
+
 @router.patch("/{bin_id}", response_model=APIResponse)
 async def update_bin(bin_id: str, payload: BinUpdate, user: UserInfo = Depends(require_municipal)):
     """Municipal/Admin: update bin fields."""
     updates = {k: v for k, v in payload.dict().items() if v is not None}
     if not updates:
         raise HTTPException(status_code=400, detail="No fields to update")
-    update_doc("bins", bin_id, updates)
+    await update_doc("bins", bin_id, updates)
     return APIResponse(success=True, message="Bin updated", data=updates)
 
 @router.post("/{bin_id}/collected", response_model=APIResponse)
@@ -59,13 +72,13 @@ async def mark_collected(bin_id: str, payload: BinCollectedUpdate, user: UserInf
     if user.role not in ("driver", "admin"):
         raise HTTPException(status_code=403, detail="Only drivers can mark bins as collected")
     now = datetime.now(timezone.utc).isoformat()
-    update_doc("bins", bin_id, {
+    await update_doc("bins", bin_id, {
         "fill_level":     0.0,
         "status":         "collected",
         "last_collected": now,
         "driver_uid":     user.uid,
     })
-    add_doc("collection_logs", {
+    await append_doc("collection_logs", {
         "bin_id":       bin_id,
         "driver_uid":   user.uid,
         "collected_at": now,
@@ -73,22 +86,26 @@ async def mark_collected(bin_id: str, payload: BinCollectedUpdate, user: UserInf
     })
     # Points
     try:
-        _award_points(user.uid, 5)
+        award_points(user.uid, 5)
     except Exception:
         pass
     return APIResponse(success=True, message="Bin marked as collected", data={"bin_id": bin_id, "collected_at": now})
 
 @router.delete("/{bin_id}", response_model=APIResponse)
 async def delete_bin(bin_id: str, user: UserInfo = Depends(require_admin)):
-    from firestore_client import delete_doc
-    delete_doc("bins", bin_id)
+    await delete_doc("bins", bin_id)
     return APIResponse(success=True, message="Bin deleted")
 
-def _award_points(uid: str, points: int):
-    from firestore_client import get_doc, set_doc, increment_field
-    existing = get_doc("gamification", uid)
-    if not existing:
-        set_doc("gamification", uid, {"uid": uid, "total_points": points, "weekly_points": points, "badges": [], "level": "Beginner"})
-    else:
-        increment_field("gamification", uid, "total_points", points)
-        increment_field("gamification", uid, "weekly_points", points)
+def _new_bin_doc(payload: BinCreate) -> dict:
+    bin_id = str(uuid.uuid4())
+    return {
+        "bin_id":          bin_id,
+        "ward_id":         payload.ward_id,
+        "location":        payload.location.dict(),
+        "fill_level":      payload.fill_level,
+        "capacity_liters": payload.capacity_liters,
+        "status":          "active",
+        "assigned_driver": payload.assigned_driver,
+        "last_collected":  None,
+        "created_at":      datetime.now(timezone.utc).isoformat(),
+    }
@@ -1,12 +1,20 @@
 """WASTE IQ – Classification Router"""
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Request
-from auth import get_current_user, UserInfo
-from firestore_client import query_collection
-from models import APIResponse
+from auth import get_current_user, require_admin, UserInfo
+from fastapi.concurrency import run_in_threadpool
+from firestore_async import query_page, count_by
+from models import APIResponse, WasteCategory
+from responses import api_response
+from typing import List
 import io
+import os
 
 router = APIRouter()
 
+MAX_IMAGE_BYTES  = 10 * 1024 * 1024
+BATCH_MAX_IMAGES = int(os.getenv("CLASSIFY_BATCH_MAX", "24"))
+BATCH_MAX_BYTES  = 64 * 1024 * 1024
+
 @router.post("/", response_model=APIResponse)
 async def classify_waste(
     request: Request,
@@ -19,7 +27,7 @@ async def classify_waste(
         raise HTTPException(status_code=400, detail="File must be an image")
 
     img_bytes = await file.read()
-    if len(img_bytes) > 10 * 1024 * 1024:  # 10 MB limit
+    if len(img_bytes) > MAX_IMAGE_BYTES:  # 10 MB limit
         raise HTTPException(status_code=400, detail="Image too large (max 10MB)")
 
     classifier = request.app.state.classifier
@@ -29,10 +37,11 @@ async def classify_waste(
             detail="AI model is currently unavailable on this architecture (TensorFlow dependency pending)."
         )
 
-    from firestore_client import add_doc
     import firestore_client as fc_module
 
-    result = classifier.classify_and_save(
+    # Model inference + Gemini calls are blocking – keep them off the event loop
+    result = await run_in_threadpool(
+        classifier.classify_and_save,
         img_bytes=img_bytes,
         uid=user.uid,
         firestore_client=fc_module,
@@ -40,33 +49,85 @@ async def classify_waste(
     )
     return APIResponse(success=True, message="Classification complete", data=result)
 
+@router.post("/batch", response_model=APIResponse)
+async def classify_batch(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    user: UserInfo = Depends(get_current_user)
+):
+    """Classify up to CLASSIFY_BATCH_MAX images in one request (community drives, schools)."""
+    if len(files) > BATCH_MAX_IMAGES:
+        raise HTTPException(status_code=400, detail=f"Too many images (max {BATCH_MAX_IMAGES})")
+
+    images, total = [], 0
+    for f in files:
+        if not (f.content_type or "").startswith("image/"):
+            raise HTTPException(status_code=400, detail=f"{f.filename}: file must be an image")
+        img_bytes = await f.read()
+        if len(img_bytes) > MAX_IMAGE_BYTES:
+            raise HTTPException(status_code=400, detail=f"{f.filename}: image too large (max 10MB)")
+        total += len(img_bytes)
+        if total > BATCH_MAX_BYTES:
+            raise HTTPException(status_code=400, detail="Batch too large (max 64MB)")
+        images.append(img_bytes)
+
+    classifier = request.app.state.classifier
+    if not classifier:
+        raise HTTPException(status_code=503, detail="AI model is currently unavailable on this architecture.")
+
+    import firestore_client as fc_module
+
+    # Batched inference + one waste_logs commit, off the event loop
+    results = await run_in_threadpool(
+        classifier.classify_and_save_batch,
+        images=images,
+        uid=user.uid,
+        firestore_client=fc_module,
+    )
+    for f, r in zip(files, results):
+        r["filename"] = f.filename
+    return api_response(message=f"Classified {len(results)} images", data=results)
+
+@router.post("/gemini/reload", response_model=APIResponse)
+async def reload_gemini_key(request: Request, admin: UserInfo = Depends(require_admin)):
+    """Re-read GEMINI_API_KEY from .env now (it is otherwise picked up when the file changes)."""
+    classifier = request.app.state.classifier
+    if not classifier:
+        raise HTTPException(status_code=503, detail="AI model is currently unavailable on this architecture.")
+    return api_response(message="Gemini key reloaded", data=classifier.reload_gemini())
+
 @router.get("/history", response_model=APIResponse)
 async def classification_history(
     limit: int = 50,
+    page_size: int = None,
+    page_token: str = None,
     user: UserInfo = Depends(get_current_user)
 ):
-    """Get classification history for the current user."""
+    """Get classification history for the current user, newest first (paginated)."""
     filters = [] if user.role == "admin" else [("uid", "==", user.uid)]
-    # Fetch without order_by to avoid requiring a composite index in Firestore
-    logs = query_collection(
-        "waste_logs",
-        filters=filters if filters else None,
-    )
-    # Sort in Python (newest first) and limit
-    logs.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-    logs = logs[:limit]
-    
-    return APIResponse(success=True, message=f"{len(logs)} records", data=logs)
+    # Served by the (uid, timestamp DESC) composite index in firestore.indexes.json
+    try:
+        logs, next_token = await query_page(
+            "waste_logs",
+            filters=filters if filters else None,
+            order_by="timestamp",
+            order_desc=True,
+            page_size=page_size or limit,
+            page_token=page_token,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return api_response(message=f"{len(logs)} records", data=logs, next_page_token=next_token)
 
 @router.get("/stats", response_model=APIResponse)
 async def classification_stats(user: UserInfo = Depends(get_current_user)):
     """Return category-level stats for the current user."""
     filters = [] if user.role in ("admin", "municipal") else [("uid", "==", user.uid)]
-    logs = query_collection("waste_logs", filters=filters if filters else None)
-
-    from collections import Counter
-    categories  = Counter(l.get("waste_category", "Unknown") for l in logs)
-    total_waste = len(logs)
+    # One count aggregation per category – no waste_logs documents are downloaded
+    categories = await count_by("waste_logs", "waste_category", [c.value for c in WasteCategory],
+                                filters=filters, other="Unknown")
+    total_waste = sum(categories.values())
 
     return APIResponse(success=True, message="Stats computed", data={
         "total_classifications": total_waste,
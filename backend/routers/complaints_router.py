@@ -1,8 +1,10 @@
 """WASTE IQ – Complaints Router"""
 from fastapi import APIRouter, Depends, HTTPException
 from auth import get_current_user, require_municipal, UserInfo
-from firestore_client import get_doc, add_doc, update_doc, query_collection, increment_field, get_doc
-from models import ComplaintCreate, ComplaintResolve, APIResponse
+from firestore_async import add_doc, update_doc, query_collection, query_page, count_by
+from points import award_points
+from models import ComplaintCreate, ComplaintResolve, ComplaintStatus, APIResponse
+from responses import api_response
 from datetime import datetime, timezone
 import uuid
 
@@ -27,16 +29,17 @@ async def submit_complaint(payload: ComplaintCreate, user: UserInfo = Depends(ge
         "resolved_at":  None,
         "resolution":   None,
     }
-    add_doc("complaints", doc)
+    await add_doc("complaints", doc)
     # Award +20 points for valid complaint
     try:
-        _award_points(user.uid, 20)
+        award_points(user.uid, 20)
     except Exception:
         pass
     return APIResponse(success=True, message="Complaint submitted", data=doc)
 
 @router.get("/", response_model=APIResponse)
-async def list_complaints(ward_id: str = None, status: str = None, user: UserInfo = Depends(get_current_user)):
+async def list_complaints(ward_id: str = None, status: str = None, page_size: int = 100,
+                          page_token: str = None, user: UserInfo = Depends(get_current_user)):
     """List complaints filtered by role."""
     filters = []
     if user.role == "household":
@@ -45,20 +48,25 @@ async def list_complaints(ward_id: str = None, status: str = None, user: UserInf
         filters.append(("ward_id", "==", ward_id))
     if status:
         filters.append(("status", "==", status))
-    complaints = query_collection("complaints", filters=filters if filters else None,
-                                  order_by="created_at", order_desc=True, limit=100)
-    return APIResponse(success=True, message=f"{len(complaints)} complaints", data=complaints)
+    try:
+        complaints, next_token = await query_page("complaints", filters=filters if filters else None,
+                                                  order_by="created_at", order_desc=True,
+                                                  page_size=page_size, page_token=page_token)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return api_response(message=f"{len(complaints)} complaints", data=complaints,
+                        next_page_token=next_token)
 
 @router.patch("/{complaint_id}/resolve", response_model=APIResponse)
 async def resolve_complaint(complaint_id: str, payload: ComplaintResolve,
                             user: UserInfo = Depends(require_municipal)):
     """Municipal/Admin: resolve a complaint."""
-    complaint = query_collection("complaints", filters=[("complaint_id", "==", complaint_id)], limit=1)
+    complaint = await query_collection("complaints", filters=[("complaint_id", "==", complaint_id)], limit=1)
     if not complaint:
         raise HTTPException(status_code=404, detail="Complaint not found")
 
     now = datetime.now(timezone.utc).isoformat()
-    update_doc("complaints", complaint[0]["_id"], {
+    await update_doc("complaints", complaint[0]["_id"], {
         "status":      "resolved",
         "resolved_at": now,
         "resolution":  payload.resolution,
@@ -66,7 +74,7 @@ async def resolve_complaint(complaint_id: str, payload: ComplaintResolve,
     })
     # Award +10 points to municipal officer
     try:
-        _award_points(user.uid, 10)
+        award_points(user.uid, 10)
     except Exception:
         pass
     return APIResponse(success=True, message="Complaint resolved")
@@ -79,20 +87,12 @@ async def complaint_stats(ward_id: str = None, user: UserInfo = Depends(get_curr
         filters.append(("ward_id", "==", ward_id))
     elif user.role == "household":
         filters.append(("submitted_by", "==", user.uid))
-    complaints = query_collection("complaints", filters=filters if filters else None)
-    from collections import Counter
-    by_status = Counter(c.get("status", "open") for c in complaints)
+    # Missing or legacy statuses are reported as "other", not folded into a real status
+    by_status = await count_by("complaints", "status", [s.value for s in ComplaintStatus],
+                               filters=filters, other="other")
+    total = sum(by_status.values())
     return APIResponse(success=True, message="Stats", data={
-        "total": len(complaints),
+        "total": total,
         "by_status": dict(by_status),
-        "resolution_rate": round(by_status.get("resolved", 0) / max(len(complaints), 1) * 100, 1),
+        "resolution_rate": round(by_status.get("resolved", 0) / max(total, 1) * 100, 1),
     })
-
-def _award_points(uid: str, points: int):
-    from firestore_client import get_doc, set_doc, increment_field
-    existing = get_doc("gamification", uid)
-    if not existing:
-        set_doc("gamification", uid, {"uid": uid, "total_points": points, "weekly_points": points, "badges": [], "level": "Beginner"})
-    else:
-        increment_field("gamification", uid, "total_points", points)
-        increment_field("gamification", uid, "weekly_points", points)
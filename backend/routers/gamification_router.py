@@ -1,8 +1,9 @@
 """WASTE IQ – Gamification Router"""
 from fastapi import APIRouter, Depends, HTTPException
 from auth import get_current_user, require_admin, UserInfo
-from firestore_client import get_doc, set_doc, query_collection
+from firestore_async import get_doc, get_docs, set_doc, update_doc, query_collection
 from models import APIResponse
+from responses import api_response
 from datetime import datetime, timezone
 
 router = APIRouter()
@@ -34,13 +35,17 @@ def compute_level(total_points: int) -> str:
 @router.get("/me", response_model=APIResponse)
 async def my_gamification(user: UserInfo = Depends(get_current_user)):
     """Get current user's gamification profile."""
-    gam = get_doc("gamification", user.uid)
+    gam = await get_doc("gamification", user.uid)
     if not gam:
         gam = {"uid": user.uid, "total_points": 0, "weekly_points": 0, "badges": [], "level": "Beginner"}
-        set_doc("gamification", user.uid, gam)
+        await set_doc("gamification", user.uid, gam)
 
-    # Check and award new badges
+    # Profiles created by the points service carry only the counters and badges
     total = gam.get("total_points", 0)
+    gam.setdefault("weekly_points", 0)
+    gam.setdefault("level", compute_level(total))
+
+    # Check and award new badges
     earned_names = {b["name"] for b in gam.get("badges", [])}
     new_badges = []
     for badge in BADGE_THRESHOLDS:
@@ -51,8 +56,7 @@ async def my_gamification(user: UserInfo = Depends(get_current_user)):
     if new_badges:
         all_badges = gam.get("badges", []) + new_badges
         level = compute_level(total)
-        from firestore_client import update_doc
-        update_doc("gamification", user.uid, {"badges": all_badges, "level": level})
+        await update_doc("gamification", user.uid, {"badges": all_badges, "level": level})
         gam["badges"] = all_badges
         gam["level"]  = level
 
@@ -61,10 +65,13 @@ async def my_gamification(user: UserInfo = Depends(get_current_user)):
 @router.get("/leaderboard", response_model=APIResponse)
 async def leaderboard(limit: int = 20, user: UserInfo = Depends(get_current_user)):
     """Return top-N users by points."""
-    entries = query_collection("gamification", order_by="total_points", order_desc=True, limit=limit)
+    entries = await query_collection("gamification", order_by="total_points", order_desc=True, limit=limit,
+                                     fields=["uid", "total_points", "level", "badges"])
+    # One multi-get for all profiles instead of a read per row
+    profiles = await get_docs("users", [e.get("uid", "") for e in entries])
     result = []
     for i, e in enumerate(entries):
-        user_profile = get_doc("users", e.get("uid", "")) or {}
+        user_profile = profiles.get(e.get("uid", ""), {})
         result.append({
             "rank":         i + 1,
             "uid":          e.get("uid"),
@@ -74,7 +81,7 @@ async def leaderboard(limit: int = 20, user: UserInfo = Depends(get_current_user
             "level":        e.get("level", "Beginner"),
             "badges_count": len(e.get("badges", [])),
         })
-    return APIResponse(success=True, message=f"Top {len(result)} users", data=result)
+    return api_response(message=f"Top {len(result)} users", data=result)
 
 @router.get("/rewards", response_model=APIResponse)
 async def reward_catalog(user: UserInfo = Depends(get_current_user)):
@@ -87,7 +94,7 @@ async def reward_catalog(user: UserInfo = Depends(get_current_user)):
         {"id": "r5", "name": "Composting Kit",    "points_required": 1500, "description": "Home composting starter kit",   "icon": "♻️"},
         {"id": "r6", "name": "Recycling Award",   "points_required": 2500, "description": "Official city recycling award", "icon": "🏆"},
     ]
-    gam = get_doc("gamification", user.uid) or {"total_points": 0}
+    gam = await get_doc("gamification", user.uid) or {"total_points": 0}
     user_points = gam.get("total_points", 0)
     for item in catalog:
         item["can_redeem"] = user_points >= item["points_required"]
@@ -1,8 +1,10 @@
 """WASTE IQ – Overflow Router"""
 from fastapi import APIRouter, Depends, HTTPException, Request
 from auth import get_current_user, require_municipal, UserInfo
-from firestore_client import query_collection
+from fastapi.concurrency import run_in_threadpool
+from firestore_async import query_collection, query_page
 from models import OverflowInput, APIResponse
+from responses import api_response
 
 router = APIRouter()
 
@@ -11,7 +13,8 @@ async def predict_overflow(payload: OverflowInput, request: Request, user: UserI
     """Predict overflow probability for a single bin."""
     model = request.app.state.overflow_model
     import firestore_client as fc
-    result = model.predict_and_save(
+    result = await run_in_threadpool(
+        model.predict_and_save,
         bin_id=payload.bin_id,
         fill_level=payload.fill_level,
         hours_since_last=payload.hours_since_last,
@@ -25,29 +28,34 @@ async def predict_overflow(payload: OverflowInput, request: Request, user: UserI
 async def predict_overflow_batch(ward_id: str = None, request: Request = None, user: UserInfo = Depends(require_municipal)):
     """Municipal/Admin: run predictions for all bins in a ward (or all bins)."""
     filters = [("ward_id", "==", ward_id)] if ward_id else None
-    bins = query_collection("bins", filters=filters)
+    bins = await query_collection("bins", filters=filters)
     if not bins:
         return APIResponse(success=True, message="No bins found", data=[])
 
     model = request.app.state.overflow_model
     import firestore_client as fc
-    results = model.batch_predict(bins, fc)
-    return APIResponse(success=True, message=f"Predicted {len(results)} bins", data=results)
+    results = await run_in_threadpool(model.batch_predict, bins, fc)
+    return api_response(message=f"Predicted {len(results)} bins", data=results)
 
 @router.get("/history", response_model=APIResponse)
-async def overflow_history(bin_id: str = None, limit: int = 50, user: UserInfo = Depends(get_current_user)):
-    """Get overflow prediction history."""
+async def overflow_history(bin_id: str = None, limit: int = 50, page_size: int = None,
+                           page_token: str = None, user: UserInfo = Depends(get_current_user)):
+    """Get overflow prediction history (paginated, newest first)."""
     filters = [("bin_id", "==", bin_id)] if bin_id else None
-    preds = query_collection("overflow_predictions", filters=filters,
-                             order_by="predicted_at", order_desc=True, limit=limit)
-    return APIResponse(success=True, message=f"{len(preds)} predictions", data=preds)
+    try:
+        preds, next_token = await query_page("overflow_predictions", filters=filters,
+                                             order_by="predicted_at", order_desc=True,
+                                             page_size=page_size or limit, page_token=page_token)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return api_response(message=f"{len(preds)} predictions", data=preds, next_page_token=next_token)
 
 @router.get("/high-risk", response_model=APIResponse)
 async def high_risk_bins(user: UserInfo = Depends(require_municipal)):
     """Return bins with High risk level from latest predictions."""
-    high_risk = query_collection("overflow_predictions",
-                                  filters=[("risk_level", "==", "High")],
-                                  order_by="predicted_at", order_desc=True, limit=50)
+    high_risk = await query_collection("overflow_predictions",
+                                        filters=[("risk_level", "==", "High")],
+                                        order_by="predicted_at", order_desc=True, limit=50)
     # Deduplicate by bin_id (latest prediction per bin)
     seen = set()
     unique = []
@@ -55,4 +63,4 @@ async def high_risk_bins(user: UserInfo = Depends(require_municipal)):
         if p["bin_id"] not in seen:
             seen.add(p["bin_id"])
             unique.append(p)
-    return APIResponse(success=True, message=f"{len(unique)} high-risk bins", data=unique)
+    return api_response(message=f"{len(unique)} high-risk bins", data=unique)
@@ -2,36 +2,62 @@
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import StreamingResponse
 from auth import require_admin, require_municipal, UserInfo
-from firestore_client import query_collection
-from models import APIResponse
+from firestore_async import count_by, query_collection, stream_collection
+from models import APIResponse, BinStatus, ComplaintStatus, UserRole, WasteCategory
 from datetime import datetime, timezone
+from collections import Counter
+import asyncio
 import io, csv
 
 router = APIRouter()
 
+# Flush CSV output to the client every ~64 KB
+_CSV_CHUNK_BYTES = 64 * 1024
+
+
+# (collection, field) → (known values, bucket for missing/unexpected values)
+_GROUPS = {
+    ("waste_logs", "waste_category"): ([c.value for c in WasteCategory], "Unknown"),
+    ("bins", "status"):               ([s.value for s in BinStatus], "active"),
+    ("complaints", "status"):         ([s.value for s in ComplaintStatus], "other"),
+    ("users", "role"):                ([r.value for r in UserRole], "household"),
+}
+
+
+async def _count_by(collection: str, field: str) -> Counter:
+    """Grouped count aggregation – no documents are downloaded."""
+    values, other = _GROUPS[(collection, field)]
+    return await count_by(collection, field, values, other=other)
+
+
+async def _complaint_breakdown():
+    """
+    (status counts, per-ward totals keyed by raw ward_id). Statuses come from
+    count aggregations; both ward totals come from one query projected to
+    ward_id and status – Firestore has no GROUP BY, so that one downloads a
+    two-field copy of each complaint.
+    """
+    by_status, docs = await asyncio.gather(
+        _count_by("complaints", "status"),
+        query_collection("complaints", fields=["ward_id", "status"]),
+    )
+    by_ward = {}
+    for d in docs:
+        ward = by_ward.setdefault(d.get("ward_id", "unknown"), {"total": 0, "resolved": 0})
+        ward["total"] += 1
+        ward["resolved"] += d.get("status") == "resolved"
+    return by_status, by_ward
+
 @router.get("/city-summary", response_model=APIResponse)
 async def city_summary(user: UserInfo = Depends(require_municipal)):
     """Return city-wide waste statistics for admin view."""
-    waste_logs   = query_collection("waste_logs", limit=1000)
-    bins         = query_collection("bins")
-    complaints   = query_collection("complaints")
-    users_all    = query_collection("users")
-
-    from collections import Counter
-    categories   = Counter(l.get("waste_category", "Unknown") for l in waste_logs)
-    bin_statuses = Counter(b.get("status", "active") for b in bins)
-    complaint_st = Counter(c.get("status", "open") for c in complaints)
-    roles        = Counter(u.get("role", "household") for u in users_all)
-
-    # Ward performance
-    ward_complaints = {}
-    for c in complaints:
-        ward = c.get("ward_id", "unknown")
-        if ward not in ward_complaints:
-            ward_complaints[ward] = {"total": 0, "resolved": 0}
-        ward_complaints[ward]["total"] += 1
-        if c.get("status") == "resolved":
-            ward_complaints[ward]["resolved"] += 1
+    # Independent aggregations – run them concurrently
+    categories, bin_statuses, (complaint_st, ward_complaints), roles = await asyncio.gather(
+        _count_by("waste_logs", "waste_category"),
+        _count_by("bins", "status"),
+        _complaint_breakdown(),
+        _count_by("users", "role"),
+    )
 
     ward_ranking = sorted([
         {"ward_id": w, **stats,
@@ -40,10 +66,10 @@ async def city_summary(user: UserInfo = Depends(require_municipal)):
     ], key=lambda x: -x["resolution_rate"])
 
     return APIResponse(success=True, message="City summary", data={
-        "total_users":          len(users_all),
-        "total_bins":           len(bins),
-        "total_classifications": len(waste_logs),
-        "total_complaints":     len(complaints),
+        "total_users":          sum(roles.values()),
+        "total_bins":           sum(bin_statuses.values()),
+        "total_classifications": sum(categories.values()),
+        "total_complaints":     sum(complaint_st.values()),
         "waste_by_category":    dict(categories),
         "bins_by_status":       dict(bin_statuses),
         "complaints_by_status": dict(complaint_st),
@@ -58,20 +84,28 @@ async def export_csv(report_type: str = "waste_logs", user: UserInfo = Depends(r
     if report_type not in valid_types:
         raise HTTPException(status_code=400, detail=f"Invalid report type. Use one of: {valid_types}")
 
-    docs = query_collection(report_type, limit=5000)
-    if not docs:
+    docs  = stream_collection(report_type)
+    first = await anext(docs, None)
+    if first is None:
         raise HTTPException(status_code=404, detail="No data found")
 
-    output = io.StringIO()
-    writer = csv.DictWriter(output, fieldnames=docs[0].keys(), extrasaction="ignore")
-    writer.writeheader()
-    for doc in docs:
-        writer.writerow({k: str(v) if isinstance(v, (dict, list)) else v for k, v in doc.items()})
+    async def _rows():
+        # Header comes from the first document; rows are flushed in chunks
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=first.keys(), extrasaction="ignore")
+        writer.writeheader()
+        writer.writerow(_csv_row(first))
+        async for doc in docs:
+            writer.writerow(_csv_row(doc))
+            if output.tell() >= _CSV_CHUNK_BYTES:
+                yield output.getvalue().encode()
+                output.seek(0)
+                output.truncate()
+        yield output.getvalue().encode()
 
-    output.seek(0)
     filename = f"wasteiq_{report_type}_{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}.csv"
     return StreamingResponse(
-        io.BytesIO(output.read().encode()),
+        _rows(),
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
@@ -90,14 +124,12 @@ async def export_pdf(user: UserInfo = Depends(require_municipal)):
         raise HTTPException(status_code=500, detail="reportlab not installed")
 
     # Fetch data
-    waste_logs = query_collection("waste_logs", limit=1000)
-    bins       = query_collection("bins")
-    complaints = query_collection("complaints")
-
-    from collections import Counter
-    categories  = Counter(l.get("waste_category", "Unknown") for l in waste_logs)
-    bin_stats   = Counter(b.get("status", "active") for b in bins)
-    comp_stats  = Counter(c.get("status", "open") for c in complaints)
+    categories, bin_stats, comp_stats = await asyncio.gather(
+        _count_by("waste_logs", "waste_category"),
+        _count_by("bins", "status"),
+        _count_by("complaints", "status"),
+    )
+    total_logs = sum(categories.values())
 
     buf = io.BytesIO()
     doc = SimpleDocTemplate(buf, pagesize=A4, topMargin=0.75*inch, bottomMargin=0.75*inch)
@@ -113,9 +145,9 @@ async def export_pdf(user: UserInfo = Depends(require_municipal)):
     # Summary table
     summary_data = [
         ["Metric", "Value"],
-        ["Total Classifications", str(len(waste_logs))],
-        ["Total Bins Monitored", str(len(bins))],
-        ["Total Complaints",     str(len(complaints))],
+        ["Total Classifications", str(total_logs)],
+        ["Total Bins Monitored", str(sum(bin_stats.values()))],
+        ["Total Complaints",     str(sum(comp_stats.values()))],
         ["Overflow Bins",        str(bin_stats.get("overflow", 0))],
         ["Open Complaints",      str(comp_stats.get("open", 0))],
         ["Resolved Complaints",  str(comp_stats.get("resolved", 0))],
@@ -137,7 +169,7 @@ async def export_pdf(user: UserInfo = Depends(require_municipal)):
     # Waste categories breakdown
     elements.append(Paragraph("Waste by Category", styles["Heading2"]))
     cat_data = [["Category", "Count", "Percentage"]] + [
-        [cat, str(count), f"{round(count/max(len(waste_logs),1)*100,1)}%"]
+        [cat, str(count), f"{round(count/max(total_logs,1)*100,1)}%"]
         for cat, count in sorted(categories.items(), key=lambda x: -x[1])
     ]
     ct = Table(cat_data, colWidths=[2.5*inch, 1.5*inch, 1.5*inch])
@@ -156,3 +188,6 @@ async def export_pdf(user: UserInfo = Depends(require_municipal)):
     filename = f"wasteiq_report_{datetime.now(timezone.utc).strftime('%Y%m%d')}.pdf"
     return StreamingResponse(buf, media_type="application/pdf",
                              headers={"Content-Disposition": f"attachment; filename={filename}"})
+
+def _csv_row(doc: dict) -> dict:
+    return {k: str(v) if isinstance(v, (dict, list)) else v for k, v in doc.items()}
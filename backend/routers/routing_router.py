@@ -1,5 +1,6 @@
 """WASTE IQ – Routing Router (Driver Routes)"""
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from auth import get_current_user, require_driver, require_municipal, UserInfo
 from routing import RoutingService
 import firestore_client as fc
@@ -22,14 +23,14 @@ async def optimize_route(
 
     svc   = _get_routing()
     depot = {"lat": lat, "lng": lng} if lat and lng else None
-    route = svc.optimize_route(driver_uid=user.uid, depot=depot)
+    route = await run_in_threadpool(svc.optimize_route, driver_uid=user.uid, depot=depot)
     return APIResponse(success=True, message="Route optimized", data=route)
 
 @router.get("/optimize/{driver_uid}", response_model=APIResponse)
 async def optimize_route_for_driver(driver_uid: str, user: UserInfo = Depends(require_municipal)):
     """Municipal/Admin: optimize route for a specific driver."""
     svc   = _get_routing()
-    route = svc.optimize_route(driver_uid=driver_uid)
+    route = await run_in_threadpool(svc.optimize_route, driver_uid=driver_uid)
     return APIResponse(success=True, message="Route optimized", data=route)
 
 @router.post("/collect/{bin_id}", response_model=APIResponse)
@@ -39,8 +40,8 @@ async def collect_bin(bin_id: str, notes: str = "", user: UserInfo = Depends(get
         raise HTTPException(status_code=403, detail="Only drivers can collect bins")
 
     svc       = _get_routing()
-    collect   = svc.mark_collected(bin_id=bin_id, driver_uid=user.uid, notes=notes)
-    new_route = svc.optimize_route(driver_uid=user.uid)
+    collect   = await run_in_threadpool(svc.mark_collected, bin_id=bin_id, driver_uid=user.uid, notes=notes)
+    new_route = await run_in_threadpool(svc.optimize_route, driver_uid=user.uid)
     return APIResponse(success=True, message="Bin collected, route updated", data={
         "collection":  collect,
         "updated_route": new_route,
@@ -52,5 +53,5 @@ async def driver_stats(user: UserInfo = Depends(get_current_user)):
     if user.role not in ("driver", "admin"):
         raise HTTPException(status_code=403, detail="Only drivers can view stats")
     svc   = _get_routing()
-    stats = svc.get_driver_stats(driver_uid=user.uid)
+    stats = await run_in_threadpool(svc.get_driver_stats, driver_uid=user.uid)
     return APIResponse(success=True, message="Stats", data=stats)
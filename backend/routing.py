@@ -13,6 +13,8 @@ from typing import List, Dict, Optional, Tuple
 import requests
 from dotenv import load_dotenv
 
+from points import award_points
+
 load_dotenv(Path(__file__).parent.parent / ".env")
 ORS_API_KEY  = os.getenv("ORS_API_KEY", "")
 ORS_BASE_URL = "https://api.openrouteservice.org/v2"
@@ -238,7 +240,7 @@ class RoutingService:
         self.fc.update_doc("bins", bin_id, update)
 
         # Log collection event
-        self.fc.add_doc("collection_logs", {
+        self.fc.append_doc("collection_logs", {
             "bin_id":     bin_id,
             "driver_uid": driver_uid,
             "collected_at": now_iso,
@@ -247,7 +249,7 @@ class RoutingService:
 
         # Award points (+5 per collection)
         try:
-            _award_driver_points(driver_uid, 5, self.fc)
+            award_points(driver_uid, 5)
         except Exception:
             pass
 
@@ -279,18 +281,3 @@ class RoutingService:
             "total_collections": len(logs),
             "total_points":      points,
         }
-
-
-def _award_driver_points(uid: str, points: int, fc) -> None:
-    existing = fc.get_doc("gamification", uid)
-    if not existing:
-        fc.set_doc("gamification", uid, {
-            "uid":          uid,
-            "total_points": points,
-            "weekly_points": points,
-            "badges":       [],
-            "level":        "Beginner",
-        })
-    else:
-        fc.increment_field("gamification", uid, "total_points", points)
-        fc.increment_field("gamification", uid, "weekly_points", points)
@@ -0,0 +1,973 @@
+"""
+WASTE IQ – Storage Backends
+Pluggable document stores behind the firestore_client helpers.
+
+  • FirestoreBackend – production (Firebase Admin SDK)
+  • MemoryBackend    – in-process dicts, for load tests and benchmarks
+  • SQLiteBackend    – single-file store for small ward deployments
+
+Local backends implement the subset of Firestore semantics the routers use:
+==, !=, <, <=, >, >=, in, not-in, array_contains filters, order_by and limit,
+field projection, count/sum/avg aggregations, Increment, ArrayUnion and
+SERVER_TIMESTAMP sentinels, dotted field paths in updates.
+"""
+
+import asyncio
+import copy
+import json
+import os
+import secrets
+import sqlite3
+import string
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:  # imported as a top-level module from backend/ (uvicorn main:app)
+    from firebase_app import get_app
+except ImportError:  # imported as backend.storage_backends (Streamlit pages)
+    from backend.firebase_app import get_app
+
+
+class DocumentNotFoundError(LookupError):
+    """Raised by local backends when updating a document that does not exist."""
+
+
+# Write kinds accepted by StorageBackend.commit_batch
+WRITE_KINDS = ("set", "set_merge", "update", "delete")
+
+# Aggregations accepted by StorageBackend.aggregate
+AGGREGATE_KINDS = ("count", "sum", "avg")
+
+
+# ─────────────────────────────────────────────────────────────
+# Backend interface
+# ─────────────────────────────────────────────────────────────
+
+class StorageBackend:
+    """Document store interface mirrored by every backend."""
+
+    name = "base"
+
+    def get_doc(self, collection: str, doc_id: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def get_docs(self, collection: str, doc_ids: List[str]) -> Dict[str, Dict]:
+        """Multi-get: {doc_id: doc} for the ids that exist."""
+        docs = {}
+        for doc_id in doc_ids:
+            doc = self.get_doc(collection, doc_id)
+            if doc is not None:
+                docs[doc_id] = doc
+        return docs
+
+    def set_doc(self, collection: str, doc_id: str, data: Dict, merge: bool = False) -> str:
+        raise NotImplementedError
+
+    def add_doc(self, collection: str, data: Dict) -> str:
+        raise NotImplementedError
+
+    def update_doc(self, collection: str, doc_id: str, data: Dict) -> None:
+        raise NotImplementedError
+
+    def delete_doc(self, collection: str, doc_id: str) -> None:
+        raise NotImplementedError
+
+    def query(
+        self,
+        collection: str,
+        filters: Optional[List[tuple]] = None,
+        order_by: Optional[str] = None,
+        order_desc: bool = False,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> List[Dict]:
+        """fields: optional projection – only these (dotted) paths plus _id are returned."""
+        raise NotImplementedError
+
+    def query_page(
+        self,
+        collection: str,
+        filters: Optional[List[tuple]] = None,
+        order_by: Optional[str] = None,
+        order_desc: bool = False,
+        page_size: int = 100,
+        cursor: Optional[Tuple[Any, str]] = None,
+        fields: Optional[List[str]] = None,
+    ) -> List[Dict]:
+        """
+        One page of a query in (order_by, doc id) order.
+        cursor: (order_by value, doc id) of the last document of the previous
+        page – the page starts strictly after it. Value is ignored when the
+        query has no order_by.
+        """
+        raise NotImplementedError
+
+    def aggregate(
+        self,
+        collection: str,
+        kind: str,
+        field: Optional[str] = None,
+        filters: Optional[List[tuple]] = None,
+    ) -> Any:
+        """
+        Server-side count/sum/avg over matching documents (kind in
+        AGGREGATE_KINDS). Like Firestore, sum/avg only consider numeric
+        values of `field`; avg is None when there are none.
+        """
+        raise NotImplementedError
+
+    def watch(self, collection: str, on_change: Callable[[List[Tuple[str, Optional[Dict]]]], None]
+              ) -> Optional[Callable[[], None]]:
+        """
+        Push change events for `collection`: on_change([(doc_id, doc or None
+        if deleted), ...]) is called with every document first, then with each
+        batch of changes. Returns an unsubscribe callable, or None when the
+        backend cannot push (callers fall back to polling).
+        """
+        return None
+
+    def increment(self, amount: int = 1) -> Any:
+        """Return a sentinel that atomically adds `amount` when written."""
+        raise NotImplementedError
+
+    def server_timestamp(self) -> Any:
+        """Return a sentinel replaced by the commit time when written."""
+        raise NotImplementedError
+
+    def array_union(self, values: List[Any]) -> Any:
+        """Return a sentinel that adds missing `values` to an array field (creating it)."""
+        raise NotImplementedError
+
+    def increment_field(self, collection: str, doc_id: str, field: str, amount: int = 1) -> None:
+        self.update_doc(collection, doc_id, {field: self.increment(amount)})
+
+    def new_doc_id(self, collection: str) -> str:
+        """Allocate an auto-id without writing (used by batched adds)."""
+        raise NotImplementedError
+
+    def commit_batch(self, ops: List[tuple]) -> None:
+        """
+        Apply write ops atomically (all or nothing).
+        ops: (kind, collection, doc_id, data) with kind in WRITE_KINDS.
+        """
+        raise NotImplementedError
+
+    # ── Async API ─────────────────────────────────────────────
+    # Default: run the blocking implementation in a worker thread so the
+    # event loop stays free. Backends with a native async client override.
+
+    async def _call(self, fn, *args, **kwargs):
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
+    async def aget_doc(self, collection: str, doc_id: str) -> Optional[Dict]:
+        return await self._call(self.get_doc, collection, doc_id)
+
+    async def aget_docs(self, collection: str, doc_ids: List[str]) -> Dict[str, Dict]:
+        return await self._call(self.get_docs, collection, doc_ids)
+
+    async def aset_doc(self, collection: str, doc_id: str, data: Dict, merge: bool = False) -> str:
+        return await self._call(self.set_doc, collection, doc_id, data, merge=merge)
+
+    async def aadd_doc(self, collection: str, data: Dict) -> str:
+        return await self._call(self.add_doc, collection, data)
+
+    async def aupdate_doc(self, collection: str, doc_id: str, data: Dict) -> None:
+        await self._call(self.update_doc, collection, doc_id, data)
+
+    async def adelete_doc(self, collection: str, doc_id: str) -> None:
+        await self._call(self.delete_doc, collection, doc_id)
+
+    async def aquery(self, collection, filters=None, order_by=None, order_desc=False, limit=None,
+                     fields=None):
+        return await self._call(self.query, collection, filters=filters, order_by=order_by,
+                                order_desc=order_desc, limit=limit, fields=fields)
+
+    async def aquery_page(self, collection, filters=None, order_by=None, order_desc=False,
+                          page_size=100, cursor=None, fields=None):
+        return await self._call(self.query_page, collection, filters=filters, order_by=order_by,
+                                order_desc=order_desc, page_size=page_size, cursor=cursor,
+                                fields=fields)
+
+    async def aaggregate(self, collection, kind, field=None, filters=None):
+        return await self._call(self.aggregate, collection, kind, field=field, filters=filters)
+
+    async def aincrement_field(self, collection: str, doc_id: str, field: str, amount: int = 1) -> None:
+        await self.aupdate_doc(collection, doc_id, {field: self.increment(amount)})
+
+    async def acommit_batch(self, ops: List[tuple]) -> None:
+        await self._call(self.commit_batch, ops)
+
+    def _apply_op(self, kind: str, collection: str, doc_id: str, data: Optional[Dict]) -> None:
+        if kind == "set":
+            self.set_doc(collection, doc_id, data)
+        elif kind == "set_merge":
+            self.set_doc(collection, doc_id, data, merge=True)
+        elif kind == "update":
+            self.update_doc(collection, doc_id, data)
+        elif kind == "delete":
+            self.delete_doc(collection, doc_id)
+        else:
+            raise ValueError(f"Unsupported write kind: {kind}")
+
+
+# ─────────────────────────────────────────────────────────────
+# Firestore
+# ─────────────────────────────────────────────────────────────
+
+class FirestoreBackend(StorageBackend):
+    name = "firestore"
+
+    def __init__(self):
+        # Nothing is imported or initialised until the first call that needs
+        # Firestore – see firebase_app.get_app()
+        self._lock = threading.Lock()
+        self._db = None
+        self._adb = None
+
+    @property
+    def _firestore(self):
+        from firebase_admin import firestore
+        return firestore
+
+    @property
+    def _field_filter(self):
+        from google.cloud.firestore_v1.base_query import FieldFilter
+        return FieldFilter
+
+    @property
+    def db(self):
+        """Sync client, created on first use."""
+        if self._db is None:
+            with self._lock:
+                if self._db is None:
+                    self._db = self._firestore.client(get_app())
+        return self._db
+
+    @property
+    def adb(self):
+        """AsyncClient, created on first async use (binds to the running loop)."""
+        if self._adb is None:
+            with self._lock:
+                if self._adb is None:
+                    from firebase_admin import firestore_async
+                    self._adb = firestore_async.client(get_app())
+        return self._adb
+
+    def _build_query(self, root, collection, filters, order_by, order_desc, limit, fields=None):
+        ref = root.collection(collection)
+
+        if fields:
+            ref = ref.select(list(fields))
+
+        if filters:
+            for field, op, value in filters:
+                ref = ref.where(filter=self._field_filter(field, op, value))
+
+        if order_by:
+            direction = (self._firestore.Query.DESCENDING if order_desc
+                         else self._firestore.Query.ASCENDING)
+            ref = ref.order_by(order_by, direction=direction)
+
+        if limit:
+            ref = ref.limit(limit)
+        return ref
+
+    @staticmethod
+    def _snap_to_dict(snap) -> Dict:
+        d = snap.to_dict()
+        d["_id"] = snap.id
+        return d
+
+    def get_doc(self, collection: str, doc_id: str) -> Optional[Dict]:
+        snap = self.db.collection(collection).document(doc_id).get()
+        return self._snap_to_dict(snap) if snap.exists else None
+
+    def get_docs(self, collection: str, doc_ids: List[str]) -> Dict[str, Dict]:
+        # One BatchGetDocuments round trip instead of len(doc_ids) reads
+        refs = [self.db.collection(collection).document(i) for i in doc_ids]
+        return {snap.id: self._snap_to_dict(snap) for snap in self.db.get_all(refs) if snap.exists}
+
+    def set_doc(self, collection: str, doc_id: str, data: Dict, merge: bool = False) -> str:
+        self.db.collection(collection).document(doc_id).set(data, merge=merge)
+        return doc_id
+
+    def add_doc(self, collection: str, data: Dict) -> str:
+        ref = self.db.collection(collection).add(data)
+        return ref[1].id
+
+    def update_doc(self, collection: str, doc_id: str, data: Dict) -> None:
+        self.db.collection(collection).document(doc_id).update(data)
+
+    def delete_doc(self, collection: str, doc_id: str) -> None:
+        self.db.collection(collection).document(doc_id).delete()
+
+    def query(self, collection, filters=None, order_by=None, order_desc=False, limit=None,
+              fields=None):
+        ref = self._build_query(self.db, collection, filters, order_by, order_desc, limit, fields)
+        return [self._snap_to_dict(snap) for snap in ref.stream()]
+
+    def _build_page_query(self, root, collection, filters, order_by, order_desc, page_size,
+                          cursor, fields=None):
+        ref = self._build_query(root, collection, filters, order_by, order_desc, None, fields)
+        # Explicit document-id tiebreak so the cursor is unique
+        direction = (self._firestore.Query.DESCENDING if order_desc
+                     else self._firestore.Query.ASCENDING)
+        ref = ref.order_by("__name__", direction=direction)
+        if cursor is not None:
+            value, doc_id = cursor
+            ref = ref.start_after([value, doc_id] if order_by else [doc_id])
+        return ref.limit(page_size)
+
+    def query_page(self, collection, filters=None, order_by=None, order_desc=False,
+                   page_size=100, cursor=None, fields=None):
+        ref = self._build_page_query(self.db, collection, filters, order_by, order_desc,
+                                     page_size, cursor, fields)
+        return [self._snap_to_dict(snap) for snap in ref.stream()]
+
+    def _build_aggregation(self, root, collection, kind, field, filters):
+        ref = self._build_query(root, collection, filters, None, False, None)
+        if kind == "count":
+            return ref.count(alias="value")
+        return getattr(ref, kind)(field, alias="value")
+
+    def aggregate(self, collection, kind, field=None, filters=None):
+        result = self._build_aggregation(self.db, collection, kind, field, filters).get()
+        return result[0][0].value
+
+    def watch(self, collection, on_change):
+        # on_snapshot delivers the full collection as ADDED on its first callback
+        def callback(_snapshots, changes, _read_time):
+            on_change([(c.document.id, None if c.type.name == "REMOVED" else c.document.to_dict())
+                       for c in changes])
+        return self.db.collection(collection).on_snapshot(callback).unsubscribe
+
+    def increment(self, amount: int = 1) -> Any:
+        return self._firestore.Increment(amount)
+
+    def server_timestamp(self) -> Any:
+        return self._firestore.SERVER_TIMESTAMP
+
+    def array_union(self, values: List[Any]) -> Any:
+        return self._firestore.ArrayUnion(list(values))
+
+    def new_doc_id(self, collection: str) -> str:
+        return self.db.collection(collection).document().id
+
+    def commit_batch(self, ops: List[tuple]) -> None:
+        self._fill_batch(self.db, ops).commit()
+
+    def _fill_batch(self, root, ops: List[tuple]):
+        batch = root.batch()
+        for kind, collection, doc_id, data in ops:
+            ref = root.collection(collection).document(doc_id)
+            if kind == "set":
+                batch.set(ref, data)
+            elif kind == "set_merge":
+                batch.set(ref, data, merge=True)
+            elif kind == "update":
+                batch.update(ref, data)
+            elif kind == "delete":
+                batch.delete(ref)
+            else:
+                raise ValueError(f"Unsupported write kind: {kind}")
+        return batch
+
+    # ── Native async (AsyncClient) ────────────────────────────
+
+    async def aget_doc(self, collection, doc_id):
+        snap = await self.adb.collection(collection).document(doc_id).get()
+        return self._snap_to_dict(snap) if snap.exists else None
+
+    async def aget_docs(self, collection, doc_ids):
+        refs = [self.adb.collection(collection).document(i) for i in doc_ids]
+        return {snap.id: self._snap_to_dict(snap) async for snap in self.adb.get_all(refs)
+                if snap.exists}
+
+    async def aset_doc(self, collection, doc_id, data, merge=False):
+        await self.adb.collection(collection).document(doc_id).set(data, merge=merge)
+        return doc_id
+
+    async def aadd_doc(self, collection, data):
+        _, ref = await self.adb.collection(collection).add(data)
+        return ref.id
+
+    async def aupdate_doc(self, collection, doc_id, data):
+        await self.adb.collection(collection).document(doc_id).update(data)
+
+    async def adelete_doc(self, collection, doc_id):
+        await self.adb.collection(collection).document(doc_id).delete()
+
+    async def aquery(self, collection, filters=None, order_by=None, order_desc=False, limit=None,
+                     fields=None):
+        ref = self._build_query(self.adb, collection, filters, order_by, order_desc, limit, fields)
+        return [self._snap_to_dict(snap) async for snap in ref.stream()]
+
+    async def aquery_page(self, collection, filters=None, order_by=None, order_desc=False,
+                          page_size=100, cursor=None, fields=None):
+        ref = self._build_page_query(self.adb, collection, filters, order_by, order_desc,
+                                     page_size, cursor, fields)
+        return [self._snap_to_dict(snap) async for snap in ref.stream()]
+
+    async def aaggregate(self, collection, kind, field=None, filters=None):
+        result = await self._build_aggregation(self.adb, collection, kind, field, filters).get()
+        return result[0][0].value
+
+    async def acommit_batch(self, ops):
+        await self._fill_batch(self.adb, ops).commit()
+
+
+# ─────────────────────────────────────────────────────────────
+# Local-backend helpers (shared by Memory and SQLite)
+# ─────────────────────────────────────────────────────────────
+
+class _Increment:
+    __slots__ = ("amount",)
+
+    def __init__(self, amount):
+        self.amount = amount
+
+    def __repr__(self):
+        return f"<Increment {self.amount}>"
+
+
+class _ArrayUnion:
+    __slots__ = ("values",)
+
+    def __init__(self, values):
+        self.values = list(values)
+
+    def __repr__(self):
+        return f"<ArrayUnion {self.values}>"
+
+
+class _ServerTimestamp:
+    def __repr__(self):
+        return "<SERVER_TIMESTAMP>"
+
+
+_SERVER_TIMESTAMP = _ServerTimestamp()
+_MISSING = object()
+_ID_ALPHABET = string.ascii_letters + string.digits
+
+
+def _new_id() -> str:
+    """20-char alphanumeric id, same shape as Firestore auto-ids."""
+    return "".join(secrets.choice(_ID_ALPHABET) for _ in range(20))
+
+
+def field_value(doc: Dict, path: str) -> Any:
+    """Value at a dotted field path, or None when absent."""
+    value = _get_path(doc, path)
+    return None if value is _MISSING else value
+
+
+def _get_path(doc: Dict, path: str) -> Any:
+    cur: Any = doc
+    for part in path.split("."):
+        if not isinstance(cur, dict) or part not in cur:
+            return _MISSING
+        cur = cur[part]
+    return cur
+
+
+def _set_path(doc: Dict, path: str, value: Any) -> None:
+    parts = path.split(".")
+    cur = doc
+    for part in parts[:-1]:
+        nxt = cur.get(part)
+        if not isinstance(nxt, dict):
+            nxt = {}
+            cur[part] = nxt
+        cur = nxt
+    cur[parts[-1]] = value
+
+
+def _resolve(value: Any, current: Any) -> Any:
+    """Resolve write sentinels against the value currently stored."""
+    if isinstance(value, _Increment):
+        base = current if isinstance(current, (int, float)) and not isinstance(current, bool) else 0
+        return base + value.amount
+    if value is _SERVER_TIMESTAMP:
+        return datetime.now(timezone.utc).isoformat()
+    if isinstance(value, _ArrayUnion):
+        base = list(current) if isinstance(current, list) else []
+        return base + [v for v in value.values if v not in base]
+    if isinstance(value, dict):
+        cur = current if isinstance(current, dict) else {}
+        return {k: _resolve(v, cur.get(k, _MISSING)) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_resolve(v, _MISSING) for v in value]
+    return value
+
+
+def _apply_update(existing: Dict, data: Dict) -> Dict:
+    """update() semantics: dotted keys address nested fields."""
+    doc = copy.deepcopy(existing)
+    for key, value in data.items():
+        _set_path(doc, key, _resolve(value, _get_path(doc, key)))
+    return doc
+
+
+def _apply_merge(existing: Dict, data: Dict) -> Dict:
+    """set(merge=True) semantics: nested maps are merged recursively."""
+    doc = copy.deepcopy(existing)
+    for key, value in data.items():
+        current = doc.get(key, _MISSING)
+        if isinstance(value, dict) and isinstance(current, dict):
+            doc[key] = _apply_merge(current, value)
+        else:
+            doc[key] = _resolve(value, current)
+    return doc
+
+
+def _type_rank(value: Any) -> int:
+    # Firestore orders mixed types: null < bool < number < string < others
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, str):
+        return 3
+    return 4
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    rank = _type_rank(value)
+    if rank == 4:
+        return rank, json.dumps(value, sort_keys=True, default=str)
+    return rank, value
+
+
+def _compare(a: Any, op: str, b: Any) -> bool:
+    if op == "==":
+        return a == b and _type_rank(a) == _type_rank(b)
+    if op == "!=":
+        return a is not None and not (a == b and _type_rank(a) == _type_rank(b))
+    if op == "in":
+        return any(a == v and _type_rank(a) == _type_rank(v) for v in b)
+    if op == "not-in":
+        return a is not None and not any(a == v and _type_rank(a) == _type_rank(v) for v in b)
+    if op == "array_contains":
+        return isinstance(a, list) and b in a
+    if op == "array_contains_any":
+        return isinstance(a, list) and any(v in a for v in b)
+    if op in ("<", "<=", ">", ">="):
+        # Range filters only match values of the same type, as in Firestore
+        if _type_rank(a) != _type_rank(b) or _type_rank(a) in (0, 4):
+            return False
+        if op == "<":
+            return a < b
+        if op == "<=":
+            return a <= b
+        if op == ">":
+            return a > b
+        return a >= b
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+
+def _matches(doc: Dict, filters: Optional[List[tuple]]) -> bool:
+    for field, op, value in filters or []:
+        current = _get_path(doc, field)
+        if current is _MISSING or not _compare(current, op, value):
+            return False
+    return True
+
+
+def _order_and_limit(docs: List[Dict], order_by: Optional[str], order_desc: bool,
+                     limit: Optional[int]) -> List[Dict]:
+    if order_by:
+        # Firestore drops documents that do not have the order_by field
+        docs = [d for d in docs if _get_path(d, order_by) is not _MISSING]
+        docs.sort(key=lambda d: _sort_key(_get_path(d, order_by)), reverse=order_desc)
+    if limit:
+        docs = docs[:limit]
+    return docs
+
+
+def _page(docs: List[Dict], order_by: Optional[str], order_desc: bool,
+          page_size: int, cursor: Optional[Tuple[Any, str]]) -> List[Dict]:
+    """Sort by (order_by, _id) and return the page after `cursor`."""
+    if order_by:
+        docs = [d for d in docs if _get_path(d, order_by) is not _MISSING]
+        key = lambda d: (_sort_key(_get_path(d, order_by)), d["_id"])
+        after = (_sort_key(cursor[0]), cursor[1]) if cursor else None
+    else:
+        key = lambda d: d["_id"]
+        after = cursor[1] if cursor else None
+    docs.sort(key=key, reverse=order_desc)
+    if after is not None:
+        docs = [d for d in docs if (key(d) < after if order_desc else key(d) > after)]
+    return docs[:page_size]
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _aggregate(docs: List[Dict], kind: str, field: Optional[str]) -> Any:
+    if kind == "count":
+        return len(docs)
+    values = [v for v in (_get_path(d, field) for d in docs) if _is_number(v)]
+    if kind == "sum":
+        return sum(values)
+    return sum(values) / len(values) if values else None
+
+
+def _materialize(doc: Dict, fields: Optional[List[str]], copy_values: bool = True) -> Dict:
+    """Caller-owned result: projected to `fields` (plus _id) or a full copy."""
+    if not fields:
+        return copy.deepcopy(doc) if copy_values else doc
+    out = {"_id": doc["_id"]}
+    for path in fields:
+        value = _get_path(doc, path)
+        if value is not _MISSING:
+            _set_path(out, path, copy.deepcopy(value) if copy_values else value)
+    return out
+
+
+class _LocalBackend(StorageBackend):
+    # Results of _candidates() share nested values with the store when True
+    _shares_storage = True
+
+    def _candidates(self, collection: str, filters: Optional[List[tuple]]) -> List[Dict]:
+        """Matching documents as shallow dicts with _id set (not yet copied)."""
+        raise NotImplementedError
+
+    def query(self, collection, filters=None, order_by=None, order_desc=False, limit=None,
+              fields=None):
+        docs = _order_and_limit(self._candidates(collection, filters), order_by, order_desc, limit)
+        return [_materialize(d, fields, self._shares_storage) for d in docs]
+
+    def query_page(self, collection, filters=None, order_by=None, order_desc=False,
+                   page_size=100, cursor=None, fields=None):
+        docs = _page(self._candidates(collection, filters), order_by, order_desc, page_size, cursor)
+        return [_materialize(d, fields, self._shares_storage) for d in docs]
+
+    def aggregate(self, collection, kind, field=None, filters=None):
+        return _aggregate(self._candidates(collection, filters), kind, field)
+
+    def increment(self, amount: int = 1) -> Any:
+        return _Increment(amount)
+
+    def server_timestamp(self) -> Any:
+        return _SERVER_TIMESTAMP
+
+    def array_union(self, values: List[Any]) -> Any:
+        return _ArrayUnion(values)
+
+    def new_doc_id(self, collection: str) -> str:
+        return _new_id()
+
+
+# ─────────────────────────────────────────────────────────────
+# In-memory
+# ─────────────────────────────────────────────────────────────
+
+class MemoryBackend(_LocalBackend):
+    """Process-local store; contents are lost on restart."""
+
+    name = "memory"
+
+    def __init__(self):
+        self._data: Dict[str, Dict[str, Dict]] = {}
+        self._lock = threading.RLock()
+
+    async def _call(self, fn, *args, **kwargs):
+        # No I/O to wait on; a thread hop would only add latency
+        return fn(*args, **kwargs)
+
+    def _coll(self, collection: str) -> Dict[str, Dict]:
+        return self._data.setdefault(collection, {})
+
+    def get_doc(self, collection, doc_id):
+        with self._lock:
+            doc = self._coll(collection).get(doc_id)
+            if doc is None:
+                return None
+            data = copy.deepcopy(doc)
+        data["_id"] = doc_id
+        return data
+
+    def get_docs(self, collection, doc_ids):
+        with self._lock:
+            coll = self._coll(collection)
+            found = {i: coll[i] for i in doc_ids if i in coll}
+        return {i: dict(copy.deepcopy(doc), _id=i) for i, doc in found.items()}
+
+    def set_doc(self, collection, doc_id, data, merge=False):
+        with self._lock:
+            coll = self._coll(collection)
+            existing = coll.get(doc_id, {}) if merge else {}
+            coll[doc_id] = _apply_merge(existing, data)
+        return doc_id
+
+    def add_doc(self, collection, data):
+        doc_id = _new_id()
+        self.set_doc(collection, doc_id, data)
+        return doc_id
+
+    def update_doc(self, collection, doc_id, data):
+        with self._lock:
+            coll = self._coll(collection)
+            if doc_id not in coll:
+                raise DocumentNotFoundError(f"{collection}/{doc_id}")
+            coll[doc_id] = _apply_update(coll[doc_id], data)
+
+    def delete_doc(self, collection, doc_id):
+        with self._lock:
+            self._coll(collection).pop(doc_id, None)
+
+    def commit_batch(self, ops):
+        with self._lock:
+            # Snapshot every touched document so a failed op rolls the batch back
+            saved = {(c, d): self._coll(c).get(d) for _, c, d, _ in ops}
+            try:
+                for kind, collection, doc_id, data in ops:
+                    self._apply_op(kind, collection, doc_id, data)
+            except Exception:
+                for (c, d), doc in saved.items():
+                    if doc is None:
+                        self._coll(c).pop(d, None)
+                    else:
+                        self._coll(c)[d] = doc
+                raise
+
+    def _candidates(self, collection, filters):
+        # Stored dicts are replaced on write, never mutated, so references
+        # taken under the lock stay consistent; only returned docs are copied.
+        with self._lock:
+            return [dict(doc, _id=doc_id) for doc_id, doc in self._coll(collection).items()
+                    if _matches(doc, filters)]
+
+
+# ─────────────────────────────────────────────────────────────
+# SQLite
+# ─────────────────────────────────────────────────────────────
+
+# Operators that translate directly to SQL on scalar values
+_SQL_OPS = {"==": "=", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+
+
+def _json_path(field: str) -> str:
+    return "$" + "".join(f'."{part}"' for part in field.split("."))
+
+
+def _is_scalar(value: Any) -> bool:
+    # bools are left to Python: json_extract() returns them as 0/1
+    return isinstance(value, (str, int, float)) and not isinstance(value, bool)
+
+
+class SQLiteBackend(_LocalBackend):
+    """
+    Single-table document store: one JSON blob per (collection, doc_id).
+    Scalar ==/in/range filters, order_by and limit are pushed down to SQL via
+    json_extract(); anything else is evaluated in Python after the fetch.
+    Values that are not JSON-native (e.g. datetime) are stored as strings.
+    """
+
+    name = "sqlite"
+    _shares_storage = False   # rows are decoded fresh for every query
+
+    def __init__(self, path: str = "wasteiq.db"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " collection TEXT NOT NULL,"
+            " doc_id     TEXT NOT NULL,"
+            " data       TEXT NOT NULL,"
+            " PRIMARY KEY (collection, doc_id))"
+        )
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _dumps(doc: Dict) -> str:
+        return json.dumps(doc, default=str, separators=(",", ":"))
+
+    def _load(self, collection: str, doc_id: str) -> Optional[Dict]:
+        row = self._conn.execute(
+            "SELECT data FROM documents WHERE collection = ? AND doc_id = ?",
+            (collection, doc_id),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _store(self, collection: str, doc_id: str, doc: Dict) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO documents (collection, doc_id, data) VALUES (?, ?, ?)",
+            (collection, doc_id, self._dumps(doc)),
+        )
+
+    def get_doc(self, collection, doc_id):
+        with self._lock:
+            doc = self._load(collection, doc_id)
+        if doc is None:
+            return None
+        doc["_id"] = doc_id
+        return doc
+
+    def get_docs(self, collection, doc_ids):
+        docs = {}
+        ids = list(doc_ids)
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            sql = (f"SELECT doc_id, data FROM documents WHERE collection = ? "
+                   f"AND doc_id IN ({', '.join('?' * len(chunk))})")
+            docs.update((d["_id"], d) for d in self._fetch(sql, [collection, *chunk]))
+        return docs
+
+    def set_doc(self, collection, doc_id, data, merge=False):
+        with self._lock:
+            existing = (self._load(collection, doc_id) or {}) if merge else {}
+            self._store(collection, doc_id, _apply_merge(existing, data))
+        return doc_id
+
+    def add_doc(self, collection, data):
+        doc_id = _new_id()
+        self.set_doc(collection, doc_id, data)
+        return doc_id
+
+    def update_doc(self, collection, doc_id, data):
+        with self._lock:
+            existing = self._load(collection, doc_id)
+            if existing is None:
+                raise DocumentNotFoundError(f"{collection}/{doc_id}")
+            self._store(collection, doc_id, _apply_update(existing, data))
+
+    def delete_doc(self, collection, doc_id):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM documents WHERE collection = ? AND doc_id = ?",
+                (collection, doc_id),
+            )
+
+    def commit_batch(self, ops):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for kind, collection, doc_id, data in ops:
+                    self._apply_op(kind, collection, doc_id, data)
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    @staticmethod
+    def _compile_filters(collection: str, filters: Optional[List[tuple]]):
+        """Split filters into SQL (where, params) and a Python-side residual."""
+        where = ["collection = ?"]
+        params: List[Any] = [collection]
+        residual = []
+
+        for field, op, value in filters or []:
+            expr = "json_extract(data, ?)"
+            if op in _SQL_OPS and _is_scalar(value):
+                where.append(f"{expr} {_SQL_OPS[op]} ?")
+                params += [_json_path(field), value]
+            elif op == "in" and value and all(_is_scalar(v) for v in value):
+                where.append(f"{expr} IN ({', '.join('?' * len(value))})")
+                params += [_json_path(field), *value]
+            else:
+                residual.append((field, op, value))
+        return where, params, residual
+
+    def _fetch(self, sql: str, params: List[Any]) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        docs = []
+        for doc_id, raw in rows:
+            d = json.loads(raw)
+            d["_id"] = doc_id
+            docs.append(d)
+        return docs
+
+    def _candidates(self, collection, filters):
+        where, params, residual = self._compile_filters(collection, filters)
+        docs = self._fetch("SELECT doc_id, data FROM documents WHERE " + " AND ".join(where), params)
+        return [d for d in docs if _matches(d, residual)] if residual else docs
+
+    def query(self, collection, filters=None, order_by=None, order_desc=False, limit=None,
+              fields=None):
+        where, params, residual = self._compile_filters(collection, filters)
+        if residual:
+            return super().query(collection, filters, order_by, order_desc, limit, fields)
+
+        sql = "SELECT doc_id, data FROM documents WHERE " + " AND ".join(where)
+        if order_by:
+            # Firestore drops documents that do not have the order_by field
+            sql += " AND json_type(data, ?) IS NOT NULL"
+            sql += f" ORDER BY json_extract(data, ?) {'DESC' if order_desc else 'ASC'}"
+            params += [_json_path(order_by), _json_path(order_by)]
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        return [_materialize(d, fields, False) for d in self._fetch(sql, params)]
+
+    def query_page(self, collection, filters=None, order_by=None, order_desc=False,
+                   page_size=100, cursor=None, fields=None):
+        where, params, residual = self._compile_filters(collection, filters)
+        if residual or (cursor is not None and order_by and not _is_scalar(cursor[0])):
+            return super().query_page(collection, filters, order_by, order_desc, page_size,
+                                      cursor, fields)
+
+        # Keyset pagination on (value, doc_id)
+        cmp, direction = ("<", "DESC") if order_desc else (">", "ASC")
+        if order_by:
+            path = _json_path(order_by)
+            where.append("json_type(data, ?) IS NOT NULL")
+            params.append(path)
+            if cursor is not None:
+                where.append(f"(json_extract(data, ?) {cmp} ? OR "
+                             f"(json_extract(data, ?) = ? AND doc_id {cmp} ?))")
+                params += [path, cursor[0], path, cursor[0], cursor[1]]
+            order = f"json_extract(data, ?) {direction}, doc_id {direction}"
+            order_params = [path]
+        else:
+            if cursor is not None:
+                where.append(f"doc_id {cmp} ?")
+                params.append(cursor[1])
+            order, order_params = f"doc_id {direction}", []
+
+        sql = ("SELECT doc_id, data FROM documents WHERE " + " AND ".join(where)
+               + f" ORDER BY {order} LIMIT ?")
+        docs = self._fetch(sql, params + order_params + [int(page_size)])
+        return [_materialize(d, fields, False) for d in docs]
+
+    def aggregate(self, collection, kind, field=None, filters=None):
+        where, params, residual = self._compile_filters(collection, filters)
+        if residual:
+            return super().aggregate(collection, kind, field, filters)
+
+        if kind == "count":
+            expr = "COUNT(*)"
+        else:
+            expr = ("COALESCE(SUM(json_extract(data, ?)), 0)" if kind == "sum"
+                    else "AVG(json_extract(data, ?))")
+            where.append("json_type(data, ?) IN ('integer', 'real')")
+            params = [_json_path(field)] + params + [_json_path(field)]
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT {expr} FROM documents WHERE " + " AND ".join(where), params
+            ).fetchone()[0]
+
+
+# ─────────────────────────────────────────────────────────────
+# Factory
+# ─────────────────────────────────────────────────────────────
+
+def create_backend(name: Optional[str] = None) -> StorageBackend:
+    """Build the backend named by `name` or the STORAGE_BACKEND env var."""
+    name = (name or os.getenv("STORAGE_BACKEND", "firestore")).strip().lower()
+    if name == "firestore":
+        return FirestoreBackend()
+    if name == "memory":
+        return MemoryBackend()
+    if name == "sqlite":
+        return SQLiteBackend(os.getenv("SQLITE_DB_PATH", "wasteiq.db"))
+    raise ValueError(f"Unknown STORAGE_BACKEND: {name!r} (use firestore, memory or sqlite)")
@@ -0,0 +1,119 @@
+"""
+WASTE IQ – Verified ID-Token Cache
+Bounded LRU from sha256(token) to the claims verify_id_token returned, so a
+dashboard firing several calls with the same token verifies it once.
+
+Entries live until the token's `exp` (never longer). invalidate_user(uid)
+drops a user's entries and marks every token issued before that second as
+stale: such tokens are never cached again, and auth re-checks them against
+the account (revocation, disabled flag, current role claim) on each use –
+see auth._verify_token.
+Size comes from TOKEN_CACHE_SIZE (default 10000, 0 disables the cache).
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set
+
+DEFAULT_SIZE = 10000
+# Firebase ID tokens are valid for at most an hour; a cutoff older than that
+# can no longer match a live token
+MAX_TOKEN_LIFETIME = 3600
+
+
+def _key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class TokenCache:
+    def __init__(self, max_size: int = DEFAULT_SIZE):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()     # key → (exp, claims)
+        self._by_uid: Dict[str, Set[str]] = {}
+        self._cutoffs: Dict[str, int] = {}        # uid → tokens issued before this second are stale
+        self.hits          = 0
+        self.misses        = 0
+        self.evictions     = 0
+        self.invalidations = 0
+
+    def get(self, token: str) -> Optional[Dict]:
+        if self.max_size <= 0:
+            return None
+        key = _key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+
+    def is_stale(self, decoded: Dict) -> bool:
+        """True if the token was issued before the second of an invalidate_user() for its uid."""
+        cutoff = self._cutoffs.get(decoded.get("uid", ""))
+        return cutoff is not None and decoded.get("iat", 0) < cutoff
+
+    def put(self, token: str, decoded: Dict) -> None:
+        exp = decoded.get("exp")
+        if self.max_size <= 0 or not exp or exp <= time.time() or self.is_stale(decoded):
+            return
+        key, uid = _key(token), decoded.get("uid", "")
+        with self._lock:
+            self._entries[key] = (float(exp), decoded)
+            self._entries.move_to_end(key)
+            self._by_uid.setdefault(uid, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        _, decoded = self._entries.pop(key)
+        uid = decoded.get("uid", "")
+        keys = self._by_uid.get(uid)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_uid[uid]
+
+    def invalidate_user(self, uid: str) -> None:
+        # iat has one-second resolution: a token minted in the same second as
+        # the change (signup → set_user_role → login) already carries it
+        now = int(time.time())
+        with self._lock:
+            for key in self._by_uid.pop(uid, ()):
+                self._entries.pop(key, None)
+            self._cutoffs[uid] = now
+            self.invalidations += 1
+            for stale_uid in [u for u, t in self._cutoffs.items() if t < now - MAX_TOKEN_LIFETIME]:
+                del self._cutoffs[stale_uid]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_uid.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size":          len(self._entries),
+                "max_size":      self.max_size,
+                "hits":          self.hits,
+                "misses":        self.misses,
+                "evictions":     self.evictions,
+                "invalidations": self.invalidations,
+                "stale_users":   len(self._cutoffs),
+                "hit_rate":      round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def cache_from_env() -> TokenCache:
+    raw = os.getenv("TOKEN_CACHE_SIZE", "").strip()
+    return TokenCache(int(raw) if raw else DEFAULT_SIZE)
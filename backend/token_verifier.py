@@ -0,0 +1,302 @@
+"""
+WASTE IQ – Local ID-Token Verification
+Verifies Firebase ID tokens in-process against a cached set of signing keys
+instead of going through firebase_admin.verify_id_token, and provides a
+stand-in token issuer for load tests and benchmarks.
+
+AUTH_VERIFIER selects how auth.py checks tokens:
+  firebase  – firebase_admin SDK (default)
+  local     – RS256 check against Google's published securetoken keys,
+              fetched at startup and refreshed by a background thread before
+              their Cache-Control max-age runs out (or early, when a token
+              names an unknown kid); requests never fetch keys themselves –
+              with no keys loaded they fail fast with KeysUnavailableError.
+              AUTH_SIGNING_KEYS_FILE
+              pins a {kid: PEM} file instead (no network at all)
+  stand-in  – tokens minted by StandInAuthority.mint() with a local RSA key
+              pair (AUTH_STAND_IN_KEY: PEM private key, created if missing;
+              ephemeral otherwise). Never enable this in production.
+
+Claims are checked the way the Admin SDK does (alg, kid, aud, iss, sub,
+iat/exp/auth_time) and returned with `uid` set from `sub`.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import urllib.request
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+GOOGLE_KEYS_URL = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+ISSUER_PREFIX   = "https://securetoken.google.com/"
+CLOCK_SKEW      = 5          # seconds of leeway on iat / exp / auth_time
+MIN_REFRESH     = 60.0
+MAX_REFRESH     = 6 * 3600.0
+WAKE_INTERVAL   = 30.0       # at most one early refresh (unknown kid / no keys) per interval
+
+
+class InvalidTokenError(Exception):
+    pass
+
+
+class ExpiredTokenError(InvalidTokenError):
+    pass
+
+
+class KeysUnavailableError(Exception):
+    """No signing keys loaded yet; a background fetch has been requested."""
+
+
+def _load_public_key(pem: str):
+    from cryptography import x509
+    from cryptography.hazmat.primitives import serialization
+
+    data = pem.encode()
+    if b"BEGIN CERTIFICATE" in data:
+        return x509.load_pem_x509_certificate(data).public_key()
+    return serialization.load_pem_public_key(data)
+
+
+# ─────────────────────────────────────────────────────────────
+# Signing keys
+# ─────────────────────────────────────────────────────────────
+
+class KeySet:
+    """kid → public key, from a URL (refreshed in the background) or pinned."""
+
+    def __init__(self, url: Optional[str] = GOOGLE_KEYS_URL, pinned: Optional[Dict[str, Any]] = None):
+        self.url = None if pinned is not None else url
+        self._keys: Dict[str, Any] = dict(pinned or {})
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_attempt = 0.0
+        self.max_age   = MAX_REFRESH
+        self.loaded_at = time.time() if pinned is not None else 0.0
+        self.refreshes = 0
+        self.failures  = 0
+
+    @classmethod
+    def from_file(cls, path: str) -> "KeySet":
+        raw = json.loads(Path(path).read_text())
+        return cls(pinned={kid: _load_public_key(pem) for kid, pem in raw.items()})
+
+    def refresh(self) -> None:
+        """Fetch the current keys; the previous set stays in place on failure."""
+        if self.url is None:
+            return
+        self.last_attempt = time.time()
+        with urllib.request.urlopen(self.url, timeout=10) as resp:
+            raw = json.loads(resp.read())
+            match = re.search(r"max-age=(\d+)", resp.headers.get("Cache-Control", ""))
+        keys = {kid: _load_public_key(pem) for kid, pem in raw.items()}
+        with self._lock:
+            self._keys = keys
+            self.max_age = float(match.group(1)) if match else MAX_REFRESH
+            self.loaded_at = time.time()
+            self.refreshes += 1
+
+    def get(self, kid: str):
+        """Public key for kid, or None. Never fetches inline – misses wake the refresher."""
+        if not self.loaded_at:
+            self.request_refresh()
+            raise KeysUnavailableError("Signing keys not loaded yet")
+        with self._lock:
+            key = self._keys.get(kid)
+        if key is None:
+            self.request_refresh()   # Google may have rotated in a new key
+        return key
+
+    def request_refresh(self) -> None:
+        """Ask the background thread for an early fetch (starting it if needed)."""
+        if self.url is None:
+            return
+        self._ensure_thread()
+        self._wake.set()
+
+    def start(self) -> None:
+        if self.url is None or self._thread is not None:
+            return
+        try:
+            if not self.loaded_at:
+                self.refresh()
+        finally:
+            # Started even if the first fetch failed – it keeps retrying
+            self._ensure_thread()
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="auth-keys", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        delay = self._next_delay() if self.loaded_at else 0.0
+        while True:
+            self._wake.wait(delay)
+            if self._stop.is_set():
+                return
+            if self._wake.is_set():
+                self._wake.clear()
+                # Early wake-ups are throttled so junk kids cannot hammer the endpoint
+                wait = self.last_attempt + WAKE_INTERVAL - time.time()
+                if wait > 0 and self._stop.wait(wait):
+                    return
+            try:
+                self.refresh()
+                delay = self._next_delay()
+            except Exception as e:
+                self.failures += 1
+                print(f"⚠️  Signing key refresh failed: {e}")
+                delay = MIN_REFRESH
+
+    def _next_delay(self) -> float:
+        # Refresh at half the advertised lifetime so a failed fetch has time to retry
+        return min(max(self.max_age / 2, MIN_REFRESH), MAX_REFRESH)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "source":    self.url or "pinned",
+                "keys":      sorted(self._keys),
+                "age_s":     round(time.time() - self.loaded_at, 1) if self.loaded_at else None,
+                "max_age_s": self.max_age,
+                "refreshes": self.refreshes,
+                "failures":  self.failures,
+            }
+
+
+# ─────────────────────────────────────────────────────────────
+# Verification
+# ─────────────────────────────────────────────────────────────
+
+class TokenVerifier:
+    def __init__(self, keys: KeySet, project_id: str, stand_in: bool = False):
+        self.keys       = keys
+        self.project_id = project_id
+        self.issuer     = ISSUER_PREFIX + project_id
+        self.stand_in   = stand_in
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        import jwt
+
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.InvalidTokenError as e:
+            raise InvalidTokenError(str(e))
+        if header.get("alg") != "RS256":
+            raise InvalidTokenError(f"Unexpected algorithm {header.get('alg')!r}")
+        key = self.keys.get(header.get("kid", ""))
+        if key is None:
+            raise InvalidTokenError(f"Unknown signing key {header.get('kid')!r}")
+
+        try:
+            claims = jwt.decode(token, key, algorithms=["RS256"], audience=self.project_id,
+                                issuer=self.issuer, leeway=CLOCK_SKEW,
+                                options={"require": ["exp", "iat", "aud", "iss", "sub"]})
+        except jwt.ExpiredSignatureError:
+            raise ExpiredTokenError("Token expired")
+        except jwt.InvalidTokenError as e:
+            raise InvalidTokenError(str(e))
+
+        sub = claims["sub"]
+        if not isinstance(sub, str) or not sub or len(sub) > 128:
+            raise InvalidTokenError("Invalid subject")
+        if claims.get("auth_time", 0) > time.time() + CLOCK_SKEW:
+            raise InvalidTokenError("auth_time is in the future")
+        claims["uid"] = sub
+        return claims
+
+
+# ─────────────────────────────────────────────────────────────
+# Stand-in issuer
+# ─────────────────────────────────────────────────────────────
+
+class StandInAuthority:
+    """Mints Firebase-shaped ID tokens signed with a local RSA key."""
+
+    def __init__(self, project_id: str = "wasteiq-local", key_path: Optional[str] = None):
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+
+        if key_path and Path(key_path).exists():
+            self._private_key = serialization.load_pem_private_key(Path(key_path).read_bytes(), password=None)
+        else:
+            self._private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+            if key_path:
+                Path(key_path).write_bytes(self._private_key.private_bytes(
+                    serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                    serialization.NoEncryption()))
+        self.project_id = project_id
+        self.kid = "stand-in-" + uuid.uuid5(uuid.NAMESPACE_OID, self._public_pem()).hex[:12]
+
+    def _public_pem(self) -> str:
+        from cryptography.hazmat.primitives import serialization
+
+        return self._private_key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo).decode()
+
+    def mint(self, uid: str, role: str = "household", email: str = "", name: str = "",
+             ttl: int = 3600, **claims) -> str:
+        import jwt
+
+        now = int(time.time())
+        payload = {
+            "iss": ISSUER_PREFIX + self.project_id, "aud": self.project_id,
+            "sub": uid, "auth_time": now, "iat": now, "exp": now + ttl,
+            "email": email, "name": name, "role": role,
+            "firebase": {"sign_in_provider": "custom", "identities": {}},
+            **claims,
+        }
+        return jwt.encode(payload, self._private_key, algorithm="RS256", headers={"kid": self.kid})
+
+    def verifier(self) -> TokenVerifier:
+        keys = KeySet(pinned={self.kid: self._private_key.public_key()})
+        return TokenVerifier(keys, self.project_id, stand_in=True)
+
+
+_stand_in: Optional[StandInAuthority] = None
+_stand_in_lock = threading.Lock()
+
+
+def stand_in() -> StandInAuthority:
+    """The process-wide stand-in issuer (AUTH_STAND_IN_KEY / project from env)."""
+    global _stand_in
+    with _stand_in_lock:
+        if _stand_in is None:
+            _stand_in = StandInAuthority(_project_id() or "wasteiq-local", os.getenv("AUTH_STAND_IN_KEY") or None)
+        return _stand_in
+
+
+def _project_id() -> Optional[str]:
+    return os.getenv("FIREBASE_PROJECT_ID") or os.getenv("GOOGLE_CLOUD_PROJECT")
+
+
+def verifier_from_env() -> Optional[TokenVerifier]:
+    """None means: use the firebase_admin SDK."""
+    mode = os.getenv("AUTH_VERIFIER", "firebase").strip().lower()
+    if mode in ("", "firebase", "sdk"):
+        return None
+    if mode == "stand-in":
+        return stand_in().verifier()
+    if mode != "local":
+        raise ValueError(f"Unknown AUTH_VERIFIER: {mode}")
+    project_id = _project_id()
+    if not project_id:
+        raise ValueError("AUTH_VERIFIER=local needs FIREBASE_PROJECT_ID")
+    pinned = os.getenv("AUTH_SIGNING_KEYS_FILE")
+    return TokenVerifier(KeySet.from_file(pinned) if pinned else KeySet(), project_id)
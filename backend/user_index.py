@@ -0,0 +1,189 @@
+"""
+WASTE IQ – Admin User Index
+In-memory index of Firebase Auth users behind GET /auth/users, so admins can
+page and search 100k+ accounts without walking every Auth page per request.
+
+Users are kept sorted by (lower-cased email, uid), overall and per role, so a
+page – optionally filtered by role and/or email prefix – is a bisect plus
+page_size slice. Page tokens use the firestore_client format
+({"v": email, "id": uid}).
+
+The index loads on first use and is rebuilt from list_users every
+USER_INDEX_REFRESH seconds (default 300) by a background thread; auth.py
+patches it in place on create / role change / disable so admin edits show
+up immediately. Patches made while a rebuild is reading the source are
+replayed onto the new index when it is swapped in, so they are not lost to
+the older snapshot.
+"""
+
+import bisect
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:  # imported as a top-level module from backend/ (uvicorn main:app)
+    from firestore_client import clamp_page_size, decode_page_token, encode_page_token
+except ImportError:  # imported as backend.user_index
+    from backend.firestore_client import clamp_page_size, decode_page_token, encode_page_token
+
+DEFAULT_REFRESH = 300.0
+
+_Key = Tuple[str, str]   # (email.lower(), uid)
+
+
+def _key(record: Dict) -> _Key:
+    return ((record.get("email") or "").lower(), record["uid"])
+
+
+class UserIndex:
+    def __init__(self, source: Callable[[], Iterable[Dict]], refresh_interval: float = DEFAULT_REFRESH):
+        self._source = source
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()     # one rebuild at a time
+        self._pending: Optional[Dict[str, Dict]] = None   # uid → changes made during a rebuild
+        self._records: Dict[str, Dict] = {}
+        self._keys: List[_Key] = []
+        self._by_role: Dict[str, List[_Key]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.loaded_at = 0.0
+        self.refreshes = 0
+        self.failures  = 0
+        self.last_refresh_s = 0.0
+
+    # ── Loading ──────────────────────────────────────────────
+    def refresh(self) -> None:
+        """Rebuild from the source and swap the new index in atomically."""
+        with self._refresh_lock:
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        start = time.perf_counter()
+        with self._lock:
+            self._pending = {}
+        try:
+            records = {r["uid"]: r for r in self._source()}
+            keys = sorted(_key(r) for r in records.values())
+            by_role: Dict[str, List[_Key]] = {}
+            for k in keys:
+                by_role.setdefault(records[k[1]].get("role", "household"), []).append(k)
+        except BaseException:
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            pending, self._pending = self._pending, None
+            self._records, self._keys, self._by_role = records, keys, by_role
+            # The source was read before these changes were made – apply them on top
+            for uid, changes in pending.items():
+                base = records.get(uid)
+                if base is None and "uid" not in changes:
+                    continue
+                self._put({**(base or {}), **changes})
+            self.loaded_at = time.time()
+            self.refreshes += 1
+            self.last_refresh_s = round(time.perf_counter() - start, 3)
+
+    def _ensure_loaded(self) -> None:
+        if self.loaded_at:
+            return
+        with self._load_lock:
+            if not self.loaded_at:
+                self.refresh()
+                self._start()
+
+    def _start(self) -> None:
+        if self.refresh_interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="user-index", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                self.failures += 1
+                print(f"⚠️  User index refresh failed: {e}")
+
+    # ── In-place updates ─────────────────────────────────────
+    def upsert(self, record: Dict) -> None:
+        with self._lock:
+            if self._pending is not None:
+                self._pending[record["uid"]] = dict(record)
+            if self.loaded_at:       # otherwise the first load will include it
+                self._put(record)
+
+    def patch(self, uid: str, **changes) -> None:
+        with self._lock:
+            if self._pending is not None:
+                self._pending[uid] = {**self._pending.get(uid, {}), **changes}
+            record = self._records.get(uid)
+            if record is not None:
+                self._put({**record, **changes})
+
+    def _put(self, record: Dict) -> None:
+        """Insert or replace a record. Caller holds the lock."""
+        old = self._records.get(record["uid"])
+        if old is not None:
+            self._remove(old)
+        self._records[record["uid"]] = record
+        k = _key(record)
+        bisect.insort(self._keys, k)
+        bisect.insort(self._by_role.setdefault(record.get("role", "household"), []), k)
+
+    def _remove(self, record: Dict) -> None:
+        k = _key(record)
+        for keys in (self._keys, self._by_role.get(record.get("role", "household"), [])):
+            i = bisect.bisect_left(keys, k)
+            if i < len(keys) and keys[i] == k:
+                del keys[i]
+
+    # ── Queries ──────────────────────────────────────────────
+    def page(self, page_size: Optional[int] = None, page_token: Optional[str] = None,
+             role: Optional[str] = None, email_prefix: Optional[str] = None) -> Tuple[List[Dict], Optional[str], int]:
+        """
+        Return (users, next_page_token, total matches) ordered by email.
+        Raises ValueError for a malformed page_token.
+        """
+        page_size = clamp_page_size(page_size)
+        cursor = decode_page_token(page_token)
+        self._ensure_loaded()
+        prefix = (email_prefix or "").lower()
+        with self._lock:
+            keys = self._by_role.get(role, []) if role else self._keys
+            lo = bisect.bisect_left(keys, (prefix, ""))
+            hi = bisect.bisect_left(keys, (prefix + "\U0010ffff", "")) if prefix else len(keys)
+            start = bisect.bisect_right(keys, (str(cursor[0]), cursor[1]), lo, hi) if cursor else lo
+            window = keys[start:min(start + page_size, hi)]
+            users = [dict(self._records[uid]) for _, uid in window]
+        more = start + len(window) < hi
+        next_token = encode_page_token(*window[-1]) if window and more else None
+        return users, next_token, hi - lo
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size":             len(self._keys),
+                "roles":            {r: len(k) for r, k in self._by_role.items()},
+                "age_s":            round(time.time() - self.loaded_at, 1) if self.loaded_at else None,
+                "refresh_interval": self.refresh_interval,
+                "refreshes":        self.refreshes,
+                "failures":         self.failures,
+                "last_refresh_s":   self.last_refresh_s,
+            }
+
+
+def refresh_interval_from_env() -> float:
+    raw = os.getenv("USER_INDEX_REFRESH", "").strip()
+    return float(raw) if raw else DEFAULT_REFRESH
@@ -4,18 +4,33 @@ Phase 1: Gemini object detection (with retry on 429) OR HuggingFace CLIP fallbac
 Phase 2: Deterministic Python waste mapping
 """
 
+import contextlib
+import copy
+import functools
 import io
 import os
 import json
 import time
 from datetime import datetime, timezone
+from types import MappingProxyType
 from typing import Dict, List, Optional
 from pathlib import Path
 
 from PIL import Image
 
+import metrics
+from category_cache import cache_from_env as _category_cache_from_env
+from gemini_clients import GeminiClients
+from image_cache import cache_from_env as _image_cache_from_env, dhash
+from keyword_matcher import KeywordMatcher
+from points import award_points
+
 _ENV_FILE = Path(__file__).parent.parent / ".env"
 _YOLO_MODEL = None  # Lazy-loaded
+YOLO_BATCH_SIZE = int(os.getenv("YOLO_BATCH_SIZE", "16"))   # images per forward pass
+GEMINI_BATCH_WORKERS = 4                                    # concurrent Gemini calls per batch
+CACHE_MIN_CONFIDENCE = 60.0                                 # Gemini answers below this are not cached
+                                                            # (YOLO answers: only without a Gemini key)
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -32,6 +47,11 @@ BIN_COLORS = {
 }
 VALID_CATEGORIES = set(BIN_COLORS.keys())
 
+# Names Gemini has already placed (memory LRU + category_cache collection)
+_category_cache = _category_cache_from_env(VALID_CATEGORIES)
+# Results of recent uploads by perceptual hash (near-duplicates hit too)
+_image_cache = _image_cache_from_env()
+
 DISPOSAL = {
     "Wet Waste": (
         "Place in the GREEN bin. Organic waste composts in 45–90 days.",
@@ -141,6 +161,11 @@ WASTE_MAP: Dict[str, str] = {
     "toothbrush": "Dry Waste", "pen": "Dry Waste", "pencil": "Dry Waste",
 }
 
+# Matching tables for _map_to_category / _yolo_classify, built once
+_WASTE_EXACT   = MappingProxyType(dict(WASTE_MAP))
+_WASTE_CHOICES = tuple(WASTE_MAP)
+_WASTE_MATCHER = KeywordMatcher(WASTE_MAP)
+
 # Material/texture words → indicates bad detection response
 _MATERIAL_WORDS = {
     "material", "surface", "texture", "flat", "colored", "colour", "coloured",
@@ -150,12 +175,19 @@ _MATERIAL_WORDS = {
 }
 
 
-def _read_key() -> str:
+# Per-phase time of a prediction: read_key, resize, detect, map
+PHASE_SECONDS = metrics.REGISTRY.histogram(
+    "wasteiq_classify_phase_seconds", "Time spent in each classification phase", ("phase",),
+    metrics.PHASE_BUCKETS)
+
+
+@contextlib.contextmanager
+def _phase(name: str):
+    start = time.perf_counter()
     try:
-        from dotenv import dotenv_values
-        return dotenv_values(_ENV_FILE).get("GEMINI_API_KEY", "").strip()
-    except Exception:
-        return os.getenv("GEMINI_API_KEY", "").strip()
+        yield
+    finally:
+        PHASE_SECONDS.observe(time.perf_counter() - start, name)
 
 
 def _resize_image(img_bytes: bytes, max_px: int = 1024) -> bytes:
@@ -205,13 +237,10 @@ Bad: flat object, dark material, electronic device, organic matter
 Return ONLY JSON: {"object_name": "<specific name>", "confidence": <0-100>}"""
 
 
-def _gemini_detect(img_data: bytes, api_key: str, prompt: str) -> dict:
+def _gemini_detect(img_data: bytes, client, prompt: str) -> dict:
     """Detect object via Gemini with exponential backoff on 429."""
-    from google import genai
     from google.genai import types
 
-    client = genai.Client(api_key=api_key)
-
     for attempt in range(3):
         try:
             resp = client.models.generate_content(
@@ -338,6 +367,8 @@ _IMAGENET_WASTE: Dict[str, tuple] = {
     "medicine cabinet": ("Medicine", "Hazardous Waste"),
 }
 
+_IMAGENET_MATCHER = KeywordMatcher(_IMAGENET_WASTE)
+
 
 def _get_yolo_model():
     """Lazy-load YOLOv8-nano classification model (cached after first load)."""
@@ -358,18 +389,28 @@ def _yolo_classify(img_bytes: bytes) -> dict:
     Local YOLOv8-nano (1000 ImageNet classes) as offline fallback.
     No API call, no internet needed after first model download.
     """
+    return _yolo_classify_batch([img_bytes])[0]
+
+
+def _yolo_classify_batch(images: List[bytes]) -> List[dict]:
+    """
+    _yolo_classify for several uploads: one forward pass per YOLO_BATCH_SIZE
+    images instead of one per image. Raises if any image cannot be decoded.
+    """
     model = _get_yolo_model()
     if not model:
         raise RuntimeError("YOLO model unavailable")
 
-    img = Image.open(io.BytesIO(img_bytes)).convert("RGB")
-    results = model(img, verbose=False)
-    result = results[0]
+    imgs = [Image.open(io.BytesIO(img_bytes)).convert("RGB") for img_bytes in images]
+    out = []
+    for start in range(0, len(imgs), YOLO_BATCH_SIZE):
+        results = model(imgs[start:start + YOLO_BATCH_SIZE], verbose=False)
+        out += [_yolo_result(result.probs, model.names) for result in results]
+    return out
 
-    # Get top-5 predictions
-    probs = result.probs
-    names = model.names
 
+def _yolo_result(probs, names) -> dict:
+    """Map one image's top-5 ImageNet predictions to a classification result."""
     top5_idx   = probs.top5
     top5_conf  = probs.top5conf.tolist()
 
@@ -382,33 +423,35 @@ def _yolo_classify(img_bytes: bytes) -> dict:
     ]
 
     # 1. Check ImageNet→waste map
-    for key, (display, cat) in _IMAGENET_WASTE.items():
-        if key in top_label or top_label in key:
-            instructions, tip = DISPOSAL[cat]
-            return {
-                "object_name":           display,
-                "waste_category":        cat,
-                "confidence":            top_conf,
-                "disposal_instructions": instructions,
-                "recycling_tip":         tip,
-                "alternatives":          alternatives,
-                "mode":                  "yolo_local",
-            }
+    key = _IMAGENET_MATCHER.first_either(top_label)
+    if key is not None:
+        display, cat = _IMAGENET_WASTE[key]
+        instructions, tip = DISPOSAL[cat]
+        return {
+            "object_name":           display,
+            "waste_category":        cat,
+            "confidence":            top_conf,
+            "disposal_instructions": instructions,
+            "recycling_tip":         tip,
+            "alternatives":          alternatives,
+            "mode":                  "yolo_local",
+        }
 
     # 2. Keyword scan using waste map
-    for keyword, cat in WASTE_MAP.items():
-        if keyword in top_label:
-            instructions, tip = DISPOSAL[cat]
-            display = top_label.replace("-", " ").replace(",", "").title()
-            return {
-                "object_name":           display,
-                "waste_category":        cat,
-                "confidence":            top_conf,
-                "disposal_instructions": instructions,
-                "recycling_tip":         tip,
-                "alternatives":          alternatives,
-                "mode":                  "yolo_local",
-            }
+    keyword = _WASTE_MATCHER.first_in(top_label)
+    if keyword is not None:
+        cat = WASTE_MAP[keyword]
+        instructions, tip = DISPOSAL[cat]
+        display = top_label.replace("-", " ").replace(",", "").title()
+        return {
+            "object_name":           display,
+            "waste_category":        cat,
+            "confidence":            top_conf,
+            "disposal_instructions": instructions,
+            "recycling_tip":         tip,
+            "alternatives":          alternatives,
+            "mode":                  "yolo_local",
+        }
 
     # 3. Use top label as-is → General Waste
     display = top_label.split(",")[0].replace("-", " ").title()
@@ -429,40 +472,69 @@ def _yolo_classify(img_bytes: bytes) -> dict:
 # PHASE 2 — DETERMINISTIC WASTE MAPPING
 # ══════════════════════════════════════════════════════════════════════════════
 
-def _map_to_category(object_name: str, api_key: str = "") -> str:
-    """Map object name → waste category. Python-first, Gemini only for unknowns."""
-    from rapidfuzz import process, fuzz
-
+def _map_to_category(object_name: str, client=None) -> str:
+    """
+    Map object name → waste category. Python-first, then names Gemini has
+    already placed (category_cache), Gemini only for new unknowns.
+    """
     obj_lower = object_name.lower().strip()
 
-    if obj_lower in WASTE_MAP:
-        return WASTE_MAP[obj_lower]
+    category = _local_category(obj_lower)
+    if category is not None:
+        return category
 
-    match = process.extractOne(obj_lower, list(WASTE_MAP.keys()),
-                               scorer=fuzz.WRatio, score_cutoff=75)
-    if match:
-        return WASTE_MAP[match[0]]
+    category = _category_cache.get(obj_lower)
+    if category is not None:
+        return category
 
-    for keyword, category in WASTE_MAP.items():
-        if keyword in obj_lower:
+    if client is not None:
+        category = _gemini_category_step(object_name, client)
+        if category is not None:
+            _category_cache.learn(obj_lower, category)
             return category
+        _category_cache.note_llm_call()
 
-    for keyword, category in WASTE_MAP.items():
-        if obj_lower in keyword:
-            return category
+    return "General Waste"
 
-    if api_key:
-        return _gemini_category_step(object_name, api_key)
 
-    return "General Waste"
+@functools.lru_cache(maxsize=4096)
+def _local_category(obj_lower: str) -> Optional[str]:
+    """Deterministic WASTE_MAP lookup (exact, fuzzy, keyword); None for unknown names."""
+    from rapidfuzz import process, fuzz
+
+    category = _WASTE_EXACT.get(obj_lower)
+    if category is not None:
+        return category
+
+    # Keys are already lower-case and stripped: no per-call processing of the choices
+    # (processor=None is the rapidfuzz>=3 default, pinned in requirements.txt)
+    match = process.extractOne(obj_lower, _WASTE_CHOICES, scorer=fuzz.WRatio,
+                               processor=None, score_cutoff=75)
+    if match:
+        return _WASTE_EXACT[match[0]]
 
+    keyword = _WASTE_MATCHER.first_in(obj_lower) or _WASTE_MATCHER.first_containing(obj_lower)
+    if keyword is not None:
+        return _WASTE_EXACT[keyword]
+    return None
 
-def _gemini_category_step(object_name: str, api_key: str) -> str:
-    """Text-only Gemini call — classify unknown object into waste category."""
-    from google import genai
+
+def image_cache_stats() -> Dict:
+    return _image_cache.stats()
+
+
+def category_cache_stats() -> Dict:
+    info = _local_category.cache_info()
+    return {
+        "local":   {"size": info.currsize, "max_size": info.maxsize, "hits": info.hits, "misses": info.misses},
+        "learned": _category_cache.stats(),
+    }
+
+
+def _gemini_category_step(object_name: str, client) -> Optional[str]:
+    """Text-only Gemini call — classify unknown object into waste category (None if the call failed)."""
     from google.genai import types
 
-    client = genai.Client(api_key=api_key)
     prompt = (
         f'Object: "{object_name}"\n'
         "Classify into exactly one: Wet Waste | Dry Waste | Recyclable | Hazardous Waste | E-Waste | General Waste\n"
@@ -483,25 +555,28 @@ def _gemini_category_step(object_name: str, api_key: str) -> str:
                 print("⏳ Gemini category rate limited — waiting 1s...")
                 time.sleep(1)
                 continue
-            return "General Waste"
-    return "General Waste"
+            return None
+    return None
 
 
 # ══════════════════════════════════════════════════════════════════════════════
 # MAIN CLASSIFY
 # ══════════════════════════════════════════════════════════════════════════════
 
-def _classify_gemini(img_bytes: bytes, api_key: str) -> Dict:
+def _classify_gemini(img_bytes: bytes, client) -> Dict:
     """Phase 1: Gemini detect → Phase 2: Python mapping."""
-    img_data = _resize_image(img_bytes)
+    with _phase("resize"):
+        img_data = _resize_image(img_bytes)
 
-    detected = _gemini_detect(img_data, api_key, _DETECT_PROMPT)
+    with _phase("detect"):
+        detected = _gemini_detect(img_data, client, _DETECT_PROMPT)
     obj = detected.get("object_name", "").strip()
     conf = float(detected.get("confidence", 0))
 
     if _is_material_response(obj) or conf < 60:
         print(f"⚠️  Vague result '{obj}' — retrying...")
-        retry = _gemini_detect(img_data, api_key, _RETRY_PROMPT)
+        with _phase("detect"):
+            retry = _gemini_detect(img_data, client, _RETRY_PROMPT)
         new_obj  = retry.get("object_name", "").strip()
         new_conf = float(retry.get("confidence", 0))
         if new_obj and not _is_material_response(new_obj):
@@ -514,7 +589,8 @@ def _classify_gemini(img_bytes: bytes, api_key: str) -> Dict:
                 "disposal_instructions": instructions, "recycling_tip": tip,
                 "alternatives": [], "mode": "gemini"}
 
-    category = _map_to_category(obj, api_key)
+    with _phase("map"):
+        category = _map_to_category(obj, client)
     instructions, tip = DISPOSAL[category]
     return {"object_name": obj, "waste_category": category,
             "confidence": round(conf, 1), "disposal_instructions": instructions,
@@ -525,19 +601,85 @@ def _classify_gemini(img_bytes: bytes, api_key: str) -> Dict:
 # PUBLIC CLASSIFIER CLASS
 # ══════════════════════════════════════════════════════════════════════════════
 
+def _error_result(e: Exception) -> Dict:
+    instructions, tip = DISPOSAL["General Waste"]
+    return {
+        "object_name": "Classification unavailable",
+        "waste_category": "General Waste",
+        "confidence": 0.0,
+        "disposal_instructions": instructions,
+        "recycling_tip": tip,
+        "alternatives": [],
+        "mode": "error",
+        "error": str(e)[:120],
+    }
+
+
+def _cacheable(result: Dict, local_only: bool) -> bool:
+    """
+    Whether a result may go into – or be served from – the (shared) image
+    cache. Confident Gemini answers always qualify. Local YOLO answers only
+    do while no Gemini key is configured (local_only): they are deterministic
+    for an image, so caching them is safe, but a fallback answer given while
+    Gemini was rate-limited must not be served once Gemini recovers.
+    """
+    if result.get("object_name") == "Unable to identify object":
+        return False
+    if result.get("mode") == "gemini":
+        return result.get("confidence", 0) >= CACHE_MIN_CONFIDENCE
+    return local_only and result.get("mode") == "yolo_local"
+
+
+def _cache_hit(img_hash: Optional[int], local_only: bool) -> Optional[Dict]:
+    hit = _image_cache.get(img_hash) if img_hash is not None else None
+    if hit is None or not _cacheable(hit[0], local_only):
+        return None
+    result, distance = hit
+    result.update(mode="cache", cached_mode=result.get("mode"), hash_distance=distance)
+    return result
+
+
 class WasteClassifier:
     def __init__(self):
-        key = _read_key()
+        self.gemini = GeminiClients(_ENV_FILE)
+        key = self.gemini.key()
         status = f"Gemini active (...{key[-6:]})" if key else "No Gemini key → HuggingFace fallback"
         print(f"✅ WasteClassifier — {status}")
 
     def predict(self, img_bytes: bytes) -> Dict:
-        key = _read_key()
-
+        h = dhash(img_bytes) if _image_cache.enabled else None
+        local_only = h is not None and not self.gemini.key()
+        cached = _cache_hit(h, local_only)
+        if cached is not None:
+            return cached
+
+        result = self._predict(img_bytes)
+        if h is not None and _cacheable(result, local_only):
+            _image_cache.put(h, result)
+        return result
+
+    def _gemini_client(self):
+        """Shared client for the current key, or None when no key is configured."""
+        with _phase("read_key"):
+            key = self.gemini.key()
+        return self.gemini.client(key) if key else None
+
+    def reload_gemini(self) -> Dict:
+        """Re-read GEMINI_API_KEY now instead of waiting for the next .env change."""
+        key = self.gemini.reload()
+        print(f"🔑 Gemini key reloaded ({'...' + key[-6:] if key else 'none'})")
+        return self.gemini.stats()
+
+    def _predict(self, img_bytes: bytes) -> Dict:
         # Primary: Gemini 2-phase pipeline
-        if key:
+        try:
+            client = self._gemini_client()
+        except Exception as e:
+            print(f"⚠️  Gemini client unavailable: {e} — falling back to local YOLO")
+            client = None
+        if client is not None:
             try:
-                return _classify_gemini(img_bytes, key)
+                return _classify_gemini(img_bytes, client)
             except RuntimeError as e:
                 print(f"⚠️  Gemini rate-limited: {e} — falling back to local YOLO")
             except Exception as e:
@@ -549,23 +691,71 @@ class WasteClassifier:
             return _yolo_classify(img_bytes)
         except Exception as e:
             print(f"❌ YOLO also failed: {e}")
-            instructions, tip = DISPOSAL["General Waste"]
-            return {
-                "object_name": "Classification unavailable",
-                "waste_category": "General Waste",
-                "confidence": 0.0,
-                "disposal_instructions": instructions,
-                "recycling_tip": tip,
-                "alternatives": [],
-                "mode": "error",
-                "error": str(e)[:120],
-            }
+            return _error_result(e)
+
+    def predict_batch(self, images: List[bytes]) -> List[Dict]:
+        """
+        predict() for many uploads, results in input order. Cache hits and
+        repeated images are answered once; Gemini runs GEMINI_BATCH_WORKERS
+        images at a time, and whatever is left for the local model goes
+        through _yolo_classify_batch in batched forward passes.
+        """
+        hashes = [dhash(b) if _image_cache.enabled else None for b in images]
+        local_only = _image_cache.enabled and not self.gemini.key()
+        results: List[Optional[Dict]] = [_cache_hit(h, local_only) for h in hashes]
+
+        # Identical uploads in one batch are classified once
+        todo: Dict[object, List[int]] = {}
+        for i, (h, r) in enumerate(zip(hashes, results)):
+            if r is None:
+                todo.setdefault(h if h is not None else images[i], []).append(i)
+        pending = [idxs[0] for idxs in todo.values()]
 
-
-    def classify_and_save(self, img_bytes: bytes, uid: str,
-                          firestore_client, image_url: str = None) -> Dict:
-        result = self.predict(img_bytes)
-        log_doc = {
+        try:
+            client = self._gemini_client() if pending else None
+        except Exception as e:
+            print(f"⚠️  Gemini client unavailable: {e} — falling back to local YOLO")
+            client = None
+        if client is not None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            def gemini(i: int) -> Optional[Dict]:
+                try:
+                    return _classify_gemini(images[i], client)
+                except Exception as e:
+                    print(f"⚠️  Gemini error: {e} — falling back to local YOLO")
+                    return None
+
+            with ThreadPoolExecutor(max_workers=GEMINI_BATCH_WORKERS) as pool:
+                for i, r in zip(pending, pool.map(gemini, pending)):
+                    results[i] = r
+            pending = [i for i in pending if results[i] is None]
+
+        if pending:
+            print(f"🤖 Using YOLOv8-nano local classifier for {len(pending)} images...")
+            try:
+                for i, r in zip(pending, _yolo_classify_batch([images[i] for i in pending])):
+                    results[i] = r
+            except Exception as e:
+                # An undecodable image fails the whole batch – retry one by one
+                print(f"⚠️  Batched YOLO failed ({e}) — classifying individually")
+                for i in pending:
+                    try:
+                        results[i] = _yolo_classify(images[i])
+                    except Exception as err:
+                        results[i] = _error_result(err)
+
+        for idxs in todo.values():
+            first = results[idxs[0]]
+            if hashes[idxs[0]] is not None and _cacheable(first, local_only):
+                _image_cache.put(hashes[idxs[0]], first)
+            for i in idxs[1:]:
+                results[i] = copy.deepcopy(first)
+        return results
+
+    @staticmethod
+    def _log_doc(result: Dict, uid: str, image_url: Optional[str]) -> Dict:
+        return {
             "uid":                   uid,
             "object_name":           result["object_name"],
             "waste_category":        result["waste_category"],
@@ -576,8 +766,13 @@ class WasteClassifier:
             "timestamp":             datetime.now(timezone.utc).isoformat(),
             "mode":                  result.get("mode", "error"),
         }
+
+    def classify_and_save(self, img_bytes: bytes, uid: str,
+                          firestore_client, image_url: str = None) -> Dict:
+        result = self.predict(img_bytes)
+        log_doc = self._log_doc(result, uid, image_url)
         try:
-            log_id = firestore_client.add_doc("waste_logs", log_doc)
+            log_id = firestore_client.append_doc("waste_logs", log_doc)
             log_doc["log_id"] = log_id
             print(f"✅ DB: Saved classification log {log_id}")
         except Exception as db_err:
@@ -585,19 +780,28 @@ class WasteClassifier:
             log_doc["log_id"] = None
         if result.get("mode") != "error":
             try:
-                _award_points(uid, 5, "Waste classification", firestore_client)
+                award_points(uid, 5)   # Waste classification
             except Exception:
                 pass
         return log_doc
 
-
-def _award_points(uid: str, points: int, reason: str, fc) -> None:
-    existing = fc.get_doc("gamification", uid)
-    if not existing:
-        fc.set_doc("gamification", uid, {
-            "uid": uid, "total_points": points,
-            "weekly_points": points, "badges": [], "level": "Beginner"
-        })
-    else:
-        fc.increment_field("gamification", uid, "total_points", points)
-        fc.increment_field("gamification", uid, "weekly_points", points)
+    def classify_and_save_batch(self, images: List[bytes], uid: str, firestore_client) -> List[Dict]:
+        """classify_and_save for many images: one batched waste_logs commit, one points award."""
+        results = self.predict_batch(images)
+        log_docs = [self._log_doc(r, uid, None) for r in results]
+        try:
+            written = firestore_client.add_docs("waste_logs", [dict(d) for d in log_docs])
+            for doc, log_id in zip(log_docs, written["ids"]):
+                doc["log_id"] = log_id
+            print(f"✅ DB: Saved {written['written']} classification logs in {written['batches']} batch(es)")
+        except Exception as db_err:
+            print(f"❌ DB Write Error for waste_logs: {db_err}")
+            for doc in log_docs:
+                doc["log_id"] = None
+        classified = sum(1 for r in results if r.get("mode") != "error")
+        if classified:
+            try:
+                award_points(uid, 5 * classified)   # 5 per classified image
+            except Exception:
+                pass
+        return log_docs
@@ -0,0 +1,434 @@
+"""
+WASTE IQ – Write-Behind Queue
+Buffers appends to log-style collections (waste_logs, collection_logs,
+overflow_predictions) and commits them in batches from a background thread.
+
+  • append() allocates the document id up front, writes the op to a local
+    journal and returns immediately – the request never waits on Firestore,
+    and never on the disk either: fsync is group-committed (see below).
+  • A flush runs when `flush_size` appends are pending or every
+    `flush_interval` seconds, through firestore_client.batch_write.
+  • Memory is bounded: once `max_pending` appends are queued, append() wakes
+    the flusher and waits for it to drain the backlog (append(block=False)
+    raises QueueFull instead, so async callers can wait off the event loop).
+    If the backlog is still full after `max_wait` seconds append() raises
+    RuntimeError and the caller writes synchronously.
+  • A failed op is retried with backoff; after `max_attempts` it is moved to
+    the dead-letter file (dead_letter.<pid>.log in the journal directory)
+    instead of being retried forever.
+  • Each process journals into its own directory (journal_dir/w-<pid>) held
+    by an exclusive file lock. Segments are deleted only after all of their
+    ops are committed. On start-up, directories whose lock is free – their
+    process is gone – are adopted and replayed. Replays are idempotent
+    because every op is a set() on a pre-allocated id.
+
+Durability window: an acknowledged append is in the OS page cache (it
+survives the process crashing) as soon as append() returns. A syncer thread
+fsyncs the journal for every append that arrived since its last fsync, one
+fsync per group, back to back under load – so a power loss or kernel crash
+can lose the appends of roughly the last fsync (a few ms), or of a batch
+whose commit was in flight. WRITE_BEHIND_FSYNC=0 skips the syncer and
+leaves flushing to disk entirely to the OS.
+
+Only JSON-serialisable documents can be journaled; anything else (e.g.
+SERVER_TIMESTAMP sentinels) is rejected with TypeError so the caller can
+write it synchronously.
+"""
+
+import atexit
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:     # Windows: no cross-process locks, dead workers' journals are not adopted
+    fcntl = None
+
+DEFAULT_FLUSH_SIZE     = 200
+DEFAULT_FLUSH_INTERVAL = 2.0
+DEFAULT_MAX_PENDING    = 5000
+DEFAULT_MAX_ATTEMPTS   = 8
+DEFAULT_MAX_WAIT       = 10.0
+MAX_BACKOFF            = 60.0
+
+# (collection, doc_id, data, failed attempts)
+Op = Tuple[str, str, Dict, int]
+
+
+class QueueFull(Exception):
+    """append(block=False) with max_pending ops already queued."""
+
+
+def _lock_file(path: Path):
+    """Open path and take an exclusive non-blocking lock on it; None if another process holds it."""
+    f = open(path, "a+")
+    if fcntl is None:
+        return f
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+
+def _fsync_dir(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return            # not supported on this platform
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class WriteBehindQueue:
+    def __init__(
+        self,
+        commit: Callable[[List[tuple]], Dict],
+        new_id: Callable[[str], str],
+        journal_dir: str,
+        flush_size: int = DEFAULT_FLUSH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        max_wait: float = DEFAULT_MAX_WAIT,
+        fsync: bool = True,
+    ):
+        self._commit         = commit
+        self._new_id         = new_id
+        self._root           = Path(journal_dir)
+        self._dir            = self._root / f"w-{os.getpid()}"
+        self.flush_size      = flush_size
+        self.flush_interval  = flush_interval
+        self.max_pending     = max(max_pending, flush_size)
+        self.max_attempts    = max_attempts
+        self.max_wait        = max_wait
+        self.fsync           = fsync
+
+        self._lock        = threading.Lock()
+        self._wake        = threading.Condition(self._lock)    # → flusher: work to do
+        self._drained     = threading.Condition(self._lock)    # → appenders: backlog went down
+        self._dirty       = threading.Condition(self._lock)    # → syncer: journal has unsynced writes
+        self._unsynced    = False
+        self._flush_lock  = threading.Lock()       # one flush at a time
+        self._pending: List[Op] = []
+        self._stopped     = False
+        self._failures    = 0                      # consecutive flushes with failed ops
+        self.stats        = {"appended": 0, "flushed": 0, "failed": 0, "flushes": 0,
+                             "dead_lettered": 0, "backpressure_waits": 0, "fsyncs": 0}
+
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._owner = _lock_file(self._dir / "lock")
+        if self._owner is None:
+            raise RuntimeError(f"write-behind journal {self._dir} is locked by another process")
+        self._dead_path = self._root / f"dead_letter.{os.getpid()}.log"
+        self._dead = None
+
+        leftovers, adopted = self._leftovers()
+        self._pending    = self._recover(leftovers)
+        self._segment_no = self._next_segment_no()
+        self._journal    = self._open_segment()
+        # Recovered ops now live in the new segment; the old ones can go once it is on disk
+        with self._lock:
+            self._write_journal(self._pending)
+        if self._unsynced:
+            os.fsync(self._journal.fileno())
+            self._unsynced = False
+        for segment in leftovers:
+            self._discard(segment)
+        for directory, lock in adopted:
+            if directory is not None:
+                shutil.rmtree(directory, ignore_errors=True)
+            lock.close()
+
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        self._syncer = None
+        if self.fsync:
+            self._syncer = threading.Thread(target=self._sync_run, name="write-behind-fsync", daemon=True)
+            self._syncer.start()
+        atexit.register(self.close)
+
+    # ── Public API ────────────────────────────────────────────
+
+    def append(self, collection: str, data: Dict, block: bool = True) -> str:
+        """
+        Queue a new document; returns its (pre-allocated) id. Costs a JSON
+        round-trip and a buffered journal write – no fsync – so the async
+        wrapper calls it directly on the event loop.
+        """
+        line = json.dumps(data)   # TypeError for values that cannot be journaled
+        data = json.loads(line)   # commit exactly what was journaled, not the caller's dict
+        doc_id = self._new_id(collection)
+        with self._lock:
+            if self._stopped:
+                raise RuntimeError("write-behind queue is closed")
+            if len(self._pending) >= self.max_pending:
+                if not block:
+                    raise QueueFull()
+                self._wait_for_room()
+            self._journal.write(json.dumps({"c": collection, "id": doc_id}) + "\t" + line + "\n")
+            self._journal_written()
+            self._pending.append((collection, doc_id, data, 0))
+            self.stats["appended"] += 1
+            if len(self._pending) >= self.flush_size:
+                self._wake.notify()
+        return doc_id
+
+    def _wait_for_room(self) -> None:
+        """Back-pressure: wait for the flusher to drain the backlog. Caller holds the lock."""
+        self.stats["backpressure_waits"] += 1
+        deadline = time.monotonic() + self.max_wait
+        while len(self._pending) >= self.max_pending and not self._stopped:
+            self._wake.notify()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RuntimeError("write-behind queue is full")
+            self._drained.wait(remaining)
+        if self._stopped:
+            raise RuntimeError("write-behind queue is closed")
+
+    def flush(self) -> Dict:
+        """Commit everything queued so far. Failed ops stay queued (and journaled)."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    self._failures = 0
+                    return {"written": 0, "failed": []}
+                ops, self._pending = self._pending, []
+                old_segment = self._rotate()
+                self._drained.notify_all()
+
+            try:
+                result = self._commit([("set", c, doc_id, data) for c, doc_id, data, _ in ops])
+                failed_idx = {f["index"] for f in result["failed"]}
+            except Exception as e:
+                print(f"⚠️  Write-behind flush failed, will retry: {e}")
+                result, failed_idx = {"written": 0, "failed": []}, set(range(len(ops)))
+
+            retry, dead = [], []
+            for i in sorted(failed_idx):
+                c, doc_id, data, attempts = ops[i]
+                (dead if attempts + 1 >= self.max_attempts else retry).append((c, doc_id, data, attempts + 1))
+            with self._lock:
+                if dead:
+                    self._dead_letter(dead)
+                if retry:
+                    # Carry failures into the live segment before dropping the old one
+                    self._write_journal(retry)
+                    self._pending[:0] = retry
+                self._failures = self._failures + 1 if failed_idx else 0
+                self.stats["flushed"] += len(ops) - len(failed_idx)
+                self.stats["failed"]  += len(failed_idx)
+                self.stats["flushes"] += 1
+            if retry:
+                self._fsync_journal()      # the retries must be on disk before their old segment goes
+            self._discard(old_segment)
+            return result
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def close(self) -> None:
+        """Stop the flusher and commit what is left (called on shutdown / exit)."""
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            self._wake.notify()
+            self._drained.notify_all()
+            self._dirty.notify()
+        self._thread.join(timeout=self.flush_interval + 5)
+        if self._syncer is not None:
+            self._syncer.join(timeout=5)
+        self.flush()
+        with self._lock:
+            if self._unsynced:
+                os.fsync(self._journal.fileno())
+                self._unsynced = False
+            self._journal.close()
+            if self._dead is not None:
+                self._dead.close()
+            clean = not self._pending
+        if clean:
+            shutil.rmtree(self._dir, ignore_errors=True)
+        self._owner.close()
+
+    # ── Background flusher ────────────────────────────────────
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if self._stopped:
+                    return
+                if self._failures:
+                    # Back off after failed commits instead of spinning on the retries
+                    self._wake.wait(min(self.flush_interval * 2 ** self._failures, MAX_BACKOFF))
+                elif len(self._pending) < self.flush_size:
+                    self._wake.wait(self.flush_interval)
+                if self._stopped:
+                    return
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️  Write-behind flusher error: {e}")
+
+    def _sync_run(self) -> None:
+        """
+        Group commit: fsync everything written since the last fsync. Appends
+        arriving during an fsync are covered by the next one.
+        """
+        while True:
+            with self._lock:
+                while not self._unsynced and not self._stopped:
+                    self._dirty.wait()
+                if not self._unsynced:
+                    return
+            self._fsync_journal()
+
+    def _fsync_journal(self) -> None:
+        """
+        fsync the live segment without holding the lock. The fd is duplicated
+        under the lock so a concurrent segment rotation cannot close it mid-fsync.
+        """
+        with self._lock:
+            if not self._unsynced:
+                return
+            self._unsynced = False
+            fd = os.dup(self._journal.fileno())
+        try:
+            os.fsync(fd)
+            self.stats["fsyncs"] += 1
+        except OSError as e:
+            print(f"⚠️  Write-behind journal fsync failed: {e}")
+        finally:
+            os.close(fd)
+
+    # ── Journal ───────────────────────────────────────────────
+
+    def _segment_path(self, n: int) -> Path:
+        return self._dir / f"journal.{n:08d}.log"
+
+    def _segments(self) -> List[Path]:
+        return sorted(self._dir.glob("journal.*.log"))
+
+    def _leftovers(self) -> Tuple[List[Path], List[Tuple[Optional[Path], object]]]:
+        """
+        Segments to replay: our own directory (a previous process with this pid),
+        segments from the old single-directory layout, and the directories of
+        workers that are gone (their lock is free). Adopted locks stay held
+        until the directory has been removed.
+        """
+        segments = self._segments()
+        adopted = []
+        legacy = sorted(self._root.glob("journal.*.log"))
+        if legacy:
+            lock = _lock_file(self._root / "legacy.lock")
+            if lock is not None:
+                adopted.append((None, lock))
+                segments += legacy
+        if fcntl is not None:
+            for directory in sorted(self._root.glob("w-*")):
+                if directory == self._dir or not directory.is_dir():
+                    continue
+                lock = _lock_file(directory / "lock")
+                if lock is None:
+                    continue          # owned by a live worker
+                adopted.append((directory, lock))
+                segments += sorted(directory.glob("journal.*.log"))
+        return segments, adopted
+
+    def _next_segment_no(self) -> int:
+        segments = self._segments()
+        return int(segments[-1].name.split(".")[1]) + 1 if segments else 1
+
+    def _open_segment(self):
+        f = open(self._segment_path(self._segment_no), "a", encoding="utf-8")
+        if self.fsync:
+            _fsync_dir(self._dir)
+        return f
+
+    def _rotate(self) -> Path:
+        """Start a new segment; returns the one that was active. Caller holds the lock."""
+        old = self._segment_path(self._segment_no)
+        self._journal.close()
+        self._segment_no += 1
+        self._journal = self._open_segment()
+        return old
+
+    def _journal_written(self) -> None:
+        """Hand buffered journal lines to the OS and wake the syncer. Caller holds the lock."""
+        self._journal.flush()
+        if self.fsync:
+            self._unsynced = True
+            self._dirty.notify()
+
+    def _write_journal(self, ops: List[Op]) -> None:
+        for collection, doc_id, data, attempts in ops:
+            self._journal.write(json.dumps({"c": collection, "id": doc_id, "n": attempts}) + "\t"
+                                + json.dumps(data) + "\n")
+        self._journal_written()
+
+    def _dead_letter(self, ops: List[Op]) -> None:
+        """Park ops that failed max_attempts times. Caller holds the lock."""
+        if self._dead is None:
+            self._dead = open(self._dead_path, "a", encoding="utf-8")
+        for collection, doc_id, data, attempts in ops:
+            self._dead.write(json.dumps({"c": collection, "id": doc_id, "n": attempts}) + "\t"
+                             + json.dumps(data) + "\n")
+        self._dead.flush()
+        os.fsync(self._dead.fileno())
+        self.stats["dead_lettered"] += len(ops)
+        print(f"☠️  Write-behind: {len(ops)} writes failed {self.max_attempts} times → {self._dead_path}")
+
+    @staticmethod
+    def _discard(segment: Path) -> None:
+        try:
+            segment.unlink()
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _recover(segments: List[Path]) -> List[Op]:
+        """Load ops from segments left by a previous process (last write per id wins)."""
+        recovered: Dict[Tuple[str, str], Tuple[Dict, int]] = {}
+        for segment in segments:
+            with open(segment, encoding="utf-8") as f:
+                for line in f:
+                    head, sep, body = line.rstrip("\n").partition("\t")
+                    if not sep:
+                        continue          # torn write from a crash
+                    try:
+                        meta, data = json.loads(head), json.loads(body)
+                    except ValueError:
+                        continue
+                    recovered[(meta["c"], meta["id"])] = (data, meta.get("n", 0))
+        if recovered:
+            print(f"♻️  Write-behind: replaying {len(recovered)} journaled writes")
+        return [(c, doc_id, data, n) for (c, doc_id), (data, n) in recovered.items()]
+
+
+def queue_config_from_env() -> Optional[Dict]:
+    """None unless WRITE_BEHIND_COLLECTIONS is set (opt-in)."""
+    collections = [c.strip() for c in os.getenv("WRITE_BEHIND_COLLECTIONS", "").split(",") if c.strip()]
+    if not collections:
+        return None
+    return {
+        "collections":    set(collections),
+        "journal_dir":    os.getenv("WRITE_BEHIND_JOURNAL", "write_behind_journal"),
+        "flush_size":     int(os.getenv("WRITE_BEHIND_FLUSH_SIZE", DEFAULT_FLUSH_SIZE)),
+        "flush_interval": float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL)),
+        "max_pending":    int(os.getenv("WRITE_BEHIND_MAX_PENDING", DEFAULT_MAX_PENDING)),
+        "max_attempts":   int(os.getenv("WRITE_BEHIND_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)),
+        "fsync":          os.getenv("WRITE_BEHIND_FSYNC", "1").strip().lower() not in ("0", "false", "no", "off"),
+    }
@@ -0,0 +1,138 @@
+"""
+WASTE IQ – Category Mapping Microbenchmark
+Per-call cost of the Phase 2 name → category lookups in waste_classifier,
+against the previous implementation (kept below as the reference):
+
+  map_to_category   – _map_to_category's local lookup (no learned-name cache,
+                      no Gemini), uncached and with the memo warm
+  imagenet_match    – _yolo_classify step 1 (key in label or label in key)
+  waste_keyword     – _yolo_classify step 2 (WASTE_MAP key in label)
+
+Every name is checked for an identical result before timing.
+
+  python benchmarks/category_mapping.py
+  python benchmarks/category_mapping.py --names 20000 --repeat 5
+"""
+
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import waste_classifier as wc  # noqa: E402
+
+
+# ─────────────────────────────────────────────────────────────
+# Reference (previous) implementation
+# ─────────────────────────────────────────────────────────────
+
+def legacy_map_to_category(object_name: str) -> str:
+    from rapidfuzz import process, fuzz
+
+    obj_lower = object_name.lower().strip()
+    if obj_lower in wc.WASTE_MAP:
+        return wc.WASTE_MAP[obj_lower]
+    match = process.extractOne(obj_lower, list(wc.WASTE_MAP.keys()),
+                               scorer=fuzz.WRatio, score_cutoff=75)
+    if match:
+        return wc.WASTE_MAP[match[0]]
+    for keyword, category in wc.WASTE_MAP.items():
+        if keyword in obj_lower:
+            return category
+    for keyword, category in wc.WASTE_MAP.items():
+        if obj_lower in keyword:
+            return category
+    return "General Waste"
+
+
+def legacy_imagenet_match(label: str):
+    for key in wc._IMAGENET_WASTE:
+        if key in label or label in key:
+            return key
+    return None
+
+
+def legacy_waste_keyword(label: str):
+    for keyword in wc.WASTE_MAP:
+        if keyword in label:
+            return keyword
+    return None
+
+
+# ─────────────────────────────────────────────────────────────
+# Workload
+# ─────────────────────────────────────────────────────────────
+
+UNKNOWN = ["golden retriever", "zebra", "volcano", "traffic light", "umbrella", "guitar",
+           "Unable to identify object", "sunglasses", "teddy bear", "pizza slice"]
+
+
+def make_names(n: int, rng: random.Random) -> list:
+    """Detector-style names: exact keys, ImageNet labels, variants, typos and unknowns."""
+    keys = list(wc.WASTE_MAP) + list(wc._IMAGENET_WASTE)
+    names = []
+    while len(names) < n:
+        key = rng.choice(keys)
+        kind = rng.randrange(6)
+        if kind == 0:
+            names.append(key.title())
+        elif kind == 1:
+            names.append(f"crushed {key}, {rng.choice(keys)}")
+        elif kind == 2 and len(key) > 3:
+            i = rng.randrange(len(key))
+            names.append(key[:i] + rng.choice(string.ascii_lowercase) + key[i + 1:])
+        elif kind == 3:
+            names.append(key[:max(2, len(key) // 2)])
+        elif kind == 4:
+            names.append(rng.choice(UNKNOWN))
+        else:
+            names.append(f"{rng.choice(UNKNOWN)} {key}")
+    return names
+
+
+def _time(fn, names, repeat: int) -> float:
+    """Best-of-repeat microseconds per call."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for name in names:
+            fn(name)
+        best = min(best, time.perf_counter() - start)
+    return best / len(names) * 1e6
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--names", type=int, default=5000)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    names = make_names(args.names, random.Random(args.seed))
+    labels = [n.lower() for n in names]
+    uncached = wc._local_category.__wrapped__
+    cases = [
+        ("map_to_category", legacy_map_to_category,
+         lambda n: uncached(n.lower().strip()) or "General Waste", names),
+        ("  memoized",      legacy_map_to_category,
+         lambda n: wc._local_category(n.lower().strip()) or "General Waste", names),
+        ("imagenet_match",  legacy_imagenet_match,  wc._IMAGENET_MATCHER.first_either, labels),
+        ("waste_keyword",   legacy_waste_keyword,   wc._WASTE_MATCHER.first_in, labels),
+    ]
+
+    print(f"WASTE IQ category mapping — {len(names)} names, best of {args.repeat}")
+    print(f"  {'lookup':<18}{'before µs':>12}{'after µs':>12}{'speedup':>10}")
+    for label, before, after, inputs in cases:
+        diff = [n for n in inputs if before(n) != after(n)]
+        if diff:
+            sys.exit(f"❌ {label}: {len(diff)} results differ, e.g. {diff[:3]}")
+        t_before, t_after = _time(before, inputs, args.repeat), _time(after, inputs, args.repeat)
+        print(f"  {label:<18}{t_before:>12.2f}{t_after:>12.2f}{t_before / t_after:>9.1f}×")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,470 @@
+"""
+WASTE IQ – Integration Benchmark Harness
+Seeds a synthetic city into the Firestore emulator (or an in-process
+backend), drives every router endpoint through the real FastAPI app and
+reports, per endpoint:
+
+  p50 / p95 / p99 latency, Firestore reads and writes per request
+  (counted at the storage backend, i.e. after the doc/query caches),
+  error count, and the process's peak RSS.
+
+  python benchmarks/harness.py                                   # memory, small city
+  python benchmarks/harness.py --wards 50 --bins 20000 --waste-logs 2000000
+  python benchmarks/harness.py --target emulator --start-emulator
+  python benchmarks/harness.py --json after.json --compare before.json
+
+Documents are built with the seed_firestore.py *_doc helpers. Users exist
+only as Firestore profiles; requests carry ID tokens minted by the stand-in
+issuer (AUTH_VERIFIER=stand-in, see backend/token_verifier.py), so the real
+get_current_user / require_roles chain runs without network. /auth/signup and
+/auth/users talk to Firebase Auth and only run when FIREBASE_AUTH_EMULATOR_HOST
+is set. External APIs (ORS, Gemini) are disabled unless --keep-api-keys.
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT        = Path(__file__).resolve().parent.parent
+BACKEND_DIR = ROOT / "backend"
+TEST_IMAGE  = ROOT / "test.jpg"
+
+# Kozhikode city centre; bins are scattered around it
+CITY_LAT, CITY_LNG, CITY_SPREAD = 11.2588, 75.7804, 0.08
+SEED_CHUNK = 5000
+
+READ_METHODS  = ("get_doc", "get_docs", "query", "query_page", "aggregate")
+WRITE_METHODS = ("set_doc", "add_doc", "update_doc", "delete_doc", "increment_field", "commit_batch")
+
+
+# ─────────────────────────────────────────────────────────────
+# Environment
+# ─────────────────────────────────────────────────────────────
+
+def configure_env(args) -> None:
+    """Must run before anything from backend/ is imported."""
+    if args.target == "emulator":
+        os.environ["STORAGE_BACKEND"] = "firestore"
+        os.environ["FIRESTORE_EMULATOR_HOST"] = args.emulator_host
+        os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "wasteiq-bench")
+    else:
+        os.environ["STORAGE_BACKEND"] = args.target
+        if args.target == "sqlite":
+            os.environ["SQLITE_DB_PATH"] = str(Path(tempfile.mkdtemp()) / "bench.db")
+    os.environ["AUTH_VERIFIER"] = "stand-in"
+    # Every classify request uploads the same test.jpg – measure the pipeline, not the image cache
+    os.environ.setdefault("IMAGE_CACHE_SIZE", "0")
+    if not args.keep_api_keys:
+        os.environ["ORS_API_KEY"] = ""
+        os.environ["GEMINI_API_KEY"] = ""
+    sys.path.insert(0, str(BACKEND_DIR))
+    sys.path.insert(0, str(ROOT))
+    os.chdir(BACKEND_DIR)   # models are loaded relative to backend/
+
+
+def start_emulator(host: str, timeout: float = 60.0) -> subprocess.Popen:
+    if not shutil.which("gcloud"):
+        raise SystemExit("gcloud not found – start the emulator yourself and drop --start-emulator")
+    proc = subprocess.Popen(["gcloud", "emulators", "firestore", "start", f"--host-port={host}"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    hostname, port = host.rsplit(":", 1)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((hostname, int(port)), timeout=1):
+                return proc
+        except OSError:
+            time.sleep(0.5)
+    proc.kill()
+    raise SystemExit(f"Firestore emulator did not come up on {host}")
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+# ─────────────────────────────────────────────────────────────
+# Read / write accounting
+# ─────────────────────────────────────────────────────────────
+
+class CountingBackend:
+    """
+    Wraps the active StorageBackend and counts billable operations:
+    one read per document returned (at least one per query or get, as
+    Firestore bills), one per aggregation, one write per document written.
+    """
+
+    def __init__(self, inner):
+        self._inner = inner
+        self._lock  = threading.Lock()
+        self.reads  = 0
+        self.writes = 0
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        method = name[1:] if name.startswith("a") and name[1:] in READ_METHODS + WRITE_METHODS else name
+        if method not in READ_METHODS + WRITE_METHODS:
+            return attr
+        if name != method:
+            async def counted_async(*args, **kwargs):
+                result = await attr(*args, **kwargs)
+                self._count(method, args, kwargs, result)
+                return result
+            return counted_async
+
+        def counted(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            self._count(method, args, kwargs, result)
+            return result
+        return counted
+
+    def _count(self, method, args, kwargs, result) -> None:
+        if method in ("query", "query_page"):
+            reads, writes = max(len(result), 1), 0
+        elif method == "get_docs":
+            reads, writes = max(len(args[1] if len(args) > 1 else kwargs["doc_ids"]), 1), 0
+        elif method in READ_METHODS:
+            reads, writes = 1, 0
+        elif method == "commit_batch":
+            reads, writes = 0, len(args[0] if args else kwargs["ops"])
+        else:
+            reads, writes = 0, 1
+        with self._lock:
+            self.reads  += reads
+            self.writes += writes
+
+    def take(self):
+        """(reads, writes) since the last call."""
+        with self._lock:
+            counts = (self.reads, self.writes)
+            self.reads = self.writes = 0
+        return counts
+
+
+# ─────────────────────────────────────────────────────────────
+# Synthetic city
+# ─────────────────────────────────────────────────────────────
+
+def _write_chunked(fc, ops, label: str) -> None:
+    total, failed = len(ops), 0
+    for start in range(0, total, SEED_CHUNK):
+        failed += len(fc.batch_write(ops[start:start + SEED_CHUNK])["failed"])
+        print(f"\r  {label}: {min(start + SEED_CHUNK, total)}/{total}", end="", flush=True)
+    print(f"  ✗ {failed} failed" if failed else "")
+
+
+def seed_city(fc, seed, args, rng: random.Random) -> dict:
+    """Write the city through firestore_client.batch_write; returns the ids the scenarios use."""
+    now = datetime.now(timezone.utc)
+    ward_ids = [f"WARD_{i:03d}" for i in range(1, args.wards + 1)]
+
+    def uid(role, i):
+        return f"bench-{role}-{i:05d}"
+
+    roles = {"admin": 1, "municipal": args.wards, "driver": args.drivers, "household": args.households}
+    users = {role: [uid(role, i) for i in range(n)] for role, n in roles.items()}
+    user_ops = []
+    for role, uids in users.items():
+        for i, u in enumerate(uids):
+            ward = None if role == "admin" else ward_ids[i % len(ward_ids)]
+            user_ops.append(("set", "users", u,
+                             seed.profile_doc(u, f"{u}@bench.wasteiq", f"{role.title()} {i}", role, ward)))
+            user_ops.append(("set", "gamification", u, seed.gamification_doc(u, rng.randint(0, 2000))))
+
+    print(f"🌱 Seeding {args.wards} wards, {args.bins} bins, {args.waste_logs} waste logs, "
+          f"{args.complaints} complaints, {args.predictions} predictions, {len(user_ops) // 2} users")
+    started = time.perf_counter()
+    _write_chunked(fc, [("set", "wards", w, {"ward_id": w, "name": f"Ward {w[-3:]}", "city": "Kozhikode",
+                                              "population": rng.randint(5000, 20000),
+                                              "population_density": rng.randint(3000, 12000)})
+                        for w in ward_ids], "wards")
+    _write_chunked(fc, user_ops, "users")
+
+    bin_ids, bin_ops = [], []
+    for i in range(args.bins):
+        bid = str(uuid.UUID(int=rng.getrandbits(128)))
+        bin_ids.append(bid)
+        doc = seed.bin_doc(bid, ward_ids[i % len(ward_ids)],
+                           CITY_LAT + rng.uniform(-CITY_SPREAD, CITY_SPREAD),
+                           CITY_LNG + rng.uniform(-CITY_SPREAD, CITY_SPREAD),
+                           f"Bench Street {i}", round(rng.uniform(0, 100), 1),
+                           users["driver"][i % len(users["driver"])])
+        bin_ops.append(("set", "bins", bid, doc))
+    _write_chunked(fc, bin_ops, "bins")
+    del bin_ops
+
+    # Waste logs are generated chunk by chunk – 2M documents never sit in one list
+    written = 0
+    while written < args.waste_logs:
+        n = min(SEED_CHUNK, args.waste_logs - written)
+        ops = []
+        for _ in range(n):
+            obj, cat, conf = rng.choice(seed.WASTE_SAMPLES)
+            ts = (now - timedelta(minutes=rng.randint(0, 90 * 24 * 60))).isoformat()
+            ops.append(("add", "waste_logs", None,
+                        seed.waste_log_doc(rng.choice(users["household"]), obj, cat, conf, ts)))
+        fc.batch_write(ops)
+        written += n
+        print(f"\r  waste_logs: {written}/{args.waste_logs}", end="", flush=True)
+    print()
+
+    complaint_ids, complaint_ops = [], []
+    for i in range(args.complaints):
+        cid = str(uuid.UUID(int=rng.getrandbits(128)))
+        complaint_ids.append(cid)
+        status = rng.choice(["open", "open", "in_review", "resolved", "closed"])
+        complaint_ops.append(("set", "complaints", cid, seed.complaint_doc(
+            cid, f"Bench complaint {i}", "Synthetic complaint for benchmarking.",
+            ward_ids[i % len(ward_ids)], rng.choice(users["household"]), status,
+            (now - timedelta(hours=rng.randint(0, 24 * 60))).isoformat())))
+    _write_chunked(fc, complaint_ops, "complaints")
+
+    prediction_ops = []
+    for _ in range(args.predictions):
+        p = rng.random()
+        prediction_ops.append(("add", "overflow_predictions", None, {
+            "bin_id":               rng.choice(bin_ids),
+            "overflow_probability": round(p, 4),
+            "risk_level":           "High" if p >= 0.7 else "Medium" if p >= 0.4 else "Low",
+            "hours_to_overflow":    round(rng.uniform(0, 72), 1),
+            "predicted_at":         (now - timedelta(minutes=rng.randint(0, 7 * 24 * 60))).isoformat(),
+        }))
+    _write_chunked(fc, prediction_ops, "overflow_predictions")
+
+    print(f"✅ Seeded in {time.perf_counter() - started:.1f}s, peak RSS {peak_rss_mb():.0f} MB")
+    return {"wards": ward_ids, "users": users, "bins": bin_ids, "complaints": complaint_ids}
+
+
+# ─────────────────────────────────────────────────────────────
+# Scenarios
+# ─────────────────────────────────────────────────────────────
+# name → (role, heavy, build(city, rng, state) → (method, path, request kwargs))
+
+def _bin_payload(city, rng):
+    return {"ward_id": rng.choice(city["wards"]),
+            "location": {"lat": CITY_LAT + rng.uniform(-CITY_SPREAD, CITY_SPREAD),
+                         "lng": CITY_LNG + rng.uniform(-CITY_SPREAD, CITY_SPREAD)},
+            "fill_level": round(rng.uniform(0, 100), 1),
+            "assigned_driver": rng.choice(city["users"]["driver"])}
+
+
+def _delete_bin(city, rng, state):
+    created = state.setdefault("created_bins", [])
+    return "DELETE", f"/bins/{created.pop() if created else rng.choice(city['bins'])}", {}
+
+
+SCENARIOS = {
+    "health":                 (None, False, lambda c, r, s: ("GET", "/health", {})),
+    "auth.me":                ("household", False, lambda c, r, s: ("GET", "/auth/me", {})),
+    "auth.update_me":         ("household", False, lambda c, r, s: ("PATCH", "/auth/me", {"json": {"language": "en"}})),
+    "bins.list_ward":         ("municipal", False, lambda c, r, s: ("GET", "/bins/", {"params": {"ward_id": r.choice(c["wards"])}})),
+    "bins.list_driver":       ("driver", False, lambda c, r, s: ("GET", "/bins/", {})),
+    "bins.get":               ("household", False, lambda c, r, s: ("GET", f"/bins/{r.choice(c['bins'])}", {})),
+    "bins.create":            ("municipal", False, lambda c, r, s: ("POST", "/bins/", {"json": _bin_payload(c, r)})),
+    "bins.import":            ("municipal", False, lambda c, r, s: ("POST", "/bins/import", {"json": [_bin_payload(c, r) for _ in range(20)]})),
+    "bins.update":            ("municipal", False, lambda c, r, s: ("PATCH", f"/bins/{r.choice(c['bins'])}", {"json": {"fill_level": round(r.uniform(0, 100), 1)}})),
+    "bins.collected":         ("driver", False, lambda c, r, s: ("POST", f"/bins/{r.choice(c['bins'])}/collected", {"json": {"driver_uid": "-", "notes": "bench"}})),
+    "bins.delete":            ("admin", False, _delete_bin),
+    "classify.image":         ("household", True, lambda c, r, s: ("POST", "/classify/", {"files": {"file": ("test.jpg", TEST_IMAGE.read_bytes(), "image/jpeg")}})),
+    # Trailing byte after the JPEG end marker: same picture, distinct uploads (no in-batch dedupe)
+    "classify.batch":         ("household", True, lambda c, r, s: ("POST", "/classify/batch", {"files": [
+        ("files", (f"test{i}.jpg", TEST_IMAGE.read_bytes() + bytes([i]), "image/jpeg")) for i in range(8)]})),
+    "classify.history":       ("household", False, lambda c, r, s: ("GET", "/classify/history", {})),
+    "classify.stats":         ("household", False, lambda c, r, s: ("GET", "/classify/stats", {})),
+    "complaints.submit":      ("household", False, lambda c, r, s: ("POST", "/complaints/", {"json": {"title": "Bench", "description": "Synthetic complaint.", "ward_id": r.choice(c["wards"])}})),
+    "complaints.list":        ("municipal", False, lambda c, r, s: ("GET", "/complaints/", {"params": {"ward_id": r.choice(c["wards"])}})),
+    "complaints.resolve":     ("municipal", False, lambda c, r, s: ("PATCH", f"/complaints/{r.choice(c['complaints'])}/resolve", {"json": {"resolution": "Bench resolution"}})),
+    "complaints.stats":       ("municipal", False, lambda c, r, s: ("GET", "/complaints/stats", {"params": {"ward_id": r.choice(c["wards"])}})),
+    "gamification.me":        ("household", False, lambda c, r, s: ("GET", "/gamification/me", {})),
+    "gamification.leaderboard": ("household", False, lambda c, r, s: ("GET", "/gamification/leaderboard", {})),
+    "gamification.rewards":   ("household", False, lambda c, r, s: ("GET", "/gamification/rewards", {})),
+    "overflow.predict":       ("municipal", False, lambda c, r, s: ("POST", "/overflow/predict", {"json": {"bin_id": r.choice(c["bins"]), "fill_level": round(r.uniform(0, 100), 1), "hours_since_last": r.uniform(0, 72), "population_density": 8500.0}})),
+    "overflow.predict_batch": ("municipal", True, lambda c, r, s: ("POST", "/overflow/predict-batch", {"params": {"ward_id": r.choice(c["wards"])}})),
+    "overflow.history":       ("municipal", False, lambda c, r, s: ("GET", "/overflow/history", {"params": {"bin_id": r.choice(c["bins"])}})),
+    "overflow.high_risk":     ("municipal", False, lambda c, r, s: ("GET", "/overflow/high-risk", {})),
+    "reports.city_summary":   ("municipal", False, lambda c, r, s: ("GET", "/reports/city-summary", {})),
+    "reports.export_csv":     ("municipal", True, lambda c, r, s: ("GET", "/reports/export-csv", {"params": {"report_type": "waste_logs"}})),
+    "reports.export_pdf":     ("municipal", True, lambda c, r, s: ("GET", "/reports/export-pdf", {})),
+    "routing.optimize":       ("driver", False, lambda c, r, s: ("GET", "/routing/optimize", {})),
+    "routing.optimize_driver": ("municipal", False, lambda c, r, s: ("GET", f"/routing/optimize/{r.choice(c['users']['driver'])}", {})),
+    "routing.collect":        ("driver", False, lambda c, r, s: ("POST", f"/routing/collect/{r.choice(c['bins'])}", {"params": {"notes": "bench"}})),
+    "routing.stats":          ("driver", False, lambda c, r, s: ("GET", "/routing/stats", {})),
+}
+
+# Firebase Auth endpoints – need the Auth emulator
+AUTH_SCENARIOS = {
+    "auth.signup": (None, False, lambda c, r, s: ("POST", "/auth/signup", {"json": {
+        "email": f"bench-{uuid.uuid4().hex[:12]}@bench.wasteiq", "password": "bench1234", "name": "Bench"}})),
+    "auth.users":  ("admin", False, lambda c, r, s: ("GET", "/auth/users", {})),
+}
+
+
+def _percentile(sorted_ms, q: float) -> float:
+    if len(sorted_ms) == 1:
+        return sorted_ms[0]
+    return statistics.quantiles(sorted_ms, n=100, method="inclusive")[int(q) - 1]
+
+
+def run_scenarios(client, fc, points, counter, city, tokens, args, rng) -> dict:
+    scenarios = dict(SCENARIOS)
+    if os.getenv("FIREBASE_AUTH_EMULATOR_HOST"):
+        scenarios.update(AUTH_SCENARIOS)
+    if not TEST_IMAGE.exists():
+        scenarios.pop("classify.image")
+        scenarios.pop("classify.batch")
+    if args.only:
+        scenarios = {k: v for k, v in scenarios.items() if any(k.startswith(p) for p in args.only)}
+
+    state, results = {}, {}
+    for name, (role, heavy, build) in scenarios.items():
+        runs = args.heavy_requests if heavy else args.requests
+        latencies, reads, writes, errors, statuses = [], 0, 0, 0, {}
+        for i in range(args.warmup + runs):
+            headers = {"Authorization": f"Bearer {tokens[rng.choice(city['users'][role])]}"} if role else {}
+            method, path, kwargs = build(city, rng, state)
+            counter.take()
+            start = time.perf_counter()
+            resp = client.request(method, path, headers=headers, **kwargs)
+            elapsed = time.perf_counter() - start
+            # Deferred writes (write-behind, coalesced points) belong to this request
+            fc.flush_write_behind()
+            points.flush_points()
+            r, w = counter.take()
+            if name == "bins.create" and resp.status_code == 200:
+                state.setdefault("created_bins", []).append(resp.json()["data"]["bin_id"])
+            if i < args.warmup:
+                continue
+            latencies.append(elapsed * 1000)
+            reads, writes = reads + r, writes + w
+            statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+            errors += resp.status_code >= 400
+        ms = sorted(latencies)
+        results[name] = {
+            "requests":        len(ms),
+            "p50_ms":          round(_percentile(ms, 50), 2),
+            "p95_ms":          round(_percentile(ms, 95), 2),
+            "p99_ms":          round(_percentile(ms, 99), 2),
+            "reads_per_req":   round(reads / len(ms), 1),
+            "writes_per_req":  round(writes / len(ms), 1),
+            "errors":          errors,
+            "statuses":        statuses,
+        }
+        print(f"  {name:<26} {results[name]['p50_ms']:>9.1f} ms p50", flush=True)
+    return results
+
+
+# ─────────────────────────────────────────────────────────────
+# Report
+# ─────────────────────────────────────────────────────────────
+
+def print_report(report: dict, baseline: dict = None) -> None:
+    base = (baseline or {}).get("endpoints", {})
+    print(f"\n{'endpoint':<26} {'n':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'reads':>8} {'writes':>7} {'err':>4}" + ("   Δp50      Δreads" if base else ""))
+    for name, r in report["endpoints"].items():
+        line = (f"{name:<26} {r['requests']:>4} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+                f"{r['p99_ms']:>9.1f} {r['reads_per_req']:>8.1f} {r['writes_per_req']:>7.1f} {r['errors']:>4}")
+        b = base.get(name)
+        if b:
+            dp = (r["p50_ms"] - b["p50_ms"]) / b["p50_ms"] * 100 if b["p50_ms"] else 0.0
+            line += f"  {dp:+6.1f}%  {r['reads_per_req'] - b['reads_per_req']:+9.1f}"
+        print(line)
+    print(f"\npeak RSS: {report['peak_rss_mb']:.0f} MB (after seeding {report['seed_rss_mb']:.0f} MB)")
+    if baseline:
+        print(f"baseline peak RSS: {baseline['peak_rss_mb']:.0f} MB")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--target", default="memory", choices=["memory", "sqlite", "emulator"])
+    ap.add_argument("--emulator-host", default=os.getenv("FIRESTORE_EMULATOR_HOST", "localhost:8080"))
+    ap.add_argument("--start-emulator", action="store_true", help="spawn `gcloud emulators firestore start`")
+    ap.add_argument("--wards", type=int, default=5)
+    ap.add_argument("--bins", type=int, default=500)
+    ap.add_argument("--waste-logs", type=int, default=10000)
+    ap.add_argument("--complaints", type=int, default=500)
+    ap.add_argument("--predictions", type=int, default=2000)
+    ap.add_argument("--drivers", type=int, default=10)
+    ap.add_argument("--households", type=int, default=200)
+    ap.add_argument("--requests", type=int, default=50, help="measured requests per endpoint")
+    ap.add_argument("--heavy-requests", type=int, default=5, help="for exports, predict-batch, classify")
+    ap.add_argument("--warmup", type=int, default=2)
+    ap.add_argument("--only", nargs="*", help="endpoint name prefixes, e.g. bins reports.city")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--keep-api-keys", action="store_true", help="allow ORS / Gemini calls")
+    ap.add_argument("--json", help="write the report here")
+    ap.add_argument("--compare", help="baseline report (--json of an earlier run)")
+    ap.add_argument("--index-report", help="record query shapes and write the index advisor report here")
+    args = ap.parse_args()
+    # configure_env changes directory – pin report paths first
+    args.json = args.json and str(Path(args.json).resolve())
+    args.compare = args.compare and str(Path(args.compare).resolve())
+    args.index_report = args.index_report and str(Path(args.index_report).resolve())
+
+    configure_env(args)
+    emulator = start_emulator(args.emulator_host) if args.target == "emulator" and args.start_emulator else None
+    try:
+        import seed_firestore as seed
+        import firestore_client as fc
+        import points
+        import index_advisor
+        import main as app_main
+        import token_verifier
+        from fastapi.testclient import TestClient
+
+        counter = CountingBackend(fc.get_backend())
+        fc.set_backend(counter)
+        rng = random.Random(args.seed)
+        city = seed_city(fc, seed, args, rng)
+        seed_rss = peak_rss_mb()
+
+        authority = token_verifier.stand_in()
+        tokens = {uid: authority.mint(uid, role=role, email=f"{uid}@bench.wasteiq", ttl=12 * 3600)
+                  for role, uids in city["users"].items() for uid in uids}
+        print(f"\n🏁 Driving endpoints ({args.requests} requests each, {args.heavy_requests} for heavy ones)")
+        if args.index_report:
+            index_advisor.start_recording()
+        with TestClient(app_main.app) as client:
+            counter.take()   # drop startup reads (registry load etc.)
+            endpoints = run_scenarios(client, fc, points, counter, city, tokens, args, rng)
+
+        report = {
+            "target":      args.target,
+            "city":        {k: getattr(args, k) for k in
+                            ("wards", "bins", "waste_logs", "complaints", "predictions", "drivers", "households")},
+            "at":          datetime.now(timezone.utc).isoformat(),
+            "endpoints":   endpoints,
+            "seed_rss_mb": round(seed_rss, 1),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        }
+        baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+        print_report(report, baseline)
+        if args.json:
+            Path(args.json).write_text(json.dumps(report, indent=2))
+            print(f"report written to {args.json}")
+        if args.index_report:
+            advice = index_advisor.report()
+            Path(args.index_report).write_text(json.dumps(advice, indent=2))
+            print(f"index advisor: {len(advice['missing'])} missing indexes → {args.index_report}")
+    finally:
+        if emulator is not None:
+            emulator.terminate()
+
+
+if __name__ == "__main__":
+    main()
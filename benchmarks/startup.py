@@ -0,0 +1,114 @@
+"""
+WASTE IQ – Startup Benchmark
+Measures cold `import main` time and time-to-first-request of the backend,
+each in a fresh interpreter so module caches never carry over.
+
+  python benchmarks/startup.py                    # STORAGE_BACKEND=memory
+  python benchmarks/startup.py --backend firestore --runs 5
+  python benchmarks/startup.py --importtime       # top imports by self time
+
+time-to-first-request = process spawn → first 200 from GET /health (uvicorn,
+startup event included, i.e. ML model loading).
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+
+def _env(backend: str) -> dict:
+    env = dict(os.environ)
+    env["STORAGE_BACKEND"] = backend
+    return env
+
+
+def time_import(backend: str) -> float:
+    """Seconds for `import main` in a new interpreter (interpreter start excluded)."""
+    code = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=_env(backend),
+                         capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_first_request(backend: str, timeout: float = 300.0) -> float:
+    """Seconds from spawning uvicorn to the first successful GET /health."""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/health"
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=_env(backend), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"uvicorn exited early:\n{proc.stderr.read().decode()[-2000:]}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.02)
+        raise TimeoutError(f"no response from {url} within {timeout}s")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def import_profile(backend: str, top: int = 15) -> list:
+    """(self_us, cumulative_us, module) for the slowest imports of main."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                         cwd=BACKEND_DIR, env=_env(backend), capture_output=True, text=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = (p.strip() for p in line[len("import time:"):].split("|"))
+        rows.append((int(self_us), int(cum_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def _summary(label: str, samples: list) -> None:
+    ms = [s * 1000 for s in samples]
+    print(f"{label:<24} median {statistics.median(ms):8.1f} ms   "
+          f"min {min(ms):8.1f}   max {max(ms):8.1f}   (n={len(ms)})")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--backend", default="memory", choices=["memory", "sqlite", "firestore"])
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--skip-server", action="store_true", help="only measure `import main`")
+    ap.add_argument("--importtime", action="store_true", help="print the slowest imports")
+    args = ap.parse_args()
+
+    print(f"WASTE IQ startup benchmark — STORAGE_BACKEND={args.backend}")
+    _summary("import main", [time_import(args.backend) for _ in range(args.runs)])
+    if not args.skip_server:
+        _summary("time-to-first-request", [time_first_request(args.backend) for _ in range(args.runs)])
+
+    if args.importtime:
+        print("\nslowest imports (self / cumulative ms):")
+        for self_us, cum_us, name in import_profile(args.backend):
+            print(f"  {self_us / 1000:8.1f} {cum_us / 1000:8.1f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,7 @@ import pandas as pd
 import folium
 from streamlit_folium import st_folium
 from utils import (
-    page_header, kpi_card, api_get, api_download, show_toast,
+    page_header, kpi_card, api_get, api_get_all, show_truncation, api_download, show_toast,
     BACKEND_URL, get_headers, time_greeting
 )
 import requests
@@ -21,7 +21,7 @@ def show():
 
     with st.spinner("Loading city-wide data..."):
         city_data      = api_get("/reports/city-summary")
-        bins_data      = api_get("/bins/")
+        bins_data      = api_get_all("/bins/")
         leaderboard    = api_get("/gamification/leaderboard", params={"limit": 10})
         overflow_data  = api_get("/overflow/high-risk")
 
@@ -29,6 +29,7 @@ def show():
     bins       = bins_data["data"]      if bins_data      else []
     lb_entries = leaderboard["data"]    if leaderboard    else []
     high_risk  = overflow_data["data"]  if overflow_data  else []
+    show_truncation(bins_data, "bins")
 
     # ── KPI Row ───────────────────────────────────────────────────────────
     c1, c2, c3, c4, c5 = st.columns(5)
@@ -191,7 +192,8 @@ def show():
 
     with user_col:
         st.markdown("#### 👥 User Management")
-        users_resp = api_get("/auth/users")
+        search = st.text_input("Search by email", placeholder="Email starts with…", key="user_search")
+        users_resp = api_get("/auth/users", params={"page_size": 15, "email_prefix": search or None})
         users = users_resp["data"] if users_resp else []
         if users:
             u_rows = [{
@@ -199,8 +201,9 @@ def show():
                 "Email": u.get("email","—"),
                 "Role":  u.get("role","household"),
                 "UID":   u.get("uid","")[:8],
-            } for u in users[:15]]
+            } for u in users]
             st.dataframe(pd.DataFrame(u_rows), use_container_width=True, hide_index=True)
+            st.caption(users_resp.get("message", ""))
 
             st.markdown("**Change User Role**")
             uid_input  = st.text_input("User UID (full)", placeholder="Paste full UID")
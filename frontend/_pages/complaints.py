@@ -2,7 +2,7 @@
 
 import streamlit as st
 import pandas as pd
-from utils import page_header, api_get, api_post, show_toast
+from utils import page_header, api_get_all, show_truncation, api_post, show_toast
 from languages import t
 
 
@@ -14,8 +14,9 @@ def show():
     # ── My Complaints ─────────────────────────────────────────────────────
     with tab_list:
         with st.spinner("Loading complaints..."):
-            data = api_get("/complaints/")
+            data = api_get_all("/complaints/")
         complaints = data["data"] if data else []
+        show_truncation(data, "complaints")
 
         if complaints:
             statuses = ["All"] + list({c.get("status", "open") for c in complaints})
@@ -9,7 +9,7 @@ import pandas as pd
 from datetime import datetime, timezone
 from utils import (
     page_header, kpi_card, category_chip,
-    api_get, api_post, show_toast, time_greeting, card_start, card_end
+    api_get, api_get_all, api_post, show_toast, time_greeting, card_start, card_end
 )
 from languages import t
 
@@ -25,7 +25,7 @@ def show():
         cls_data  = api_get("/classify/history",     params={"limit": 100})
         cls_stats = api_get("/classify/stats")
         gam_data  = api_get("/gamification/me")
-        comp_data = api_get("/complaints", params={"status": None})
+        comp_data = api_get_all("/complaints/")
 
     logs       = cls_data["data"]  if cls_data  else []
     gam        = gam_data["data"]  if gam_data  else {}
@@ -6,7 +6,7 @@ Single-process architecture (No FastAPI)
 import streamlit as st
 import requests
 import os
-from firebase_admin import auth as admin_auth
+from backend.firebase_app import firebase_auth
 from backend.firestore_client import set_doc, get_doc
 from languages import t, LANGUAGE_NAMES
 
@@ -154,7 +154,7 @@ def show_login():
                 else:
                     try:
                         # Create Firebase Auth user
-                        user = admin_auth.create_user(
+                        user = firebase_auth().create_user(
                             email=s_email,
                             password=s_password,
                             display_name=s_name,
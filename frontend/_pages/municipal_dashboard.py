@@ -4,7 +4,7 @@ import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
-from utils import page_header, kpi_card, api_get, show_toast, time_greeting
+from utils import page_header, kpi_card, api_get, api_get_all, show_truncation, show_toast, time_greeting
 from languages import t
 
 
@@ -17,8 +17,8 @@ def show():
     ward_id = st.session_state.get("ward_id")
 
     with st.spinner("Loading ward data..."):
-        bins_data      = api_get("/bins/",       params={"ward_id": ward_id})
-        comp_data      = api_get("/complaints/", params={"ward_id": ward_id})
+        bins_data      = api_get_all("/bins/",       params={"ward_id": ward_id})
+        comp_data      = api_get_all("/complaints/", params={"ward_id": ward_id})
         overflow_data  = api_get("/overflow/high-risk")
         city_data      = api_get("/reports/city-summary")
 
@@ -26,6 +26,8 @@ def show():
     complaints = comp_data["data"]   if comp_data      else []
     high_risk  = overflow_data["data"] if overflow_data else []
     city       = city_data["data"]   if city_data      else {}
+    show_truncation(bins_data, "bins")
+    show_truncation(comp_data, "complaints")
 
     open_comp      = sum(1 for c in complaints if c.get("status") == "open")
     resolved_comp  = sum(1 for c in complaints if c.get("status") == "resolved")
@@ -3,7 +3,7 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime, timezone
-from utils import page_header, api_get
+from utils import page_header, api_get, api_get_all, show_truncation
 
 
 def show():
@@ -12,10 +12,11 @@ def show():
     # Pull overflow + complaints data to build notifications
     with st.spinner("Loading notifications..."):
         overflow  = api_get("/overflow/high-risk")
-        comp_data = api_get("/complaints/")
+        comp_data = api_get_all("/complaints/")
 
     high_risk  = overflow["data"]   if overflow   else []
     complaints = comp_data["data"]  if comp_data  else []
+    show_truncation(comp_data, "complaints")
     uid        = st.session_state.get("uid")
     role       = st.session_state.get("role","household")
 
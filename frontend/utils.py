@@ -224,6 +224,32 @@ def api_get(path: str, params: dict = None) -> dict | None:
         return None
 
 
+def api_get_all(path: str, params: dict = None, max_pages: int = 20) -> dict | None:
+    """
+    api_get for paginated list endpoints: follows next_page_token and returns
+    one response with every page's data. Stops after max_pages and sets
+    "truncated" so the page can say the list is incomplete.
+    """
+    params = dict(params or {})
+    first = api_get(path, params)
+    if not first:
+        return first
+    data, token, pages = list(first.get("data") or []), first.get("next_page_token"), 1
+    while token and pages < max_pages:
+        page = api_get(path, {**params, "page_token": token})
+        if not page:
+            break
+        data += page.get("data") or []
+        token, pages = page.get("next_page_token"), pages + 1
+    return {**first, "data": data, "next_page_token": token, "truncated": bool(token)}
+
+
+def show_truncation(result: dict | None, what: str) -> None:
+    """Caption under a list that api_get_all could not load completely."""
+    if result and result.get("truncated"):
+        st.caption(f"⚠️ Showing the first {len(result['data'])} {what} only — narrow the filters to see the rest.")
+
+
 def api_post(path: str, json_data: dict = None, files=None) -> dict | None:
     if not st.session_state.get("id_token"):
         return None
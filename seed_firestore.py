@@ -1,24 +1,28 @@
 """
 WASTE IQ – Firestore Seed Script
-Run once to populate demo data. Requires firebase_service_account.json.
+Run once to populate demo data. Uses the same Firebase credentials as the
+backend (FIREBASE_* env vars or firebase_service_account.json).
 Usage: python seed_firestore.py
+
+The *_doc builders define the document shapes and are reused by
+benchmarks/harness.py to generate synthetic cities.
 """
 
-import os, uuid
+import os, sys, uuid
 from datetime import datetime, timezone, timedelta
 from dotenv import load_dotenv
 load_dotenv()
 
-import firebase_admin
-from firebase_admin import credentials, firestore, auth as firebase_auth
-
 # ── Init ──────────────────────────────────────────────────────────────────────
-SA_PATH = os.getenv("FIREBASE_SERVICE_ACCOUNT_PATH", "./firebase_service_account.json")
-if not firebase_admin._apps:
-    cred = credentials.Certificate(SA_PATH)
-    firebase_admin.initialize_app(cred)
+# Document writes go through the backend's batched-write API
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+import firestore_client as fc
+from firebase_app import firebase_auth as _firebase_auth
 
-db = firestore.client()
+
+def _report(label, outcome):
+    for f in outcome["failed"]:
+        print(f"  ✗ {label} {f['doc_id']}: {f['error']}")
 
 # ── Demo Users ────────────────────────────────────────────────────────────────
 DEMO_USERS = [
@@ -46,8 +50,93 @@ WARDS = [
     {"ward_id": "WARD_02", "name": "Nadakkavu Ward",  "city": "Kozhikode", "population": 9500,  "population_density": 7200},
 ]
 
+# ── Sample classifications ────────────────────────────────────────────────────
+WASTE_SAMPLES = [
+    ("Banana Peel",     "Wet Waste",       92.3),
+    ("Plastic Bottle",  "Recyclable",      88.7),
+    ("Newspaper",       "Recyclable",      79.4),
+    ("Old Phone",       "E-Waste",         65.2),
+    ("Dead Battery",    "Hazardous Waste", 71.0),
+    ("Vegetable Scraps","Wet Waste",       85.6),
+    ("Cardboard Box",   "Recyclable",      91.1),
+    ("Tissue Paper",    "Dry Waste",       60.3),
+]
+
+
+# ── Document shapes ───────────────────────────────────────────────────────────
+def profile_doc(uid, email, name, role, ward_id, address="Kozhikode, Kerala"):
+    return {
+        "uid":        uid,
+        "email":      email,
+        "name":       name,
+        "role":       role,
+        "ward_id":    ward_id,
+        "phone":      None,
+        "address":    address,
+        "language":   "en",
+        "avatar_url": None,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def gamification_doc(uid, points=0):
+    return {
+        "uid":           uid,
+        "total_points":  points,
+        "weekly_points": points // 3,
+        "badges":        [],
+        "level":         "Starter" if points >= 50 else "Beginner",
+    }
+
+
+def bin_doc(bin_id, ward_id, lat, lng, address, fill, driver_uid, last_collected=None):
+    return {
+        "bin_id":          bin_id,
+        "ward_id":         ward_id,
+        "location":        {"lat": lat, "lng": lng, "address": address},
+        "fill_level":      fill,
+        "capacity_liters": 200.0,
+        "status":          "overflow" if fill >= 80 else "active",
+        "assigned_driver": driver_uid,
+        "last_collected":  last_collected or (datetime.now(timezone.utc) - timedelta(hours=36)).isoformat(),
+        "population_density": 8500.0,
+        "avg_daily_waste_kg": 3.0,
+        "created_at":      datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def waste_log_doc(uid, obj, cat, conf, timestamp):
+    return {
+        "uid":            uid,
+        "object_name":    obj,
+        "waste_category": cat,
+        "confidence":     conf,
+        "disposal_instructions": f"Place in the appropriate bin for {cat}.",
+        "recycling_tip":  f"♻️ Tip: Properly segregate {cat} to increase recycling rates.",
+        "image_url":      None,
+        "timestamp":      timestamp,
+    }
+
+
+def complaint_doc(complaint_id, title, description, ward_id, submitted_by, status, created_at):
+    resolved = status == "resolved"
+    return {
+        "complaint_id": complaint_id,
+        "title":        title,
+        "description":  description,
+        "ward_id":      ward_id,
+        "bin_id":       None,
+        "location":     None,
+        "submitted_by": submitted_by,
+        "status":       status,
+        "created_at":   created_at,
+        "resolved_at":  datetime.now(timezone.utc).isoformat() if resolved else None,
+        "resolution":   "Collection team notified and dispatched." if resolved else None,
+    }
+
 
 def create_user_if_not_exists(email, password, name, role, ward_id):
+    firebase_auth = _firebase_auth()
     try:
         user = firebase_auth.get_user_by_email(email)
         print(f"  ✓ User already exists: {email}")
@@ -60,81 +149,37 @@ def create_user_if_not_exists(email, password, name, role, ward_id):
     # Set custom role claim
     firebase_auth.set_custom_user_claims(uid, {"role": role})
 
-    # Firestore profile
-    db.collection("users").document(uid).set({
-        "uid":        uid,
-        "email":      email,
-        "name":       name,
-        "role":       role,
-        "ward_id":    ward_id,
-        "phone":      None,
-        "address":    "Kozhikode, Kerala",
-        "language":   "en",
-        "avatar_url": None,
-        "created_at": datetime.now(timezone.utc).isoformat(),
-    }, merge=True)
-
-    # Gamification
-    db.collection("gamification").document(uid).set({
-        "uid":          uid,
-        "total_points": 0,
-        "weekly_points": 0,
-        "badges":       [],
-        "level":        "Beginner",
-    }, merge=True)
+    # Firestore profile + gamification in one commit
+    outcome = fc.batch_write([
+        ("set_merge", "users", uid, profile_doc(uid, email, name, role, ward_id)),
+        ("set_merge", "gamification", uid, gamification_doc(uid)),
+    ])
+    _report("profile", outcome)
 
     return uid
 
 
 def seed_bins(driver_uid):
     print("\n📦 Seeding bins...")
-    bin_ids = []
+    docs = {}
     for b in BINS_DATA:
         bid = str(uuid.uuid4())
-        status = "overflow" if b["fill"] >= 80 else "active"
-        db.collection("bins").document(bid).set({
-            "bin_id":          bid,
-            "ward_id":         b["ward_id"],
-            "location":        {"lat": b["lat"], "lng": b["lng"], "address": b["address"]},
-            "fill_level":      b["fill"],
-            "capacity_liters": 200.0,
-            "status":          status,
-            "assigned_driver": driver_uid,
-            "last_collected":  (datetime.now(timezone.utc) - timedelta(hours=36)).isoformat(),
-            "population_density": 8500.0,
-            "avg_daily_waste_kg": 3.0,
-            "created_at":      datetime.now(timezone.utc).isoformat(),
-        })
-        bin_ids.append(bid)
+        docs[bid] = bin_doc(bid, b["ward_id"], b["lat"], b["lng"], b["address"], b["fill"], driver_uid)
         print(f"  + Bin {bid[:8]} at {b['address']} ({b['fill']:.0f}%)")
-    return bin_ids
+    outcome = fc.set_docs("bins", docs)
+    _report("bin", outcome)
+    return [bid for bid in outcome["ids"] if bid]
 
 
 def seed_waste_logs(household_uid, bin_ids):
     print("\n🔍 Seeding waste classification logs...")
-    SAMPLES = [
-        ("Banana Peel",     "Wet Waste",       92.3),
-        ("Plastic Bottle",  "Recyclable",      88.7),
-        ("Newspaper",       "Recyclable",      79.4),
-        ("Old Phone",       "E-Waste",         65.2),
-        ("Dead Battery",    "Hazardous Waste", 71.0),
-        ("Vegetable Scraps","Wet Waste",       85.6),
-        ("Cardboard Box",   "Recyclable",      91.1),
-        ("Tissue Paper",    "Dry Waste",       60.3),
-    ]
-    for i, (obj, cat, conf) in enumerate(SAMPLES):
+    logs = []
+    for i, (obj, cat, conf) in enumerate(WASTE_SAMPLES):
         ts = (datetime.now(timezone.utc) - timedelta(days=i, hours=i*2)).isoformat()
-        db.collection("waste_logs").add({
-            "uid":            household_uid,
-            "object_name":    obj,
-            "waste_category": cat,
-            "confidence":     conf,
-            "disposal_instructions": f"Place in the appropriate bin for {cat}.",
-            "recycling_tip":  f"♻️ Tip: Properly segregate {cat} to increase recycling rates.",
-            "image_url":      None,
-            "timestamp":      ts,
-        })
-    print(f"  + {len(SAMPLES)} waste logs created")
+        logs.append(waste_log_doc(household_uid, obj, cat, conf, ts))
+    outcome = fc.add_docs("waste_logs", logs)
+    _report("waste log", outcome)
+    print(f"  + {outcome['written']} waste logs created")
 
 
 def seed_complaints(household_uid):
@@ -144,28 +189,19 @@ def seed_complaints(household_uid):
         {"title": "Missed collection on Monday",   "desc": "Waste was not collected on Monday morning in our area.",         "status": "resolved"},
         {"title": "Illegal dumping near canal",    "desc": "Someone is dumping bags of waste near the canal.",              "status": "in_review"},
     ]
-    for c in COMPLAINTS:
-        cid = str(uuid.uuid4())
-        db.collection("complaints").add({
-            "complaint_id": cid,
-            "title":        c["title"],
-            "description":  c["desc"],
-            "ward_id":      "WARD_01",
-            "bin_id":       None,
-            "location":     None,
-            "submitted_by": household_uid,
-            "status":       c["status"],
-            "created_at":   (datetime.now(timezone.utc) - timedelta(days=2)).isoformat(),
-            "resolved_at":  datetime.now(timezone.utc).isoformat() if c["status"] == "resolved" else None,
-            "resolution":   "Collection team notified and dispatched." if c["status"] == "resolved" else None,
-        })
-    print(f"  + {len(COMPLAINTS)} complaints created")
+    created_at = (datetime.now(timezone.utc) - timedelta(days=2)).isoformat()
+    docs = [complaint_doc(str(uuid.uuid4()), c["title"], c["desc"], "WARD_01", household_uid,
+                          c["status"], created_at)
+            for c in COMPLAINTS]
+    outcome = fc.add_docs("complaints", docs)
+    _report("complaint", outcome)
+    print(f"  + {outcome['written']} complaints created")
 
 
 def seed_wards():
     print("\n🏙️ Seeding wards...")
+    _report("ward", fc.set_docs("wards", {w["ward_id"]: w for w in WARDS}))
     for w in WARDS:
-        db.collection("wards").document(w["ward_id"]).set(w)
         print(f"  + Ward {w['ward_id']}: {w['name']}")
 
 
@@ -173,15 +209,8 @@ def seed_gamification_points(uids_by_role):
     """Give each demo user some starter points."""
     print("\n⭐ Seeding gamification points...")
     starter_pts = {"household": 145, "municipal": 320, "driver": 215, "admin": 500}
-    for role, uid in uids_by_role.items():
-        pts = starter_pts.get(role, 50)
-        db.collection("gamification").document(uid).set({
-            "uid":           uid,
-            "total_points":  pts,
-            "weekly_points": pts // 3,
-            "badges":        [],
-            "level":         "Starter" if pts >= 50 else "Beginner",
-        }, merge=True)
+    docs = {uid: gamification_doc(uid, starter_pts.get(role, 50)) for role, uid in uids_by_role.items()}
+    _report("gamification", fc.set_docs("gamification", docs, merge=True))
     print("  ✓ Points seeded")
 
 
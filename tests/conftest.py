@@ -0,0 +1,30 @@
+"""
+Shared fixtures. Backend modules are imported the way uvicorn imports them
+(top-level, backend/ on sys.path), against the in-memory storage backend.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ.setdefault("AUTH_VERIFIER", "stand-in")
+os.environ["WRITE_BEHIND_COLLECTIONS"] = ""
+os.environ["BIN_REGISTRY"] = ""
+
+import firestore_client as fc  # noqa: E402
+from storage_backends import MemoryBackend, SQLiteBackend  # noqa: E402
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    """firestore_client switched to a fresh memory or SQLite backend."""
+    previous = fc.get_backend()
+    store = MemoryBackend() if request.param == "memory" else SQLiteBackend(str(tmp_path / "test.db"))
+    fc.set_backend(store)
+    yield store
+    fc.set_backend(previous)
@@ -0,0 +1,139 @@
+import asyncio
+import time
+
+import pytest
+
+import token_verifier as tv
+from token_cache import TokenCache
+
+
+def _claims(uid="u1", iat=None, ttl=3600):
+    iat = time.time() if iat is None else iat
+    return {"uid": uid, "iat": iat, "exp": iat + ttl, "role": "admin"}
+
+
+# ── TokenCache ────────────────────────────────────────────────
+
+def test_cached_until_exp():
+    cache = TokenCache()
+    cache.put("tok", _claims())
+    assert cache.get("tok")["role"] == "admin"
+    cache.put("old", _claims(iat=time.time() - 3600, ttl=3599))
+    assert cache.get("old") is None
+
+
+def test_invalidate_user_marks_older_tokens_stale():
+    cache = TokenCache()
+    before = _claims(iat=time.time() - 10)
+    cache.put("tok", before)
+    cache.invalidate_user("u1")
+    assert cache.get("tok") is None
+    assert cache.is_stale(before)
+    cache.put("tok", before)                         # stale tokens are never cached again
+    assert cache.get("tok") is None
+    assert not cache.is_stale(_claims(iat=time.time() + 1))
+    assert not cache.is_stale(_claims(uid="u2", iat=time.time() - 10))
+
+
+def test_token_minted_in_the_invalidation_second_is_fresh():
+    cache = TokenCache()
+    cache.invalidate_user("u1")                      # set_user_role during signup …
+    same_second = _claims(iat=int(time.time()))       # … then the first login
+    assert not cache.is_stale(same_second)
+    cache.put("tok", same_second)
+    assert cache.get("tok") is not None
+    assert cache.is_stale(_claims(iat=int(time.time()) - 1))
+
+
+def test_lru_eviction_and_disabled_cache():
+    cache = TokenCache(max_size=2)
+    for tok in ("a", "b", "c"):
+        cache.put(tok, _claims(uid=tok))
+    assert cache.get("a") is None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+    off = TokenCache(max_size=0)
+    off.put("a", _claims())
+    assert off.get("a") is None
+
+
+# ── TokenVerifier / stand-in issuer ───────────────────────────
+
+@pytest.fixture(scope="module")
+def authority():
+    pytest.importorskip("jwt")
+    return tv.StandInAuthority("wasteiq-test")
+
+
+def test_stand_in_tokens_verify(authority):
+    claims = authority.verifier().verify(authority.mint("u1", "municipal", "a@b.c"))
+    assert (claims["uid"], claims["role"], claims["email"]) == ("u1", "municipal", "a@b.c")
+
+
+def test_expired_and_foreign_tokens_are_rejected(authority):
+    verifier = authority.verifier()
+    with pytest.raises(tv.ExpiredTokenError):
+        verifier.verify(authority.mint("u1", ttl=-60))
+    other = tv.StandInAuthority("wasteiq-test")
+    with pytest.raises(tv.InvalidTokenError):       # signed by a different key
+        verifier.verify(other.mint("u1"))
+    with pytest.raises(tv.InvalidTokenError):
+        tv.StandInAuthority("another-project").verifier().verify(authority.mint("u1"))
+    with pytest.raises(tv.InvalidTokenError):
+        verifier.verify("not.a.token")
+
+
+def test_missing_keys_fail_fast_instead_of_fetching_inline():
+    keys = tv.KeySet(url="http://127.0.0.1:9/unreachable")
+    try:
+        start = time.perf_counter()
+        with pytest.raises(tv.KeysUnavailableError):
+            keys.get("kid")
+        assert time.perf_counter() - start < 0.5
+    finally:
+        keys.stop()
+
+
+# ── auth._verify_token ────────────────────────────────────────
+
+def test_stale_stand_in_token_is_rejected(authority, monkeypatch):
+    pytest.importorskip("fastapi")
+    import auth
+    from fastapi import HTTPException
+
+    monkeypatch.setattr(auth, "verifier", authority.verifier())
+    monkeypatch.setattr(auth, "token_cache", TokenCache())
+    token = authority.mint("u1", "admin")
+    assert asyncio.run(auth._verify_token(token))["role"] == "admin"
+
+    time.sleep(1.05)                               # iat has one-second resolution
+    auth.token_cache.invalidate_user("u1")         # e.g. set_user_role(u1, "household")
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(auth._verify_token(token))
+    assert e.value.status_code == 401
+
+    auth.token_cache.invalidate_user("u1")         # signup: set_user_role, then login
+    fresh = authority.mint("u1", "household")      # usually within the same second
+    assert asyncio.run(auth._verify_token(fresh))["role"] == "household"
+
+
+def test_stale_firebase_token_gets_the_current_role(monkeypatch):
+    pytest.importorskip("fastapi")
+    import auth
+
+    class Record:
+        disabled = False
+        custom_claims = {"role": "household"}
+
+    class FirebaseAuth:
+        @staticmethod
+        def get_user(uid):
+            return Record()
+
+    cache = TokenCache()
+    old = _claims(iat=time.time() - 10)
+    cache.invalidate_user("u1")
+    monkeypatch.setattr(auth, "verifier", None)
+    monkeypatch.setattr(auth, "token_cache", cache)
+    monkeypatch.setattr(auth, "_sdk_verify", lambda token, check_revoked=False: dict(old))
+    monkeypatch.setattr(auth, "_firebase_auth", lambda: FirebaseAuth)
+    assert asyncio.run(auth._verify_token("tok"))["role"] == "household"
@@ -0,0 +1,59 @@
+import pytest
+
+import firestore_client as fc
+
+
+def test_all_ops_applied(backend):
+    fc.set_doc("bins", "b1", {"fill": 10})
+    result = fc.batch_write([
+        ("set", "bins", "b2", {"fill": 20}),
+        ("set_merge", "bins", "b1", {"ward": "W1"}),
+        ("update", "bins", "b1", {"fill": 11}),
+        ("add", "logs", None, {"msg": "hi"}),
+    ])
+    assert result["written"] == 4 and result["failed"] == []
+    b1 = fc.get_doc("bins", "b1")
+    assert (b1["fill"], b1["ward"]) == (11, "W1")
+    added_id = result["ids"][3]
+    assert added_id and fc.get_doc("logs", added_id)["msg"] == "hi"
+
+
+def test_failures_are_reported_per_op(backend):
+    fc.set_doc("bins", "b1", {"fill": 10})
+    result = fc.batch_write([
+        ("set", "bins", "b2", {"fill": 20}),
+        ("update", "bins", "missing", {"fill": 1}),     # update of a missing doc fails
+        ("update", "bins", "b1", {"fill": 12}),
+    ])
+    assert result["written"] == 2
+    assert [f["index"] for f in result["failed"]] == [1]
+    failure = result["failed"][0]
+    assert (failure["kind"], failure["collection"], failure["doc_id"]) == ("update", "bins", "missing")
+    assert failure["error"]
+    assert result["ids"] == ["b2", None, "b1"]
+    # The rest of the chunk still went through
+    assert fc.get_doc("bins", "b2")["fill"] == 20
+    assert fc.get_doc("bins", "b1")["fill"] == 12
+    assert fc.get_doc("bins", "missing") is None
+
+
+def test_large_batches_are_chunked(backend):
+    n = fc.BATCH_LIMIT * 2 + 3
+    result = fc.add_docs("logs", [{"i": i} for i in range(n)])
+    assert result["written"] == n and result["batches"] == 3
+    assert len(set(result["ids"])) == n
+    assert fc.count_docs("logs") == n
+
+
+def test_unknown_kind_is_rejected_before_writing(backend):
+    with pytest.raises(ValueError):
+        fc.batch_write([("set", "bins", "b1", {}), ("upsert", "bins", "b2", {})])
+    assert fc.get_doc("bins", "b1") is None
+
+
+def test_batch_writes_invalidate_cached_reads(backend):
+    fc.get_doc_cache().configure("users", 100, 60.0)
+    fc.set_doc("users", "u1", {"role": "household"})
+    assert fc.get_doc("users", "u1")["role"] == "household"      # now cached
+    fc.update_docs("users", {"u1": {"role": "admin"}})
+    assert fc.get_doc("users", "u1")["role"] == "admin"
@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+import firestore_client as fc
+from bin_registry import BinRegistry
+from storage_backends import MemoryBackend
+
+
+class CountingBackend(MemoryBackend):
+    """Counts reads and can hold them, to see which thread pays for a refresh."""
+
+    def __init__(self):
+        super().__init__()
+        self.reads = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def get_docs(self, collection, doc_ids):
+        self.gate.wait(5)
+        self.reads.append(("get_docs", sorted(doc_ids)))
+        return super().get_docs(collection, doc_ids)
+
+    def get_doc(self, collection, doc_id):
+        self.reads.append(("get_doc", doc_id))
+        return super().get_doc(collection, doc_id)
+
+    def query(self, collection, *args, **kwargs):
+        self.reads.append(("query", collection))
+        return super().query(collection, *args, **kwargs)
+
+
+@pytest.fixture
+def registry():
+    previous = fc.get_backend()
+    store = CountingBackend()
+    store.set_doc("bins", "b1", {"ward_id": "w1", "fill_level": 10})
+    fc.set_backend(store)
+    reg = BinRegistry(store, poll_interval=60).start()
+    fc._registry = reg
+    yield store, reg
+    fc._registry = None
+    reg.stop()
+    fc.set_backend(previous)
+
+
+def _settle(reg):
+    deadline = time.monotonic() + 5
+    while not reg.serves("bins") and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert reg.serves("bins")
+
+
+def test_write_does_not_read_on_the_writers_thread(registry):
+    store, reg = registry
+    store.reads.clear()
+    store.gate.clear()                                 # hold the poll thread's refresh
+    fc.update_doc("bins", "b1", {"fill_level": 90})
+    assert store.reads == []
+    assert not reg.serves("bins")                      # reads fall through meanwhile …
+    assert fc.get_doc("bins", "b1")["fill_level"] == 90
+    store.gate.set()
+    _settle(reg)
+    assert reg.get_doc("bins", "b1")["fill_level"] == 90
+
+
+def test_batch_write_refreshes_once(registry):
+    store, reg = registry
+    store.gate.clear()
+    result = fc.batch_write([("add", "bins", None, {"ward_id": "w2", "n": i}) for i in range(20)])
+    store.reads.clear()
+    store.gate.set()
+    _settle(reg)
+    assert [r[0] for r in store.reads] == ["get_docs"]
+    assert store.reads[0][1] == sorted(result["ids"])
+    assert len(fc.query_collection("bins", filters=[("ward_id", "==", "w2")])) == 20
+
+
+def test_add_doc_is_refreshed_by_id(registry):
+    store, reg = registry
+    store.reads.clear()
+    doc_id = fc.add_doc("bins", {"ward_id": "w3"})
+    _settle(reg)
+    assert ("query", "bins") not in store.reads        # no full resync for an add
+    assert reg.get_doc("bins", doc_id)["ward_id"] == "w3"
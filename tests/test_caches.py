@@ -0,0 +1,133 @@
+import threading
+import time
+
+import pytest
+
+import firestore_client as fc
+from doc_cache import DocCache, parse_config
+from query_cache import QueryCache, query_key
+
+
+# ── DocCache ──────────────────────────────────────────────────
+
+def test_doc_cache_hit_returns_private_copy():
+    cache = DocCache({"users": (10, 60.0)})
+    cache.put("users", "u1", {"role": "admin", "tags": ["a"]}, cache.generation("users"))
+    hit, doc = cache.get("users", "u1")
+    assert hit and doc == {"role": "admin", "tags": ["a"]}
+    doc["tags"].append("mutated")
+    assert cache.get("users", "u1")[1]["tags"] == ["a"]
+
+
+def test_doc_cache_skips_uncached_collections():
+    cache = DocCache({"users": (10, 60.0)})
+    cache.put("bins", "b1", {"x": 1}, cache.generation("bins"))
+    assert cache.get("bins", "b1") == (False, None)
+
+
+def test_read_racing_a_write_is_not_cached():
+    cache = DocCache({"users": (10, 60.0)})
+    generation = cache.generation("users")          # reader snapshots, then reads the old doc
+    cache.invalidate("users", "u1")                 # a write lands meanwhile
+    cache.put("users", "u1", {"role": "household"}, generation)
+    assert cache.get("users", "u1") == (False, None)
+
+
+def test_doc_cache_ttl_and_lru():
+    cache = DocCache({"users": (2, 0.05)})
+    for uid in ("u1", "u2", "u3"):
+        cache.put("users", uid, {"uid": uid}, cache.generation("users"))
+    assert cache.get("users", "u1") == (False, None)     # evicted
+    assert cache.get("users", "u3")[0]
+    time.sleep(0.06)
+    assert cache.get("users", "u3") == (False, None)     # expired
+    assert cache.stats()["users"]["evictions"] == 1
+
+
+def test_parse_config():
+    assert parse_config("users=10:5, bins=0:1,wards=3") == {
+        "users": (10, 5.0), "bins": (0, 1.0), "wards": (3, 60.0)}
+
+
+def test_get_doc_cache_invalidated_by_writes(backend):
+    fc.get_doc_cache().configure("users", 100, 60.0)
+    fc.set_doc("users", "u1", {"role": "household"})
+    assert fc.get_doc("users", "u1")["role"] == "household"
+    backend.set_doc("users", "u1", {"role": "driver"})          # bypasses firestore_client
+    assert fc.get_doc("users", "u1")["role"] == "household"      # served from cache
+    fc.update_doc("users", "u1", {"role": "admin"})
+    assert fc.get_doc("users", "u1")["role"] == "admin"
+    fc.delete_doc("users", "u1")
+    assert fc.get_doc("users", "u1") is None
+
+
+# ── QueryCache ────────────────────────────────────────────────
+
+KEY = query_key([("ward_id", "==", "W1")], "fill", False, None, None)
+
+
+def test_query_cache_hit_and_invalidate():
+    cache = QueryCache({"bins": (10, 60.0)})
+    calls = []
+    loader = lambda: calls.append(1) or [{"_id": "b1"}]
+    assert cache.get_or_load("bins", KEY, loader) == [{"_id": "b1"}]
+    assert cache.get_or_load("bins", KEY, loader) == [{"_id": "b1"}]
+    assert len(calls) == 1
+    cache.invalidate("bins")
+    cache.get_or_load("bins", KEY, loader)
+    assert len(calls) == 2
+
+
+def test_query_racing_a_write_is_not_cached():
+    cache = QueryCache({"bins": (10, 60.0)})
+
+    def loader():
+        cache.invalidate("bins")          # a write lands while the query runs
+        return [{"_id": "stale"}]
+
+    assert cache.get_or_load("bins", KEY, loader) == [{"_id": "stale"}]
+    calls = []
+    cache.get_or_load("bins", KEY, lambda: calls.append(1) or [])
+    assert calls == [1]
+
+
+def test_identical_concurrent_queries_are_coalesced():
+    cache = QueryCache({"bins": (10, 60.0)})
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_loader():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return [{"_id": "b1"}]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("bins", KEY, slow_loader)))
+               for _ in range(5)]
+    threads[0].start()
+    started.wait(5)
+    for t in threads[1:]:
+        t.start()
+    time.sleep(0.05)
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert len(calls) == 1
+    assert results == [[{"_id": "b1"}]] * 5
+    assert cache.stats()["bins"]["coalesced"] == 4
+
+
+def test_failed_load_is_not_cached():
+    cache = QueryCache({"bins": (10, 60.0)})
+    with pytest.raises(RuntimeError):
+        cache.get_or_load("bins", KEY, lambda: (_ for _ in ()).throw(RuntimeError("down")))
+    assert cache.get_or_load("bins", KEY, lambda: [{"_id": "ok"}]) == [{"_id": "ok"}]
+
+
+def test_query_collection_cache_invalidated_by_writes(backend):
+    fc.get_query_cache().configure("bins", 16, 60.0)
+    fc.set_doc("bins", "b1", {"ward_id": "W1"})
+    assert len(fc.query_collection("bins", [("ward_id", "==", "W1")])) == 1
+    fc.set_doc("bins", "b2", {"ward_id": "W1"})
+    assert len(fc.query_collection("bins", [("ward_id", "==", "W1")])) == 2
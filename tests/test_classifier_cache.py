@@ -0,0 +1,67 @@
+import io
+
+import pytest
+
+pytest.importorskip("PIL")
+from PIL import Image  # noqa: E402
+
+import waste_classifier as wc  # noqa: E402
+from image_cache import ImageCache  # noqa: E402
+
+
+class FakeKeys:
+    def __init__(self, key=""):
+        self.value = key
+
+    def key(self):
+        return self.value
+
+
+def _photo() -> bytes:
+    img = Image.new("L", (64, 64))
+    img.putdata([(x * 4 + y) % 256 for y in range(64) for x in range(64)])
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+@pytest.fixture
+def classifier(monkeypatch):
+    monkeypatch.setattr(wc, "_image_cache", ImageCache())
+    clf = wc.WasteClassifier.__new__(wc.WasteClassifier)
+    clf.gemini = FakeKeys()
+    calls = []
+
+    def predict(img_bytes):
+        calls.append(img_bytes)
+        mode = "gemini" if clf.gemini.key() else "yolo_local"
+        return {"object_name": "Bottle", "waste_category": "Recyclable", "confidence": 42.0, "mode": mode}
+
+    monkeypatch.setattr(clf, "_predict", predict)
+    return clf, calls
+
+
+def test_yolo_only_deployments_hit_the_cache(classifier):
+    clf, calls = classifier
+    img = _photo()
+    assert clf.predict(img)["mode"] == "yolo_local"
+    hit = clf.predict(img)
+    assert (hit["mode"], hit["cached_mode"], len(calls)) == ("cache", "yolo_local", 1)
+    assert clf.predict_batch([img, img])[0]["mode"] == "cache"
+    assert len(calls) == 1
+
+
+def test_local_answers_are_not_served_once_gemini_is_configured(classifier):
+    clf, calls = classifier
+    img = _photo()
+    clf.predict(img)
+    clf.gemini.value = "key"
+    assert clf.predict(img)["mode"] == "gemini"      # low confidence → not cached
+    assert len(calls) == 2
+
+
+def test_yolo_fallback_with_a_gemini_key_is_not_cached():
+    assert wc._cacheable({"mode": "gemini", "confidence": 90.0}, local_only=False)
+    assert not wc._cacheable({"mode": "gemini", "confidence": 40.0}, local_only=True)
+    assert not wc._cacheable({"mode": "yolo_local", "confidence": 90.0}, local_only=False)
+    assert not wc._cacheable({"mode": "yolo_local", "object_name": "Unable to identify object"}, local_only=True)
@@ -0,0 +1,64 @@
+import random
+import string
+
+import pytest
+
+from keyword_matcher import KeywordMatcher
+
+
+def naive_first_in(keys, text):
+    return next((k for k in keys if k in text), None)
+
+
+def naive_first_containing(keys, text):
+    return next((k for k in keys if text in k), None)
+
+
+def _random_case(rng):
+    alphabet = "abcde "
+    keys = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 5))) for _ in range(rng.randint(1, 30))]
+    texts = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12))) for _ in range(50)]
+    return keys, texts
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_matches_naive_scans_on_random_tables(seed):
+    rng = random.Random(seed)
+    keys, texts = _random_case(rng)
+    matcher = KeywordMatcher(keys)
+    for text in texts:
+        assert matcher.first_in(text) == naive_first_in(keys, text)
+        assert matcher.first_containing(text) == naive_first_containing(keys, text)
+        either = [k for k in keys if k in text or text in k]
+        assert matcher.first_either(text) == (either[0] if either else None)
+
+
+def test_table_order_wins_over_match_position():
+    matcher = KeywordMatcher(["bottle", "plastic", "plastic bottle"])
+    assert matcher.first_in("crushed plastic bottle") == "bottle"
+    assert matcher.first_containing("plastic") == "plastic"
+    assert matcher.first_containing("ic bot") == "plastic bottle"
+
+
+def test_no_match_and_duplicate_keys():
+    matcher = KeywordMatcher(["can", "can", "tin"])
+    assert matcher.keys == ["can", "tin"]
+    assert matcher.first_in("paper") is None
+    assert matcher.first_containing("x") is None
+
+
+def test_waste_tables_match_naive_scans():
+    pytest.importorskip("PIL")
+    pytest.importorskip("rapidfuzz")
+    import waste_classifier as wc
+
+    rng = random.Random(7)
+    keys = list(wc.WASTE_MAP) + list(wc._IMAGENET_WASTE)
+    names = [rng.choice(keys) for _ in range(300)]
+    names += [f"crushed {rng.choice(keys)}, {rng.choice(keys)}" for _ in range(300)]
+    names += ["".join(rng.choice(string.ascii_lowercase + " ") for _ in range(rng.randint(1, 15)))
+              for _ in range(300)]
+    for name in names:
+        assert wc._WASTE_MATCHER.first_in(name) == naive_first_in(list(wc.WASTE_MAP), name)
+        assert wc._IMAGENET_MATCHER.first_either(name) == next(
+            (k for k in wc._IMAGENET_WASTE if k in name or name in k), None)
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import firestore_client as fc
+
+
+def _seed(n=23):
+    # Few distinct scores, so most page boundaries fall inside a tie
+    for i in range(n):
+        fc.set_doc("items", f"doc{i:02d}", {"score": i % 4, "ward": "A" if i % 3 else "B"})
+
+
+def _walk(page_size, **kwargs):
+    seen, token, pages = [], None, 0
+    while True:
+        docs, token = fc.query_page("items", page_size=page_size, page_token=token, **kwargs)
+        seen += docs
+        pages += 1
+        if token is None:
+            return seen, pages
+        assert pages < 100
+
+
+@pytest.mark.parametrize("page_size", [1, 4, 5, 23, 50])
+@pytest.mark.parametrize("desc", [False, True])
+def test_pages_cover_every_doc_once_in_order(backend, page_size, desc):
+    _seed()
+    docs, _ = _walk(page_size, order_by="score", order_desc=desc)
+    ids = [d["_id"] for d in docs]
+    assert len(ids) == len(set(ids)) == 23
+    keys = [(d["score"], d["_id"]) for d in docs]
+    assert keys == sorted(keys, reverse=desc)        # ties broken by document id
+
+
+def test_pages_without_order_by_use_document_id(backend):
+    _seed()
+    docs, pages = _walk(5)
+    assert [d["_id"] for d in docs] == [f"doc{i:02d}" for i in range(23)]
+    assert pages == 5
+
+
+def test_filters_apply_across_pages(backend):
+    _seed()
+    docs, _ = _walk(3, filters=[("ward", "==", "B")], order_by="score")
+    assert {d["_id"] for d in docs} == {f"doc{i:02d}" for i in range(23) if i % 3 == 0}
+
+
+def test_exact_multiple_ends_with_an_empty_page(backend):
+    _seed(8)
+    docs, token = fc.query_page("items", order_by="score", page_size=4)
+    docs2, token2 = fc.query_page("items", order_by="score", page_size=4, page_token=token)
+    docs3, token3 = fc.query_page("items", order_by="score", page_size=4, page_token=token2)
+    assert len(docs) == len(docs2) == 4 and token2 is not None
+    assert docs3 == [] and token3 is None
+
+
+def test_projection_keeps_the_cursor_field(backend):
+    _seed()
+    docs, token = fc.query_page("items", order_by="score", page_size=4, fields=["ward"])
+    assert all(set(d) <= {"_id", "ward", "score"} for d in docs)
+    assert fc.decode_page_token(token) == (docs[-1]["score"], docs[-1]["_id"])
+
+
+def test_page_token_round_trip():
+    for value in (None, 0, 2.5, "käse", "2026-01-01T00:00:00+00:00"):
+        token = fc.encode_page_token(value, "doc/1")
+        assert "=" not in token
+        assert fc.decode_page_token(token) == (value, "doc/1")
+    assert fc.decode_page_token(None) is None
+    assert fc.decode_page_token("") is None
+
+
+def test_datetime_cursor_round_trips_as_datetime():
+    for value in (datetime(2026, 3, 1, 12, 30, 15, 250000, tzinfo=timezone.utc), datetime(2026, 3, 1)):
+        decoded, doc_id = fc.decode_page_token(fc.encode_page_token(value, "doc1"))
+        assert isinstance(decoded, datetime) and (decoded, doc_id) == (value, "doc1")
+
+
+def test_pages_ordered_by_a_timestamp(backend):
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for i in range(11):
+        fc.set_doc("items", f"doc{i:02d}", {"created_at": start + timedelta(minutes=i // 2)})
+    docs, _ = _walk(3, order_by="created_at", order_desc=True)
+    ids = [d["_id"] for d in docs]
+    assert len(ids) == len(set(ids)) == 11
+    keys = [(str(d["created_at"]), d["_id"]) for d in docs]
+    assert keys == sorted(keys, reverse=True)
+
+
+@pytest.mark.parametrize("token", ["not-base64!", "e30", "eyJ2IjoxfQ"])   # garbage, {}, {"v":1}
+def test_malformed_page_token_is_rejected(backend, token):
+    with pytest.raises(ValueError):
+        fc.query_page("items", page_token=token)
+
+
+def test_page_size_is_clamped(backend):
+    assert fc.clamp_page_size(0) == fc.DEFAULT_PAGE_SIZE
+    assert fc.clamp_page_size(10 ** 9) == fc.MAX_PAGE_SIZE
+    assert fc.clamp_page_size(-5) == 1
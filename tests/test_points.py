@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+import firestore_client as fc
+from points import PointsService
+from storage_backends import MemoryBackend
+
+
+class FlakyBackend(MemoryBackend):
+    """Fails the first `failures` commits, like a backend that is briefly unreachable."""
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    def commit_batch(self, ops):
+        if self.failures > 0:
+            self.failures -= 1
+            raise RuntimeError("backend unavailable")
+        super().commit_batch(ops)
+
+
+@pytest.fixture
+def flaky():
+    previous = fc.get_backend()
+    store = FlakyBackend(failures=0)
+    fc.set_backend(store)
+    yield store
+    fc.set_backend(previous)
+
+
+def _points(uid):
+    doc = fc.get_backend().get_doc("gamification", uid)
+    return doc and doc.get("total_points")
+
+
+def test_failed_award_is_retried_until_written(flaky):
+    flaky.failures = 5                                # whole batch + per-op retries, twice over
+    service = PointsService(window=0, retry_delay=0.01)
+    service.award("u1", 10)
+    service.award("u1", 5)                            # arrives while the retry is pending
+    deadline = time.monotonic() + 5
+    while service.pending() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert _points("u1") == 15
+    assert service.stats["retried"] >= 1 and service.stats["dropped"] == 0
+
+
+def test_award_is_dropped_after_max_attempts(flaky):
+    flaky.failures = 10 ** 6
+    service = PointsService(window=0, max_attempts=2, retry_delay=0.01)
+    service.award("u1", 10)
+    deadline = time.monotonic() + 5
+    while service.pending() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert service.stats["dropped"] == 1 and _points("u1") is None
+
+
+def test_awards_in_the_window_share_one_write(backend):
+    service = PointsService(window=60)
+    for uid, pts in (("a", 1), ("b", 2), ("a", 3)):
+        service.award(uid, pts)
+    service.flush()
+    assert (_points("a"), _points("b")) == (4, 2)
+    assert service.pending() == 0
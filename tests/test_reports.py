@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+import firestore_client as fc  # noqa: E402
+from auth import UserInfo  # noqa: E402
+from routers import complaints_router, reports_router  # noqa: E402
+
+
+@pytest.fixture
+def complaints(backend):
+    docs = [("w1", "open"), ("w1", "resolved"), ("w2", "resolved"), (None, "resolved"),
+            ("w2", "escalated"), ("w1", None)]
+    for i, (ward, status) in enumerate(docs):
+        doc = {"title": f"c{i}"}
+        if ward:
+            doc["ward_id"] = ward
+        if status:
+            doc["status"] = status
+        fc.set_doc("complaints", f"c{i}", doc)
+    return backend
+
+
+def test_complaint_breakdown_groups_by_raw_ward_id(complaints):
+    by_status, by_ward = asyncio.run(reports_router._complaint_breakdown())
+    assert by_ward == {"w1": {"total": 3, "resolved": 1}, "w2": {"total": 2, "resolved": 1},
+                       "unknown": {"total": 1, "resolved": 1}}
+    assert by_status == {"open": 1, "resolved": 3, "other": 2}
+
+
+def test_complaint_stats_keep_unknown_statuses_apart(complaints):
+    admin = UserInfo(uid="a", email="a@x.org", role="admin")
+    data = asyncio.run(complaints_router.complaint_stats(ward_id="w1", user=admin)).data
+    assert data["by_status"] == {"open": 1, "resolved": 1, "other": 1}
+    assert (data["total"], data["resolution_rate"]) == (3, 33.3)
@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+from user_index import UserIndex
+
+ROLES = ("household", "municipal", "driver", "admin")
+
+
+def _users(n=37):
+    return [{"uid": f"u{i:03d}", "email": f"{'ab'[i % 2]}{i:03d}@Example.com", "role": ROLES[i % 4]}
+            for i in range(n)]
+
+
+def _walk(index, page_size, **kwargs):
+    seen, token = [], None
+    while True:
+        users, token, total = index.page(page_size, token, **kwargs)
+        seen += users
+        if token is None:
+            return seen, total
+
+
+@pytest.mark.parametrize("page_size", [1, 5, 37, 100])
+def test_pages_cover_all_users_sorted_by_email(page_size):
+    index = UserIndex(_users, refresh_interval=0)
+    users, total = _walk(index, page_size)
+    assert total == 37
+    assert [u["email"].lower() for u in users] == sorted(u["email"].lower() for u in _users())
+
+
+def test_role_and_email_prefix_filters():
+    index = UserIndex(_users, refresh_interval=0)
+    drivers, total = _walk(index, 3, role="driver")
+    assert total == len(drivers) == sum(1 for u in _users() if u["role"] == "driver")
+    assert {u["role"] for u in drivers} == {"driver"}
+
+    matches, total = _walk(index, 4, email_prefix="B01")        # case-insensitive
+    assert total == len(matches)
+    assert sorted(u["uid"] for u in matches) == [u["uid"] for u in _users() if u["email"].startswith("b01")]
+
+    both, _ = _walk(index, 2, role="municipal", email_prefix="b")
+    assert both and all(u["role"] == "municipal" and u["email"].startswith("b") for u in both)
+    assert index.page(10, None, email_prefix="zzz") == ([], None, 0)
+
+
+def test_duplicate_emails_page_by_uid():
+    same = [{"uid": f"u{i}", "email": "dup@x.org", "role": "household"} for i in range(5)]
+    users, _ = _walk(UserIndex(lambda: same, refresh_interval=0), 2)
+    assert [u["uid"] for u in users] == [f"u{i}" for i in range(5)]
+
+
+def test_malformed_token_rejected():
+    with pytest.raises(ValueError):
+        UserIndex(_users, refresh_interval=0).page(5, "garbage!")
+
+
+def test_patch_and_upsert_update_in_place():
+    index = UserIndex(_users, refresh_interval=0)
+    index.page(1)
+    index.patch("u000", role="admin", disabled=True)
+    index.upsert({"uid": "new", "email": "0new@x.org", "role": "driver"})
+    admins, _ = _walk(index, 50, role="admin")
+    assert "u000" in {u["uid"] for u in admins}
+    assert not any(u["uid"] == "u000" for u in _walk(index, 50, role="household")[0])
+    assert index.page(1)[0][0]["uid"] == "new"
+
+
+def test_patch_during_refresh_survives_the_swap():
+    data = _users(4)
+    reading, release = threading.Event(), threading.Event()
+
+    def slow_source():
+        snapshot = [dict(u) for u in data]
+        reading.set()
+        release.wait(5)
+        return snapshot
+
+    index = UserIndex(lambda: [dict(u) for u in data], refresh_interval=0)
+    index.page(1)
+    index._source = slow_source
+    rebuild = threading.Thread(target=index.refresh)
+    rebuild.start()
+    reading.wait(5)
+    index.patch("u000", role="admin")                       # lands after the snapshot was taken
+    index.upsert({"uid": "late", "email": "late@x.org", "role": "driver"})
+    release.set()
+    rebuild.join(5)
+
+    users = {u["uid"]: u for u in _walk(index, 50)[0]}
+    assert users["u000"]["role"] == "admin"
+    assert "late" in users
+    assert "u000" in {u["uid"] for u in _walk(index, 50, role="admin")[0]}
@@ -0,0 +1,185 @@
+import itertools
+import json
+import shutil
+import threading
+import time
+
+import pytest
+
+import write_behind
+from write_behind import QueueFull, WriteBehindQueue
+
+
+class FakeStore:
+    """batch_write stand-in: records committed ids, can fail ops or whole commits."""
+
+    def __init__(self):
+        self.committed = {}
+        self.fail_ids = set()
+        self.down = False
+        self.lock = threading.Lock()
+
+    def commit(self, ops):
+        if self.down:
+            raise IOError("backend unavailable")
+        failed = []
+        with self.lock:
+            for i, (_, collection, doc_id, data) in enumerate(ops):
+                if doc_id in self.fail_ids:
+                    failed.append({"index": i})
+                else:
+                    self.committed[(collection, doc_id)] = data
+        return {"written": len(ops) - len(failed), "failed": failed}
+
+
+def _ids(prefix):
+    counter = itertools.count()
+    return lambda collection: f"{prefix}{next(counter)}"
+
+
+@pytest.fixture
+def store():
+    return FakeStore()
+
+
+def _queue(store, path, **kwargs):
+    kwargs.setdefault("flush_interval", 60.0)      # tests flush explicitly
+    return WriteBehindQueue(store.commit, _ids("id"), str(path), **kwargs)
+
+
+def test_append_returns_id_and_flush_commits(store, tmp_path):
+    q = _queue(store, tmp_path)
+    try:
+        doc_id = q.append("logs", {"n": 1})
+        assert q.pending() == 1 and not store.committed
+        q.flush()
+        assert store.committed == {("logs", doc_id): {"n": 1}}
+        assert q.pending() == 0
+    finally:
+        q.close()
+    assert not list(tmp_path.glob("w-*"))            # clean shutdown leaves no journal
+
+
+def test_unjournalable_documents_are_rejected(store, tmp_path):
+    q = _queue(store, tmp_path)
+    try:
+        with pytest.raises(TypeError):
+            q.append("logs", {"when": object()})
+    finally:
+        q.close()
+
+
+def test_journal_of_a_dead_worker_is_replayed(store, tmp_path):
+    store.down = True
+    q = _queue(store, tmp_path / "a")
+    ids = [q.append("logs", {"n": i}) for i in range(3)]
+    # Simulate a crash: another worker finds this journal with its lock released
+    dead = tmp_path / "b" / "w-999999"
+    shutil.copytree(q._dir, dead)
+    with q._lock:
+        q._stopped = True                            # stop the flusher without committing
+        q._wake.notify()
+    q._owner.close()
+
+    store.down = False
+    replay = _queue(store, tmp_path / "b")
+    try:
+        assert replay.pending() == 3
+        replay.flush()
+        assert {doc_id for _, doc_id in store.committed} == set(ids)
+        assert not dead.exists()
+    finally:
+        replay.close()
+
+
+def test_torn_journal_lines_are_skipped(store, tmp_path):
+    dead = tmp_path / "w-999999"
+    dead.mkdir()
+    (dead / "journal.00000001.log").write_text(
+        json.dumps({"c": "logs", "id": "ok"}) + "\t" + json.dumps({"n": 1}) + "\n"
+        + json.dumps({"c": "logs", "id": "torn"}) + "\t{\"n\":")
+    q = _queue(store, tmp_path)
+    try:
+        q.flush()
+        assert list(store.committed) == [("logs", "ok")]
+    finally:
+        q.close()
+
+
+def test_live_workers_journal_is_left_alone(store, tmp_path):
+    first = _queue(store, tmp_path)
+    try:
+        first.append("logs", {"n": 1})
+        with pytest.raises(RuntimeError):
+            _queue(store, tmp_path)              # same pid → same directory, locked
+    finally:
+        first.close()
+
+
+def test_failed_ops_are_retried_then_dead_lettered(store, tmp_path):
+    q = _queue(store, tmp_path, max_attempts=3)
+    try:
+        bad = q.append("logs", {"n": "bad"})
+        good = q.append("logs", {"n": "good"})
+        store.fail_ids.add(bad)
+        q.flush()
+        assert ("logs", good) in store.committed and q.pending() == 1
+        q.flush()
+        q.flush()
+        assert q.pending() == 0
+        assert q.stats["dead_lettered"] == 1
+        head, data = q._dead_path.read_text().rstrip("\n").split("\t")
+        assert json.loads(head)["id"] == bad and json.loads(data) == {"n": "bad"}
+    finally:
+        q.close()
+
+
+def test_full_backlog_raises_queue_full_without_blocking(store, tmp_path):
+    store.down = True
+    q = _queue(store, tmp_path, flush_size=2, max_pending=2, max_wait=0.2)
+    try:
+        q.append("logs", {"n": 1}, block=False)
+        q.append("logs", {"n": 2}, block=False)
+        q._failures = 10                         # keep the flusher backing off
+        with q._lock:
+            q._pending += [("logs", "x", {}, 0)] * 3
+        with pytest.raises(QueueFull):
+            q.append("logs", {"n": 3}, block=False)
+    finally:
+        store.down = False
+        q.close()
+
+
+def test_blocked_append_resumes_once_the_flusher_drains(store, tmp_path):
+    q = _queue(store, tmp_path, flush_size=2, max_pending=2, flush_interval=0.05)
+    try:
+        for i in range(10):
+            q.append("logs", {"n": i})           # back-pressure waits, never flushes inline
+        q.flush()
+        assert len(store.committed) == 10
+    finally:
+        q.close()
+
+
+def test_append_leaves_fsync_to_the_syncer_thread(store, tmp_path, monkeypatch):
+    synced_on = []
+    real_fsync = write_behind.os.fsync
+
+    def fsync(fd):
+        synced_on.append(threading.current_thread().name)
+        real_fsync(fd)
+
+    monkeypatch.setattr(write_behind.os, "fsync", fsync)
+    q = _queue(store, tmp_path)
+    try:
+        synced_on.clear()
+        for i in range(50):
+            q.append("logs", {"n": i}, block=False)
+        deadline = time.monotonic() + 5
+        while q._unsynced and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert not q._unsynced
+        assert synced_on and set(synced_on) == {"write-behind-fsync"}
+        assert q.stats["fsyncs"] <= 50                 # grouped, at most one per append
+    finally:
+        q.close()